@@ -1,21 +1,49 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
 from flask_cors import CORS
 from config import Config
+from .utils.sqlite_tuning import build_engine_options, apply_sqlite_pragmas
+from .utils.db_routing import RoutingSession, configure_read_bind, init_db_routing
+from .utils.group_commit import init_group_commit
+from .utils.compression import init_compression
+from .utils.availability import init_availability
+from .metrics import init_metrics
+from .serializers import FastJSONProvider
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
-migrate = Migrate()
+
+def init_migrations(app):
+    """ Flask-Migrate only for the `flask` CLI (flask db upgrade, ...): importing
+        alembic costs ~0.2 s that a web worker never needs
+    """
+    if click.get_current_context(silent=True) is None:
+        return None
+    from flask_migrate import Migrate
+    return Migrate(app, db)
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
+    configure_read_bind(app)
 
+    init_metrics(app)
+    # despues de init_metrics: los after_request corren en orden inverso y las metricas cuentan los bytes comprimidos
+    init_compression(app)
     db.init_app(app)
     jwt.init_app(app)
-    migrate.init_app(app, db)
+    init_migrations(app)
+    init_db_routing(app, db)
+    init_group_commit(app, db)
+    from .change_log import init_change_log
+    init_change_log()
+    from .rollups import init_rollups
+    init_rollups()
+    init_availability(app)
     CORS(app, resources={r"/api/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}}, supports_credentials=True)
 
     from .routes.auth import auth as auth_bp
@@ -27,11 +55,32 @@ def create_app(config_class=Config):
     from .routes.loans import loans_bp
     app.register_blueprint(loans_bp, url_prefix='/api/loans')
 
+    from .routes.batch import batch_bp
+    app.register_blueprint(batch_bp, url_prefix='/api/batch')
+
+    from .routes.changes import changes_bp
+    app.register_blueprint(changes_bp, url_prefix='/api/changes')
+
+    from .routes.analytics import analytics_bp
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+
+    from .cli import register_commands
+    register_commands(app)
+
     @app.route('/')
     def index():
         return {'message': 'MyBookSpace API is running!', 'status': 'success'}
 
     with app.app_context():
-        db.create_all()
-    
+        for engine in db.engines.values():
+            apply_sqlite_pragmas(engine, app.config.get('SQLITE_PRAGMAS'))
+        # en produccion (AUTO_CREATE_DB=0) el esquema viene de `flask db upgrade`
+        if app.config.get('AUTO_CREATE_DB', True):
+            from .utils.schema import upgrade_schema
+            upgrade_schema(app, db)
+
+    if app.config.get('STARTUP_WARMUP'):
+        from .utils.warmup import warm_up
+        warm_up(app, db)
+
     return app
\ No newline at end of file
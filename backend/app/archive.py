@@ -0,0 +1,68 @@
+""" Loan history archive: keep Loans down to the active and recent loans.
+
+    `flask archive-loans` moves loans returned more than LOAN_ARCHIVE_DAYS ago
+    to LoansArchive in chunks: each chunk is one INSERT ... SELECT and one
+    DELETE by id, committed on its own, so the write lock is held briefly and an
+    interrupted run just resumes where it stopped. Ids are kept, and
+    GET /api/loans/history reads both tables as one (UNION ALL, keyset on id).
+    The moved loans are logged as deletes for GET /api/changes, as /myLoans no
+    longer returns them.
+
+    Loans is AUTOINCREMENT, so archiving (or deleting) the newest loan never
+    lets SQLite hand its id out again.
+"""
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, literal, select, union_all
+from . import db
+from .change_log import log_deleted
+from .models import Book, Loan, LoanArchive
+from .serializers import LOAN_FIELDS, loan_row_to_dict
+
+
+def archive_loans(older_than_days=None, batch_size=None, now=None):
+    """ move loans returned before now - older_than_days; returns how many moved """
+    config = current_app.config
+    if older_than_days is None:
+        older_than_days = config.get('LOAN_ARCHIVE_DAYS', 365)
+    batch_size = batch_size or config.get('LOAN_ARCHIVE_BATCH', 1000)
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=older_than_days)
+
+    loans, archive = Loan.__table__, LoanArchive.__table__
+    moved, last_id = 0, 0
+    while True:
+        # avanza por id: los prestamos activos antiguos no se vuelven a leer en cada lote
+        ids = db.session.execute(
+            select(loans.c.id).where(loans.c.id > last_id, loans.c.return_date < cutoff)
+            .order_by(loans.c.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(archive.insert().from_select(
+            LOAN_FIELDS + ('archived_at',),
+            select(*(loans.c[name] for name in LOAN_FIELDS), literal(now)).where(loans.c.id.in_(ids)),
+        ))
+        # el DELETE Core no pasa por el flush: los clientes de /api/changes deben ver la baja
+        log_deleted(db.session, 'loan', db.session.execute(
+            select(loans.c.id, loans.c.user_id).where(loans.c.id.in_(ids))).all())
+        db.session.execute(delete(loans).where(loans.c.id.in_(ids)))
+        db.session.commit()
+        moved += len(ids)
+        last_id = ids[-1]
+    return moved
+
+
+def loan_history(user_id, before=None, limit=50):
+    """ the user's returned loans from Loans and LoansArchive, newest first """
+    parts = []
+    for table, archived in ((Loan.__table__, False), (LoanArchive.__table__, True)):
+        part = select(*(table.c[name] for name in LOAN_FIELDS), literal(archived).label('archived')) \
+            .where(table.c.user_id == user_id, table.c.return_date.is_not(None))
+        if before is not None:
+            part = part.where(table.c.id < before)
+        parts.append(part)
+    rows = db.session.execute(union_all(*parts).order_by(db.desc('id')).limit(limit)).all()
+
+    books = {book.id: book for book in Book.query.filter(Book.id.in_({row.book_id for row in rows}))}
+    return [loan_row_to_dict(row, books.get(row.book_id)) for row in rows]
@@ -0,0 +1,235 @@
+""" ASGI deployment mode.
+
+    The I/O-bound catalog routes (preview_book, add_book) are served natively on the
+    event loop: the OpenLibrary lookup is awaited on an httpx.AsyncClient, so a slow
+    upstream holds no thread. Their synchronous parts (JWT check, validation, DB
+    access) run inside a Flask request context on a bounded thread pool, reusing
+    the same functions as the WSGI views. Every other route is CPU/DB-bound and is
+    served by the regular Flask app through asgiref's WsgiToAsgi (also a thread pool).
+    GET /api/catalog/availability/stream is a Server-Sent Events stream of
+    available/total copies, held as a coroutine per client (app/utils/availability.py).
+
+    Run with:  uvicorn asgi:app --port 5001
+"""
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import request, jsonify, make_response, abort
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from werkzeug.test import EnvironBuilder
+from config import Config
+from . import create_app
+from .routes import catalog as catalog_routes
+from .utils.external_api import fetch_book_by_isbn_async
+from .metrics import REQUEST_START_KEY
+from .utils.availability import HUB_KEY
+
+try:
+    import httpx
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError as e:  # pragma: no cover
+    raise ImportError('ASGI mode needs asgiref and httpx: pip install asgiref httpx uvicorn') from e
+
+
+def _admin_only():
+    """ same check as catalog.admin_required, aborting with its 403 response """
+    verify_jwt_in_request()
+    if get_jwt().get('role') != 'admin':
+        abort(make_response(jsonify(msg='Admin privilege required'), 403))
+
+
+def _prepare_add_book():
+    _admin_only()
+    data = request.get_json()
+    error = catalog_routes.validate_new_book(data)
+    if error:
+        abort(make_response(*error))
+    return data
+
+
+def _finish_add_book(data, api_data):
+    # otra peticion pudo crear el mismo ISBN mientras esperabamos a OpenLibrary
+    return catalog_routes.validate_new_book(data) or catalog_routes.create_book(data, api_data)
+
+
+class AsgiApp:
+    """ ASGI application wrapping a Flask app (see module docstring) """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.executor = ThreadPoolExecutor(
+            max_workers=flask_app.config.get('ASGI_THREADPOOL_SIZE', 32),
+            thread_name_prefix='asgi-sync'
+        )
+        self._client = None
+        self.routes = [
+            ('GET', re.compile(r'^/api/catalog/books/preview/(?P<isbn>[^/]+)$'), self.preview_book),
+            ('POST', re.compile(r'^/api/catalog/books$'), self.add_book),
+            ('GET', re.compile(r'^/api/catalog/availability/stream$'), self.availability_stream),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http':
+            for method, pattern, handler in self.routes:
+                match = pattern.match(scope['path'])
+                if match and scope['method'] == method:
+                    return await handler(scope, receive, send, **match.groupdict())
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def aclose(self):
+        self.flask_app.extensions[HUB_KEY].close()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self.executor.shutdown(wait=False)
+
+    @property
+    def http_client(self):
+        if self._client is None:
+            limit = self.flask_app.config.get('ASGI_HTTP_MAX_CONNECTIONS', 100)
+            self._client = httpx.AsyncClient(limits=httpx.Limits(max_connections=limit))
+        return self._client
+
+    # --- native handlers -------------------------------------------------------
+
+    async def preview_book(self, scope, receive, send, isbn):
+        environ = await self._environ_factory(scope, receive)
+        response, _ = await self.run_sync(environ(), _admin_only)
+        if response is None:
+            book_data = await fetch_book_by_isbn_async(isbn, self.http_client)
+            response, _ = await self.run_sync(environ(), catalog_routes.preview_result, isbn, book_data,
+                                              respond=True)
+        await self._send(send, response)
+
+    async def add_book(self, scope, receive, send):
+        environ = await self._environ_factory(scope, receive)
+        response, data = await self.run_sync(environ(), _prepare_add_book)
+        if response is None:
+            api_data = None
+            if catalog_routes.needs_api_data(data):
+                api_data = await fetch_book_by_isbn_async(data['isbn'], self.http_client)
+            response, _ = await self.run_sync(environ(), _finish_add_book, data, api_data, respond=True)
+        await self._send(send, response)
+
+    async def availability_stream(self, scope, receive, send):
+        """ SSE: one 'availability' event per coalesced batch of book changes """
+        config = self.flask_app.config
+        encode = self.flask_app.json.encode
+        hub = self.flask_app.extensions[HUB_KEY]
+        subscriber = hub.subscribe()
+        if subscriber is None:
+            await self._send(send, self.flask_app.response_class(
+                encode({'error': 'Too many subscribers'}) + b'\n', status=503, mimetype='application/json'))
+            return
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            subscriber.close()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no')]})
+            chunk = b'retry: 3000\n\n'
+            while True:
+                # un cliente que no lee (buffer del socket lleno) se descarta en vez de bloquear al resto
+                await asyncio.wait_for(send({'type': 'http.response.body', 'body': chunk, 'more_body': True}),
+                                       config.get('SSE_SEND_TIMEOUT', 10))
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), config.get('SSE_HEARTBEAT', 15))
+                except asyncio.TimeoutError:
+                    chunk = b': ping\n\n'
+                    continue
+                if subscriber.closed:
+                    break
+                changes = subscriber.take()
+                if changes is None:
+                    # se quedo atras: el cliente debe recargar el catalogo
+                    await send({'type': 'http.response.body', 'body': b'event: reset\ndata: {}\n\n'})
+                    return
+                books = [{'id': book_id, 'available_copies': available, 'total_copies': total}
+                         for book_id, (available, total) in changes.items()]
+                chunk = b'event: availability\ndata: ' + encode({'books': books}) + b'\n\n'
+            if not watcher.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        except (asyncio.TimeoutError, OSError):
+            hub.stats['dropped'] += 1
+        finally:
+            hub.unsubscribe(subscriber)
+            watcher.cancel()
+
+    # --- helpers ---------------------------------------------------------------
+
+    async def run_sync(self, environ, fn, *args, respond=False):
+        """ Run fn in a Flask request context on the thread pool.
+
+            Returns (response, None) when the request is finished (fn aborted, raised,
+            or respond=True), otherwise (None, value) so the handler can continue.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._call, environ, fn, args, respond)
+
+    def _call(self, environ, fn, args, respond):
+        app = self.flask_app
+        with app.request_context(environ):
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = fn(*args)
+                    if not respond:
+                        return None, rv
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            return app.process_response(app.make_response(rv)), None
+
+    async def _environ_factory(self, scope, receive):
+        """ Read the body once; each sync phase gets its own fresh WSGI environ """
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        headers = [(k.decode('latin1'), v.decode('latin1')) for k, v in scope.get('headers', [])]
+        # la latencia en /metrics cuenta desde aqui, incluyendo la espera a OpenLibrary
+        overrides = {REQUEST_START_KEY: time.perf_counter()}
+        if scope.get('client'):
+            overrides['REMOTE_ADDR'] = scope['client'][0]
+
+        def environ():
+            return EnvironBuilder(
+                path=scope['path'],
+                method=scope['method'],
+                query_string=scope.get('query_string', b'').decode('latin1'),
+                headers=headers,
+                data=body,
+                environ_overrides=overrides,
+            ).get_environ()
+        return environ
+
+    async def _send(self, send, response):
+        body = response.get_data()
+        headers = [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in response.headers.items()]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_asgi_app(config_class=Config):
+    return AsgiApp(create_app(config_class))
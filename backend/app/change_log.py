@@ -0,0 +1,57 @@
+""" Change log for incremental sync (GET /api/changes).
+
+    An after_flush hook writes one ChangeLog row per inserted, modified or
+    deleted Book/Loan in the same transaction as the change, so the feed can
+    never show a change that was rolled back or miss one that was committed.
+    Bulk query deletes and Core UPDATEs skip the ORM flush and have to call
+    log_deleted() / log_bulk().
+    The ChangeLog id is the sync cursor: SQLite has a single writer, so ids are
+    committed in increasing order and a client reading "id > cursor" never skips
+    a row that commits later with a smaller id.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .models import Book, ChangeLog, Loan
+
+ENTITIES = {Book: 'book', Loan: 'loan'}
+
+
+def _entry(obj, op):
+    entity = ENTITIES.get(type(obj))
+    if entity is None:
+        return None
+    return {'entity': entity, 'entity_id': obj.id, 'op': op,
+            'user_id': obj.user_id if entity == 'loan' else None}
+
+
+def _log_flush(session, flush_context):
+    # en after_flush new/dirty/deleted aun tienen el estado previo al flush y los ids ya estan asignados
+    rows = [_entry(obj, 'upsert') for obj in session.new]
+    rows += [_entry(obj, 'upsert') for obj in session.dirty
+             if session.is_modified(obj, include_collections=False)]
+    rows += [_entry(obj, 'delete') for obj in session.deleted]
+    rows = [row for row in rows if row is not None]
+    if rows:
+        session.connection().execute(ChangeLog.__table__.insert(), rows)
+
+
+def log_bulk(session, entity, op, rows):
+    """ record changes made with Core/bulk statements, which skip the flush hook
+
+        rows are (id, user_id) pairs, e.g. query.with_entities(Loan.id, Loan.user_id)
+    """
+    entries = [{'entity': entity, 'entity_id': id_, 'op': op, 'user_id': user_id}
+               for id_, user_id in rows]
+    if entries:
+        session.connection().execute(ChangeLog.__table__.insert(), entries)
+
+
+def log_deleted(session, entity, rows):
+    """ record deletes done with a bulk query (Query.delete skips the flush hook) """
+    log_bulk(session, entity, 'delete', rows)
+
+
+def init_change_log():
+    """ Register the flush hook once per process (every Session subclass) """
+    if not event.contains(Session, 'after_flush', _log_flush):
+        event.listen(Session, 'after_flush', _log_flush)
@@ -0,0 +1,159 @@
+""" Circulation desk: check out or return a stack of books in one transaction.
+
+    Items are resolved with one set-based query (ids and ISBNs together), each
+    book's copies change in a single conditional UPDATE ... RETURNING (checkout
+    only takes a copy WHERE available_copies > 0, unless it was set aside for the
+    patron's hold), and the caller commits once through run_write. Every item
+    gets its own result, so one unavailable book does not fail the stack.
+
+    Book rows are written with Core UPDATEs, which skip the ORM flush hooks:
+    the change log and the availability feed are fed explicitly.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.orm import joinedload
+from . import db
+from .change_log import log_bulk
+from .holds import ACTIVE, FULFILLED, READY, allocate_next_hold
+from .models import Book, Hold, Loan, User
+from .serializers import loan_to_dict
+from .utils.availability import note_availability
+
+LOAN_DAYS = 14
+
+
+def _split(items):
+    ids = {item for item in items if isinstance(item, int) and not isinstance(item, bool)}
+    isbns = {item for item in items if isinstance(item, str)}
+    return ids, isbns
+
+
+def _error(item, message, **extra):
+    return {'item': item, 'status': 'error', 'error': message, **extra}
+
+
+def _record_book_changes(changes):
+    """ change log + SSE for {book_id: (available, total)} written with Core """
+    session = db.session
+    log_bulk(session, 'book', 'upsert', [(book_id, None) for book_id in changes])
+    note_availability(session, changes)
+
+
+def batch_checkout(user_id, items):
+    """ write operation: lend every available item (book id or ISBN) to user_id """
+    patron = db.session.get(User, user_id)
+    if patron is None:
+        return {"error": "User not found"}, 404
+
+    ids, isbns = _split(items)
+    books = Book.query.filter(or_(Book.id.in_(ids), Book.isbn.in_(isbns))).all()
+    by_item = {book.id: book for book in books}
+    by_item.update({book.isbn: book for book in books})
+    holds = {hold.book_id: hold for hold in Hold.query.filter(
+        Hold.user_id == user_id, Hold.book_id.in_([book.id for book in books]), Hold.status.in_(ACTIVE))}
+
+    now = datetime.utcnow()
+    expiration = now + timedelta(days=LOAN_DAYS)
+    table = Book.__table__
+    results, changes, seen, fulfilled = [], {}, set(), []
+    for item in items:
+        book = by_item.get(item)
+        if book is None:
+            results.append(_error(item, 'Book not found'))
+            continue
+        if book.id in seen:
+            results.append(_error(item, 'Duplicate item'))
+            continue
+        seen.add(book.id)
+
+        hold = holds.get(book.id)
+        claimed = hold is not None and hold.status == READY
+        # una sentencia por libro: toma una copia solo si queda alguna (o ya estaba apartada para el usuario)
+        stmt = update(table).where(table.c.id == book.id).values(
+            available_copies=table.c.available_copies - (0 if claimed else 1),
+            next_return_at=case((table.c.next_return_at < expiration, table.c.next_return_at), else_=expiration),
+        ).returning(table.c.available_copies, table.c.total_copies)
+        if not claimed:
+            stmt = stmt.where(table.c.available_copies > 0)
+        row = db.session.execute(stmt).first()
+        if row is None:
+            results.append(_error(item, 'No available copies', can_hold=True))
+            continue
+
+        changes[book.id] = tuple(row)
+        if hold is not None:
+            fulfilled.append(hold)
+        loan = Loan(user_id=user_id, book_id=book.id, loan_period_days=LOAN_DAYS)
+        loan.loan_date, loan.expiration_date = now, expiration
+        results.append({'item': item, 'status': 'ok', 'loan': loan})
+
+    # los cambios ORM se escriben al final en un solo flush (un INSERT de prestamos y uno de change log);
+    # antes, cada UPDATE provocaria un autoflush con un INSERT por libro
+    for book_id in changes:
+        db.session.expire(by_item[book_id], ['available_copies', 'next_return_at'])
+    for hold in fulfilled:
+        hold.status = FULFILLED
+    for result in results:
+        if 'loan' in result:
+            result['loan'].user, result['loan'].book = patron, by_item[result['loan'].book_id]
+            db.session.add(result['loan'])
+    db.session.flush()
+    _record_book_changes(changes)
+
+    for result in results:
+        if 'loan' in result:
+            result['loan'] = loan_to_dict(result['loan'])
+    return {'checked_out': len(changes), 'results': results}, 200
+
+
+def batch_return(items, user_id=None):
+    """ write operation: return every item (loan id, or ISBN of a book user_id has on loan) """
+    ids, isbns = _split(items)
+    if isbns and user_id is None:
+        return {"error": "user_id is required to return by ISBN"}, 400
+
+    by_item = {loan.id: loan for loan in Loan.query.options(joinedload(Loan.book))
+               .filter(Loan.id.in_(ids))} if ids else {}
+    if isbns:
+        # el prestamo activo mas antiguo de ese libro para el usuario
+        active = Loan.query.join(Loan.book).options(joinedload(Loan.book)).filter(
+            Loan.user_id == user_id, Loan.return_date.is_(None), Book.isbn.in_(isbns)
+        ).order_by(Loan.expiration_date.desc())
+        by_item.update({loan.book.isbn: loan for loan in active})
+
+    now = datetime.utcnow()
+    results, returned, seen = [], Counter(), set()
+    for item in items:
+        loan = by_item.get(item)
+        if loan is None:
+            results.append(_error(item, 'Loan not found'))
+            continue
+        if loan.id in seen:
+            results.append(_error(item, 'Duplicate item'))
+            continue
+        seen.add(loan.id)
+        if loan.return_date is not None:
+            results.append(_error(item, 'Loan already returned'))
+            continue
+        loan.return_date = now
+        loan.status = 'Returned'
+        returned[loan.book] += 1
+        results.append({'item': item, 'status': 'ok', 'loan_id': loan.id, 'final_fine_amount': loan.fine_amount})
+    db.session.flush()
+
+    table, loans = Book.__table__, Loan.__table__
+    changes = {}
+    for book, count in returned.items():
+        # cada copia va primero a la lista de espera; el resto vuelve a la estanteria
+        to_shelf = sum(1 for _ in range(count) if allocate_next_hold(book, now) is None)
+        next_return = select(func.min(loans.c.expiration_date)).where(
+            loans.c.book_id == table.c.id, loans.c.return_date.is_(None)).scalar_subquery()
+        row = db.session.execute(update(table).where(table.c.id == book.id).values(
+            available_copies=table.c.available_copies + to_shelf, next_return_at=next_return,
+        ).returning(table.c.available_copies, table.c.total_copies)).first()
+        changes[book.id] = tuple(row)
+        db.session.expire(book, ['available_copies', 'next_return_at'])
+    _record_book_changes(changes)
+
+    return {'returned': sum(returned.values()), 'results': results}, 200
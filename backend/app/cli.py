@@ -0,0 +1,105 @@
+""" flask CLI commands """
+import time
+import click
+from flask import current_app
+from sqlalchemy import MetaData
+from . import db
+
+
+def register_commands(app):
+    @app.cli.command('seed')
+    @click.option('--books', default=1000, show_default=True, help='books to generate')
+    @click.option('--users', default=100, show_default=True, help='patrons to generate')
+    @click.option('--loans', default=5000, show_default=True, help='loans to generate')
+    @click.option('--seed', 'seed', default=42, show_default=True, help='random seed (same seed, same data)')
+    @click.option('--days', default=730, show_default=True, help='loan history window in days')
+    @click.option('--batch-size', default=20000, show_default=True, help='rows per executemany batch')
+    @click.option('--password', default='password123', show_default=True, help='password of every patron')
+    @click.option('--reset', is_flag=True, help='drop every table and migrate an empty database first')
+    def seed_command(books, users, loans, seed, days, batch_size, password, reset):
+        """ Fill the database with synthetic books, patrons and loans """
+        from .seeding import seed_database
+
+        if reset:
+            from .utils.schema import upgrade_schema
+            # alembic_version incluida: el esquema vuelve a salir de las migraciones, no de create_all
+            tables = MetaData()
+            tables.reflect(bind=db.engine)
+            tables.drop_all(bind=db.engine)
+            upgrade_schema(current_app, db)
+            click.echo('Database restarted.')
+
+        start = time.perf_counter()
+        seed_database(books=books, users=users, loans=loans, seed=seed, days=days,
+                      batch_size=batch_size, password=password, log=click.echo)
+        click.echo(f'Seeded in {time.perf_counter() - start:.1f}s')
+
+    @app.cli.command('sweep-holds')
+    @click.option('--batch-size', default=500, show_default=True, help='holds per commit')
+    def sweep_holds_command(batch_size):
+        """ Expire ready holds past their pickup deadline (run it from cron) """
+        from .holds import sweep_expired_holds
+
+        expired = sweep_expired_holds(batch_size=batch_size)
+        click.echo(f'Expired {expired} holds.')
+
+    @app.cli.command('archive-loans')
+    @click.option('--older-than-days', type=int, default=None, help='age of the return (default LOAN_ARCHIVE_DAYS)')
+    @click.option('--batch-size', type=int, default=None, help='loans per commit (default LOAN_ARCHIVE_BATCH)')
+    def archive_loans_command(older_than_days, batch_size):
+        """ Move old returned loans to LoansArchive (run it from cron) """
+        from .archive import archive_loans
+
+        moved = archive_loans(older_than_days=older_than_days, batch_size=batch_size)
+        click.echo(f'Archived {moved} loans.')
+
+    @app.cli.command('rebuild-rollups')
+    def rebuild_rollups_command():
+        """ Recompute the hourly/daily circulation rollups from the loan history """
+        from .rollups import rebuild_rollups
+
+        start = time.perf_counter()
+        rows = rebuild_rollups()
+        click.echo(f'Rebuilt {rows} rollup rows in {time.perf_counter() - start:.1f}s')
+
+    @app.cli.command('update-related')
+    @click.option('--rebuild', is_flag=True, help='recompute from the whole loan history')
+    @click.option('--batch-size', type=int, default=None, help='loans per commit (default RELATED_BATCH_SIZE)')
+    def update_related_command(rebuild, batch_size):
+        """ Fold new loans into the "borrowed together" index (run it from cron) """
+        from .related import rebuild_related, update_related
+
+        start = time.perf_counter()
+        if rebuild:
+            click.echo(f'Rebuilt {rebuild_related()} book pairs in {time.perf_counter() - start:.1f}s')
+        else:
+            click.echo(f'Processed {update_related(batch_size=batch_size)} loans '
+                       f'in {time.perf_counter() - start:.1f}s')
+
+    @app.cli.command('rebuild-similar')
+    def rebuild_similar_command():
+        """ Recompute the content-based similar books of the whole catalog """
+        from .similar import rebuild_similar
+
+        start = time.perf_counter()
+        click.echo(f'Indexed {rebuild_similar()} books in {time.perf_counter() - start:.1f}s')
+
+    @app.cli.command('analytics')
+    @click.option('--by', type=click.Choice(['period', 'genre']), default='period', show_default=True)
+    @click.option('--period', type=click.Choice(['day', 'month', 'year']), default='month', show_default=True)
+    @click.option('--since', type=click.DateTime(), default=None, help='first loan date included')
+    @click.option('--until', type=click.DateTime(), default=None, help='first loan date excluded')
+    def analytics_command(by, period, since, until):
+        """ Overdue rate, fines and loan duration over the whole loan history """
+        from .analytics import circulation_by_genre, circulation_by_period
+
+        start = time.perf_counter()
+        if by == 'genre':
+            rows = circulation_by_genre(since, until)
+        else:
+            rows = circulation_by_period(period, since, until)
+        click.echo(f'{by:<16} {"loans":>10} {"overdue %":>10} {"fines":>12} {"avg days":>9}')
+        for row in rows:
+            click.echo(f'{str(row[by]):<16} {row["loans"]:>10} {row["overdue_rate"] * 100:>10.1f} '
+                       f'{row["fines"]:>12.2f} {row["avg_duration_days"]:>9.1f}')
+        click.echo(f'{len(rows)} rows in {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,57 @@
+""" When do unavailable books come back: forecast from the active loans.
+
+    Book.next_return_at is the earliest expiration_date among the book's active
+    loans (return_date IS NULL), kept up to date by checkout, renew and return:
+    a checkout can only lower it, and renew/return only change it when they
+    move the loan that defined it, which is then re-read with one seek on the
+    partial index ix_Loans_active_expiry (book_id, expiration_date). List
+    responses send the column as is; get_book adds the next FORECAST_RETURNS
+    dates from the same index, each with the latest date the loan could still
+    be extended to with its remaining renewals.
+"""
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from . import db
+from .models import Loan
+
+MAX_RENEWALS = 2
+RENEWAL_DAYS = 14
+
+
+def _active_loans(book_id):
+    return Loan.query.filter(Loan.book_id == book_id, Loan.return_date.is_(None))
+
+
+def refresh_next_return(book):
+    """ re-read the earliest active expiration (index seek) """
+    book.next_return_at = db.session.query(func.min(Loan.expiration_date)) \
+        .filter(Loan.book_id == book.id, Loan.return_date.is_(None)).scalar()
+
+
+def note_checkout(book, loan):
+    if book.next_return_at is None or loan.expiration_date < book.next_return_at:
+        book.next_return_at = loan.expiration_date
+
+
+def note_change(book, previous_expiration):
+    """ after a renew or return of a loan that expired at previous_expiration """
+    if book.next_return_at is None or previous_expiration <= book.next_return_at:
+        refresh_next_return(book)
+
+
+def latest_return(loan, now=None):
+    """ expiration if the patron uses every renewal left (none once overdue) """
+    now = now or datetime.utcnow()
+    if loan.status == 'Overdue' or now > loan.expiration_date:
+        return loan.expiration_date
+    remaining = max(MAX_RENEWALS - (loan.renewals or 0), 0)
+    return loan.expiration_date + timedelta(days=RENEWAL_DAYS * remaining)
+
+
+def forecast_returns(book, limit=None):
+    """ next expected returns of book, earliest first """
+    limit = limit or current_app.config.get('FORECAST_RETURNS', 3)
+    loans = _active_loans(book.id).order_by(Loan.expiration_date).limit(limit).all()
+    now = datetime.utcnow()
+    return [{'expected_at': loan.expiration_date, 'latest_at': latest_return(loan, now)} for loan in loans]
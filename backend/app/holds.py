@@ -0,0 +1,78 @@
+""" Holds (waitlist) for books with no available copies.
+
+    A patron's hold is 'Waiting' until a copy comes back. return_book then
+    allocates the copy to the oldest waiting hold in the same transaction
+    ('Ready', with HOLD_PICKUP_DAYS to claim it by reserving the book) instead of
+    adding it to available_copies, so nobody else can take it. Ready holds
+    that are not claimed in time are expired by `flask sweep-holds`, which hands
+    their copy to the next hold in the queue.
+
+    The queue of a book is the ix_Holds_queue index (book_id, status, id): the
+    next waiting hold is one index seek (O(log n)), and a hold's position is an
+    index-only count of the waiting entries before it in the same range.
+"""
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from . import db
+from .models import Hold
+
+WAITING, READY, FULFILLED, CANCELLED, EXPIRED = 'Waiting', 'Ready', 'Fulfilled', 'Cancelled', 'Expired'
+ACTIVE = (WAITING, READY)
+
+
+def active_hold(user_id, book_id):
+    return Hold.query.filter(Hold.user_id == user_id, Hold.book_id == book_id,
+                             Hold.status.in_(ACTIVE)).first()
+
+
+def queue_position(hold):
+    """ 1-based place of a waiting hold in its book's queue (None once allocated) """
+    if hold.status != WAITING:
+        return None
+    ahead = db.session.query(func.count(Hold.id)).filter(
+        Hold.book_id == hold.book_id, Hold.status == WAITING, Hold.id < hold.id).scalar()
+    return ahead + 1
+
+
+def allocate_next_hold(book, now=None):
+    """ give a copy of book that just became free to the oldest waiting hold
+
+        Returns the allocated hold, or None when nobody is waiting (the caller
+        then puts the copy back in available_copies).
+    """
+    hold = Hold.query.filter(Hold.book_id == book.id, Hold.status == WAITING) \
+        .order_by(Hold.id).first()
+    if hold is None:
+        return None
+    now = now or datetime.utcnow()
+    hold.status = READY
+    hold.ready_at = now
+    hold.expires_at = now + timedelta(days=current_app.config.get('HOLD_PICKUP_DAYS', 3))
+    return hold
+
+
+def release_copy(book, now=None):
+    """ a copy is free again: to the next hold, or back to the shelf """
+    if allocate_next_hold(book, now) is None:
+        book.available_copies += 1
+
+
+def sweep_expired_holds(now=None, batch_size=500):
+    """ expire ready holds past their pickup deadline and pass each copy on
+
+        Commits every batch_size holds so a large backlog does not keep the
+        write lock for long. Returns the number of expired holds.
+    """
+    now = now or datetime.utcnow()
+    expired = 0
+    while True:
+        holds = Hold.query.filter(Hold.status == READY, Hold.expires_at < now) \
+            .order_by(Hold.expires_at).limit(batch_size).all()
+        if not holds:
+            return expired
+        for hold in holds:
+            hold.status = EXPIRED
+            release_copy(hold.book, now)
+        db.session.commit()
+        expired += len(holds)
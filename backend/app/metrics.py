@@ -0,0 +1,183 @@
+""" Runtime metrics exposed in Prometheus text format at /metrics.
+
+    Per endpoint: request latency histogram, status code counts, response bytes,
+    and SQL statement count/time per request (SQLAlchemy cursor events). Recording
+    a request costs a couple of perf_counter() calls and one short locked update.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100)
+
+# inicio de la peticion (el modo ASGI lo fija al llegar la peticion, antes de esperar I/O)
+REQUEST_START_KEY = 'mybookspace.request_start'
+
+# [statements, seconds] de la peticion en curso; None fuera de una peticion
+_sql_stats = ContextVar('sql_stats', default=None)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """ In-process metrics registry (one per app, per worker process) """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}        # (endpoint, method) -> Histogram
+        self.sql_count = {}      # (endpoint, method) -> Histogram of statements per request
+        self.sql_seconds = {}    # (endpoint, method) -> total seconds in SQL
+        self.responses = {}      # (endpoint, method, status) -> count
+        self.response_bytes = {}  # (endpoint, method) -> total bytes
+
+    def record(self, endpoint, method, status, seconds, size, statements, sql_seconds):
+        key = (endpoint, method)
+        with self._lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.sql_count[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self.sql_seconds[key] = 0.0
+                self.response_bytes[key] = 0
+            histogram.observe(seconds)
+            self.sql_count[key].observe(statements)
+            self.sql_seconds[key] += sql_seconds
+            if size:
+                self.response_bytes[key] += size
+            status_key = (endpoint, method, status)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def render(self):
+        """ Prometheus text exposition format (version 0.0.4) """
+        lines = []
+        with self._lock:
+            _render_histogram(lines, 'http_request_duration_seconds',
+                              'Request latency by endpoint', self.latency)
+            _render_histogram(lines, 'http_request_sql_statements',
+                              'SQL statements executed per request', self.sql_count)
+
+            lines.append('# HELP http_request_sql_seconds_total Time spent in SQL by endpoint')
+            lines.append('# TYPE http_request_sql_seconds_total counter')
+            for (endpoint, method), value in sorted(self.sql_seconds.items()):
+                lines.append(f'http_request_sql_seconds_total{_labels(endpoint, method)} {value:.6f}')
+
+            lines.append('# HELP http_responses_total Responses by endpoint and status code')
+            lines.append('# TYPE http_responses_total counter')
+            for (endpoint, method, status), value in sorted(self.responses.items()):
+                lines.append(f'http_responses_total{_labels(endpoint, method, status=status)} {value}')
+
+            lines.append('# HELP http_response_bytes_total Response body bytes by endpoint')
+            lines.append('# TYPE http_response_bytes_total counter')
+            for (endpoint, method), value in sorted(self.response_bytes.items()):
+                lines.append(f'http_response_bytes_total{_labels(endpoint, method)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(endpoint, method, **extra):
+    labels = {'endpoint': endpoint, 'method': method, **extra}
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+
+def _render_histogram(lines, name, help_text, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (endpoint, method), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(endpoint, method, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(endpoint, method)} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{_labels(endpoint, method)} {histogram.count}')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _sql_stats.get() is not None:
+        conn.info.setdefault('query_start', []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _sql_stats.get()
+    if stats is not None:
+        starts = conn.info.get('query_start')
+        stats[0] += 1
+        if starts:
+            stats[1] += perf_counter() - starts.pop()
+
+
+def _count_bytes(iterable, done):
+    """ pass a streamed body through, then call done(total bytes) when it finishes or is closed """
+    size = 0
+    try:
+        for chunk in iterable:
+            size += len(chunk)
+            yield chunk
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+        done(size)
+
+
+def init_metrics(app):
+    """ Register the request hooks, SQL listeners and the /metrics route """
+    if not app.config.get('METRICS_ENABLED', True):
+        return None
+
+    metrics = Metrics()
+    app.extensions['metrics'] = metrics
+
+    # una sola vez por proceso: los listeners en Engine cubren todos los engines/binds
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def _start_request_metrics():
+        request.environ.setdefault(REQUEST_START_KEY, perf_counter())
+        _sql_stats.set([0, 0.0])
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = request.environ.get(REQUEST_START_KEY)
+        stats = _sql_stats.get()
+        if start is None or stats is None:
+            return response
+        endpoint, method, status = request.endpoint or 'unmatched', request.method, response.status_code
+
+        if response.is_streamed:
+            # respuesta por partes: se registra al terminar de enviarla (latencia y bytes reales)
+            def done(size):
+                metrics.record(endpoint, method, status, perf_counter() - start, size, stats[0], stats[1])
+            response.response = _count_bytes(response.response, done)
+        else:
+            metrics.record(endpoint, method, status, perf_counter() - start, response.content_length,
+                           stats[0], stats[1])
+        return response
+
+    @app.teardown_request
+    def _reset_sql_stats(exc=None):
+        _sql_stats.set(None)
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
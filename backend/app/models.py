@@ -21,15 +21,8 @@ class User(db.Model):
         return f'<User {self.first_name} {self.last_name} ({self.email}) - Role: {self.role}>'
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'email': self.email,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'full_name': f'{self.first_name} {self.last_name}',
-            'role': self.role,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        from .serializers import user_to_dict
+        return user_to_dict(self)
 
 class Book(db.Model):
     __tablename__ = 'Books'
@@ -45,6 +38,8 @@ class Book(db.Model):
     genre = db.Column(db.String(100))
     cover_url = db.Column(db.String(500))
     description = db.Column(db.Text)
+    # primer vencimiento entre los prestamos activos (app/forecast.py lo mantiene)
+    next_return_at = db.Column(db.DateTime, nullable=True)
 
     #loans = db.relationship('Loan', backref='Book_borrowed', lazy='dynamic')
 
@@ -53,6 +48,15 @@ class Book(db.Model):
 
 class Loan(db.Model):
     __tablename__ = 'Loans'
+    __table_args__ = (
+        # prestamos activos de cada libro por vencimiento (prevision de devoluciones)
+        db.Index('ix_Loans_active_expiry', 'book_id', 'expiration_date',
+                 sqlite_where=db.text('return_date IS NULL')),
+        # libros de cada usuario (/myLoans, lo ya pedido por los usuarios de un lote de update_related)
+        db.Index('ix_Loans_user_book', 'user_id', 'book_id'),
+        # ids nunca reutilizados: son la marca de update_related y la clave en LoansArchive
+        {'sqlite_autoincrement': True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('Users.id'), nullable=False)
@@ -100,28 +104,129 @@ class Loan(db.Model):
         return True
 
     def to_dict(self):
-        self.calculate_fine()
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'book_id': self.book_id,
-            'loan_date': self.loan_date.isoformat(),
-            'expiration_date': self.expiration_date.isoformat(),
-            'return_date': self.return_date.isoformat() if self.return_date else None,
-            'status': self.status,
-            'fine_amount': self.fine_amount,
-            'renewals': self.renewals,
-            'book': {
-                'id': self.book.id,
-                'title': self.book.title,
-                'author': self.book.author,
-                'isbn': self.book.isbn,
-                'cover_url': self.book.cover_url
-            } if self.book else None,
-            'user': {
-                'id': self.user.id,
-                'email': self.user.email,
-                'first_name': self.user.first_name,
-                'last_name': self.user.last_name
-            } if self.user else None
-        }
\ No newline at end of file
+        """ datetimes stay datetime objects; the JSON provider writes them as ISO 8601 """
+        from .serializers import loan_to_dict
+        return loan_to_dict(self)
+
+class LoanArchive(db.Model):
+    """ returned loans moved out of Loans by `flask archive-loans` (see app/archive.py) """
+    __tablename__ = 'LoansArchive'
+
+    # mismo id que tenia en Loans; sin claves foraneas para que el archivo no frene a la tabla activa
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    book_id = db.Column(db.Integer, nullable=False, index=True)
+
+    loan_date = db.Column(db.DateTime, nullable=False)
+    expiration_date = db.Column(db.DateTime, nullable=False)
+    return_date = db.Column(db.DateTime, nullable=False)
+
+    status = db.Column(db.String(20))
+    fine_amount = db.Column(db.Float)
+    renewals = db.Column(db.Integer)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class CirculationRollup(db.Model):
+    """ checkouts and returns per hour/day and genre, kept by app/rollups.py """
+    __tablename__ = 'CirculationRollups'
+    # WITHOUT ROWID: las filas se guardan en el orden de la clave y un rango de buckets es una lectura contigua
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    granularity = db.Column(db.String(4), primary_key=True)     # 'hour' | 'day'
+    bucket = db.Column(db.DateTime, primary_key=True)           # inicio de la hora/dia (UTC)
+    genre = db.Column(db.String(100), primary_key=True)         # 'Unknown' si el libro no tiene
+    checkouts = db.Column(db.Integer, default=0, nullable=False)
+    returns = db.Column(db.Integer, default=0, nullable=False)
+
+class BookPair(db.Model):
+    """ sparse co-occurrence matrix: patrons who borrowed both books (see app/related.py) """
+    __tablename__ = 'BookPairs'
+    # simetrica: cada par se guarda en los dos sentidos, y las filas de un libro son un rango contiguo
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    book_id = db.Column(db.Integer, primary_key=True)
+    other_id = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+class RelatedBook(db.Model):
+    """ top-K neighbours of each book in BookPairs, served by /books/<id>/related """
+    __tablename__ = 'RelatedBooks'
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    book_id = db.Column(db.Integer, primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)              # 1 = el mas prestado junto a book_id
+    other_id = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+
+class BookFeature(db.Model):
+    """ hashed TF-IDF weight of a term in a book, clustered by term (see app/similar.py) """
+    __tablename__ = 'BookFeatures'
+    __table_args__ = (
+        # vector de cada libro sin tocar la tabla (indice cubriente)
+        db.Index('ix_BookFeatures_book', 'book_id', 'feature', 'weight'),
+        {'sqlite_with_rowid': False},
+    )
+
+    feature = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, primary_key=True)
+    weight = db.Column(db.Float, nullable=False)
+
+class FeatureFrequency(db.Model):
+    """ books containing each hashed term at the last similar-books rebuild, dropped terms included """
+    __tablename__ = 'FeatureFrequencies'
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    feature = db.Column(db.Integer, primary_key=True)
+    books = db.Column(db.Integer, nullable=False)
+
+class SimilarBook(db.Model):
+    """ top-K books by cosine similarity of their BookFeatures vectors """
+    __tablename__ = 'SimilarBooks'
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    book_id = db.Column(db.Integer, primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    other_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+class JobWatermark(db.Model):
+    """ how far an incremental job has read its source (the last Loans id, the books of the last rebuild) """
+    __tablename__ = 'JobWatermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    position = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ChangeLog(db.Model):
+    """ append-only feed of Book/Loan changes for GET /api/changes (see app/change_log.py) """
+    __tablename__ = 'ChangeLog'
+    # AUTOINCREMENT: el id es el cursor de los clientes y no se puede reutilizar
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(10), nullable=False)   # 'book' | 'loan'
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)       # 'upsert' | 'delete'
+    user_id = db.Column(db.Integer, index=True)         # dueño del prestamo (None en libros)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class Hold(db.Model):
+    """ place in a book's waitlist; see app/holds.py """
+    __tablename__ = 'Holds'
+    __table_args__ = (
+        # cola de cada libro en orden de llegada: el siguiente en espera y la posicion salen de este indice
+        db.Index('ix_Holds_queue', 'book_id', 'status', 'id'),
+        # barrido de reservas listas no recogidas
+        db.Index('ix_Holds_expiry', 'status', 'expires_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('Users.id'), nullable=False, index=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('Books.id'), nullable=False)
+
+    status = db.Column(db.String(20), default='Waiting', nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    ready_at = db.Column(db.DateTime, nullable=True)      # copia apartada para el usuario
+    expires_at = db.Column(db.DateTime, nullable=True)    # fin del plazo para recogerla
+
+    book = db.relationship('Book')
@@ -0,0 +1,168 @@
+""" "Patrons who borrowed this also borrowed" (GET /api/catalog/books/<id>/related).
+
+    BookPairs is a sparse co-occurrence matrix: count(a, b) is the number of
+    patrons who borrowed both a and b (a patron counts once per pair however
+    many times they borrowed either). RelatedBooks keeps only the top
+    RELATED_TOP_K neighbours of each book, so the endpoint reads K rows of one
+    primary-key range whatever the size of the history.
+
+    `flask update-related` folds in only the loans after its watermark (the
+    last loan id it processed): a patron's first loan of book b adds 1 to b's
+    pair with every book they had borrowed before, and only the top-K lists of
+    the books whose counts moved are recomputed. --rebuild recomputes both
+    tables from the whole history (Loans + LoansArchive) with one self-join.
+
+    The rebuild then prunes BookPairs: most pairs were borrowed together by a
+    single patron, and the matrix would otherwise grow with every patron's
+    history squared. A pair with at most RELATED_PRUNE_COUNT patrons that is
+    in neither book's top-K is dropped (both directions, so the matrix stays
+    symmetric). If it is borrowed together again, its count restarts below
+    the true value by at most RELATED_PRUNE_COUNT until the next rebuild;
+    pruning on every update instead would keep such pairs from ever growing.
+    Run --rebuild periodically (e.g. nightly) to keep the matrix small.
+"""
+from collections import Counter, defaultdict
+from flask import current_app
+from sqlalchemy import and_, delete, func, or_, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from . import db
+from .models import BookPair, JobWatermark, Loan, LoanArchive, RelatedBook
+
+WATERMARK = 'related_books'
+
+
+def _history():
+    """ (id, user_id, book_id) of every loan, archived ones included """
+    parts = [select(table.c.id, table.c.user_id, table.c.book_id)
+             for table in (Loan.__table__, LoanArchive.__table__)]
+    return union_all(*parts).subquery('history')
+
+
+def _watermark():
+    mark = db.session.get(JobWatermark, WATERMARK)
+    if mark is None:
+        mark = JobWatermark(name=WATERMARK, position=0)
+        db.session.add(mark)
+    return mark
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _top_k(k):
+    pairs = BookPair.__table__
+    rank = func.row_number().over(partition_by=pairs.c.book_id,
+                                  order_by=(pairs.c.count.desc(), pairs.c.other_id))
+    return select(pairs.c.book_id, rank.label('rank'), pairs.c.other_id, pairs.c.count)
+
+
+def _refresh_top_k(book_ids, k):
+    """ recompute the RelatedBooks rows of book_ids from their BookPairs range """
+    related = RelatedBook.__table__
+    for chunk in _chunks(sorted(book_ids)):
+        ranked = _top_k(k).where(BookPair.__table__.c.book_id.in_(chunk)).subquery()
+        db.session.execute(delete(related).where(related.c.book_id.in_(chunk)))
+        db.session.execute(related.insert().from_select(
+            ['book_id', 'rank', 'other_id', 'count'], select(ranked).where(ranked.c.rank <= k)))
+
+
+def _upsert_pairs(increments):
+    table = BookPair.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.book_id, table.c.other_id],
+                                      set_={'count': table.c.count + stmt.excluded.count})
+    db.session.execute(stmt, [{'book_id': a, 'other_id': b, 'count': n} for (a, b), n in increments.items()])
+
+
+def update_related(batch_size=None, k=None):
+    """ fold the loans after the watermark into the index; returns how many were read """
+    config = current_app.config
+    batch_size = batch_size or config.get('RELATED_BATCH_SIZE', 1000)
+    k = k or config.get('RELATED_TOP_K', 10)
+    mark = _watermark()
+    history = _history()
+    processed = 0
+    while True:
+        loans = db.session.execute(select(history).where(history.c.id > mark.position)
+                                   .order_by(history.c.id).limit(batch_size)).all()
+        if not loans:
+            break
+        # lo que cada usuario del lote habia pedido antes de el: una consulta por lote
+        borrowed = defaultdict(set)
+        rows = db.session.execute(select(history.c.user_id, history.c.book_id).distinct().where(
+            history.c.user_id.in_({loan.user_id for loan in loans}), history.c.id <= mark.position))
+        for user_id, book_id in rows:
+            borrowed[user_id].add(book_id)
+
+        increments = Counter()
+        for loan in loans:
+            seen = borrowed[loan.user_id]
+            if loan.book_id in seen:
+                continue
+            for other in seen:
+                increments[loan.book_id, other] += 1
+                increments[other, loan.book_id] += 1
+            seen.add(loan.book_id)
+        if increments:
+            _upsert_pairs(increments)
+            _refresh_top_k({book_id for book_id, _ in increments}, k)
+
+        mark.position = loans[-1].id
+        db.session.commit()
+        processed += len(loans)
+    db.session.commit()
+    return processed
+
+
+def _prune_pairs(min_count):
+    """ drop the pairs with at most min_count patrons that are in neither book's RelatedBooks """
+    pairs, related = BookPair.__table__, RelatedBook.__table__
+
+    def listed(book_id, other_id):
+        return select(related.c.rank).where(related.c.book_id == book_id, related.c.other_id == other_id).exists()
+
+    db.session.execute(delete(pairs).where(
+        pairs.c.count <= min_count,
+        ~listed(pairs.c.book_id, pairs.c.other_id), ~listed(pairs.c.other_id, pairs.c.book_id)))
+
+
+def rebuild_related(k=None):
+    """ recompute BookPairs and RelatedBooks from the whole history; returns the pairs stored """
+    config = current_app.config
+    k = k or config.get('RELATED_TOP_K', 10)
+    pairs, related = BookPair.__table__, RelatedBook.__table__
+    history = _history()
+    borrowed = select(history.c.user_id, history.c.book_id).distinct().cte('borrowed')
+    a, b = borrowed.alias('a'), borrowed.alias('b')
+
+    db.session.execute(delete(related))
+    db.session.execute(delete(pairs))
+    db.session.execute(pairs.insert().from_select(
+        ['book_id', 'other_id', 'count'],
+        select(a.c.book_id, b.c.book_id, func.count())
+        .select_from(a.join(b, and_(a.c.user_id == b.c.user_id, a.c.book_id != b.c.book_id)))
+        .group_by(a.c.book_id, b.c.book_id),
+    ))
+    ranked = _top_k(k).subquery()
+    db.session.execute(related.insert().from_select(
+        ['book_id', 'rank', 'other_id', 'count'], select(ranked).where(ranked.c.rank <= k)))
+    _prune_pairs(config.get('RELATED_PRUNE_COUNT', 1))
+
+    _watermark().position = db.session.execute(select(func.max(history.c.id))).scalar() or 0
+    db.session.commit()
+    return db.session.query(func.count()).select_from(pairs).scalar()
+
+
+def forget_book(book_id, k=None):
+    """ drop a deleted book from the index; its neighbours get their next best entry """
+    k = k or current_app.config.get('RELATED_TOP_K', 10)
+    pairs, related = BookPair.__table__, RelatedBook.__table__
+    neighbours = db.session.execute(select(pairs.c.other_id).where(pairs.c.book_id == book_id)).scalars().all()
+    # la matriz es simetrica: las filas (vecino, book_id) se borran por clave, sin recorrer la tabla
+    db.session.execute(delete(pairs).where(or_(
+        pairs.c.book_id == book_id, and_(pairs.c.book_id.in_(neighbours), pairs.c.other_id == book_id))))
+    db.session.execute(delete(related).where(related.c.book_id == book_id))
+    _refresh_top_k(neighbours, k)
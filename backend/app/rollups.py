@@ -0,0 +1,152 @@
+""" Circulation rollups per hour and day (charts of GET /api/analytics/trends).
+
+    CirculationRollups holds, for every hour and every day (UTC) and genre, how
+    many loans started and how many were returned. An after_flush hook adds the
+    checkouts and returns of each flush to their hour and day rows in the same
+    transaction (one INSERT ... ON CONFLICT DO UPDATE), so a chart never reads
+    Loans: a range reads one row per bucket (and genre), and the number of loans
+    out at any time is the running sum of checkouts - returns.
+
+    The table is WITHOUT ROWID, clustered on (granularity, bucket, genre): a
+    range of buckets is one contiguous read. Loans written without the ORM
+    (flask seed) are counted by rebuild_rollups() / `flask rebuild-rollups`,
+    which recomputes the table from Loans and LoansArchive.
+"""
+from collections import Counter
+from datetime import timedelta
+from sqlalchemy import and_, delete, event, func, inspect, literal, or_, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from . import db
+from .models import Book, CirculationRollup, Loan, LoanArchive
+
+GRANULARITIES = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+# mismo formato en que SQLAlchemy guarda los DateTime en SQLite (la clave debe coincidir)
+BUCKET_FORMATS = {'hour': '%Y-%m-%d %H:00:00.000000', 'day': '%Y-%m-%d 00:00:00.000000'}
+UNKNOWN = 'Unknown'
+
+
+def bucket_start(value, granularity):
+    if granularity == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _events(session):
+    """ (book_id, when, 'checkouts' | 'returns') of the loans started or returned in this flush """
+    for obj in session.new:
+        if type(obj) is Loan:
+            yield obj.book_id, obj.loan_date, 'checkouts'
+            if obj.return_date is not None:
+                yield obj.book_id, obj.return_date, 'returns'
+    for obj in session.dirty:
+        if type(obj) is Loan:
+            added, _, deleted = inspect(obj).attrs.return_date.history
+            if added and added[0] is not None and not any(deleted):
+                yield obj.book_id, added[0], 'returns'
+
+
+def _upsert():
+    table = CirculationRollup.__table__
+    stmt = sqlite_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.granularity, table.c.bucket, table.c.genre],
+        set_={'checkouts': table.c.checkouts + stmt.excluded.checkouts,
+              'returns': table.c.returns + stmt.excluded.returns},
+    )
+
+
+def _rollup_flush(session, flush_context):
+    events = list(_events(session))
+    if not events:
+        return
+    connection = session.connection()
+    # el genero de los libros ya cargados en la sesion; solo se consultan los que faltan
+    genres, missing = {}, set()
+    for book_id in {book_id for book_id, _, _ in events}:
+        book = session.identity_map.get(session.identity_key(Book, book_id))
+        if book is not None and 'genre' in book.__dict__:
+            genres[book_id] = book.genre
+        else:
+            missing.add(book_id)
+    if missing:
+        genres.update(connection.execute(select(Book.id, Book.genre).where(Book.id.in_(missing))).all())
+
+    counts = Counter()
+    for book_id, when, kind in events:
+        for granularity in GRANULARITIES:
+            counts[granularity, bucket_start(when, granularity), genres.get(book_id) or UNKNOWN, kind] += 1
+    rows = {}
+    for (granularity, bucket, genre, kind), count in counts.items():
+        row = rows.setdefault((granularity, bucket, genre), {
+            'granularity': granularity, 'bucket': bucket, 'genre': genre, 'checkouts': 0, 'returns': 0})
+        row[kind] += count
+    connection.execute(_upsert(), list(rows.values()))
+
+
+def rebuild_rollups():
+    """ recompute every rollup row from Loans and LoansArchive (one GROUP BY per granularity) """
+    table, books = CirculationRollup.__table__, Book.__table__
+    parts = []
+    for loans in (Loan.__table__, LoanArchive.__table__):
+        parts.append(select(loans.c.book_id, loans.c.loan_date.label('at'),
+                            literal(1).label('checkouts'), literal(0).label('returns')))
+        parts.append(select(loans.c.book_id, loans.c.return_date, literal(0), literal(1))
+                     .where(loans.c.return_date.is_not(None)))
+    events = union_all(*parts).subquery('events')
+
+    db.session.execute(delete(table))
+    for granularity, fmt in BUCKET_FORMATS.items():
+        bucket = func.strftime(fmt, events.c.at)
+        genre = func.coalesce(books.c.genre, UNKNOWN)
+        db.session.execute(table.insert().from_select(
+            ['granularity', 'bucket', 'genre', 'checkouts', 'returns'],
+            select(literal(granularity), bucket, genre, func.sum(events.c.checkouts), func.sum(events.c.returns))
+            .select_from(events.outerjoin(books, books.c.id == events.c.book_id))
+            .group_by(bucket, genre),
+        ))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(table).scalar()
+
+
+def default_granularity(since, until):
+    return 'hour' if until - since <= timedelta(days=2) else 'day'
+
+
+def circulation_trend(since, until, granularity='day', genre=None):
+    """ checkouts, returns and loans out at the end of every bucket in [since, until) """
+    step = GRANULARITIES[granularity]
+    start = bucket_start(since, granularity)
+    in_genre = [CirculationRollup.genre == genre] if genre else []
+
+    rows = db.session.query(
+        CirculationRollup.bucket, func.sum(CirculationRollup.checkouts), func.sum(CirculationRollup.returns)
+    ).filter(
+        CirculationRollup.granularity == granularity, CirculationRollup.bucket >= start,
+        CirculationRollup.bucket < until, *in_genre,
+    ).group_by(CirculationRollup.bucket).all()
+    by_bucket = {bucket: (checkouts, returns) for bucket, checkouts, returns in rows}
+
+    # prestamos fuera al empezar: dias completos anteriores mas las horas previas del primer dia
+    day = bucket_start(start, 'day')
+    active = db.session.query(func.sum(CirculationRollup.checkouts - CirculationRollup.returns)).filter(
+        or_(and_(CirculationRollup.granularity == 'day', CirculationRollup.bucket < day),
+            and_(CirculationRollup.granularity == 'hour', CirculationRollup.bucket >= day,
+                 CirculationRollup.bucket < start)),
+        *in_genre,
+    ).scalar() or 0
+
+    series = []
+    at = start
+    while at < until:
+        checkouts, returns = by_bucket.get(at, (0, 0))
+        active += checkouts - returns
+        series.append({'bucket': at, 'checkouts': checkouts, 'returns': returns, 'active': active})
+        at += step
+    return series
+
+
+def init_rollups():
+    """ Register the flush hook once per process (every Session subclass) """
+    if not event.contains(Session, 'after_flush', _rollup_flush):
+        event.listen(Session, 'after_flush', _rollup_flush)
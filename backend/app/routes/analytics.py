@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, jsonify, request
+from app.analytics import PERIODS, circulation_by_genre, circulation_by_period
+from app.rollups import GRANULARITIES, circulation_trend, default_granularity
+from app.routes.catalog import admin_required
+
+analytics_bp = Blueprint('analytics', __name__)
+
+
+def date_range():
+    """ ?since=&until= as ISO dates (until is exclusive); ValueError when malformed """
+    bounds = []
+    for name in ('since', 'until'):
+        value = request.args.get(name)
+        bounds.append(datetime.fromisoformat(value) if value else None)
+    return bounds
+
+
+# informes de circulacion sobre todo el historial de prestamos (admin only)
+@analytics_bp.route('/circulation', methods=['GET'])
+@admin_required
+def circulation():
+    """ GET /api/analytics/circulation?period=month|year|day&since=&until= """
+    period = request.args.get('period', 'month')
+    if period not in PERIODS:
+        return jsonify({'error': f"period must be one of {', '.join(PERIODS)}"}), 400
+    try:
+        since, until = date_range()
+    except ValueError:
+        return jsonify({'error': 'since and until must be ISO dates'}), 400
+
+    return jsonify({'period': period, 'rows': circulation_by_period(period, since, until)}), 200
+
+
+@analytics_bp.route('/genres', methods=['GET'])
+@admin_required
+def genres():
+    """ GET /api/analytics/genres?since=&until= """
+    try:
+        since, until = date_range()
+    except ValueError:
+        return jsonify({'error': 'since and until must be ISO dates'}), 400
+
+    return jsonify({'rows': circulation_by_genre(since, until)}), 200
+
+
+@analytics_bp.route('/trends', methods=['GET'])
+@admin_required
+def trends():
+    """ GET /api/analytics/trends?since=&until=&granularity=hour|day&genre=
+
+        Checkouts, returns and loans out per bucket from the rollup tables
+        (last 30 days by default).
+    """
+    try:
+        since, until = date_range()
+    except ValueError:
+        return jsonify({'error': 'since and until must be ISO dates'}), 400
+    until = until or datetime.utcnow()
+    since = since or until - timedelta(days=30)
+    granularity = request.args.get('granularity') or default_granularity(since, until)
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+    limit = current_app.config.get('ROLLUP_MAX_BUCKETS', 1000)
+    if since >= until or (until - since) / GRANULARITIES[granularity] > limit:
+        return jsonify({'error': f'the range must cover between 1 and {limit} {granularity}s'}), 400
+
+    genre = request.args.get('genre')
+    return jsonify({
+        'granularity': granularity,
+        'genre': genre,
+        'series': circulation_trend(since, until, granularity, genre),
+    }), 200
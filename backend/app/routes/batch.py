@@ -0,0 +1,93 @@
+""" POST /api/batch: several GET sub-requests in one round trip.
+
+    Body: {"requests": ["/api/catalog/stats", {"path": "/api/loans/all"}, ...]}
+    Each sub-request goes through the normal Flask dispatch (auth decorators,
+    before/after_request hooks, error handlers) with the caller's Authorization
+    header, inside the batch request's app context, so all of them share its DB
+    session and identity map. The response lists, in order,
+    {"body": <JSON of the sub-response>, "path": ..., "status": ...}.
+"""
+from contextvars import copy_context
+from flask import Blueprint, current_app, g, jsonify, request
+from werkzeug.test import EnvironBuilder
+
+batch_bp = Blueprint('batch', __name__)
+
+# cabeceras de la peticion original que se pasan a cada sub-peticion
+FORWARDED_HEADERS = ('Authorization', 'Accept-Language')
+
+
+def _sub_request_paths(data):
+    """ validated list of paths, or an error message """
+    items = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, 'requests must be a non-empty list'
+    limit = current_app.config.get('BATCH_MAX_REQUESTS', 10)
+    if len(items) > limit:
+        return None, f'at most {limit} requests per batch'
+    paths = []
+    for item in items:
+        path = item.get('path') if isinstance(item, dict) else item
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            return None, 'each request needs a path under /api/'
+        if path.split('?', 1)[0].rstrip('/') == request.path.rstrip('/'):
+            return None, 'batches cannot be nested'
+        paths.append(path)
+    return paths, None
+
+
+def _dispatch(app, environ):
+    """ run one sub-request like wsgi_app does and return its finished response """
+    with app.request_context(environ):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            response = app.handle_exception(e)
+        # las respuestas por partes se leen aqui, con el contexto de la sub-peticion activo
+        body = response.get_data()
+        response.close()
+    return response, body
+
+
+def _sub_request(app, path, headers):
+    builder = EnvironBuilder(path=path, method='GET', base_url=request.host_url, headers=headers,
+                             environ_base={'REMOTE_ADDR': request.remote_addr})
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+    # g es del contexto de aplicacion, compartido: lo que fije la sub-peticion (g.db_bind,
+    # el JWT decodificado) no debe pasar a la siguiente ni a la peticion del lote
+    saved = dict(g.__dict__)
+    try:
+        # contexto propio para las ContextVar de las sub-peticiones (estadisticas SQL de /metrics)
+        return copy_context().run(_dispatch, app, environ)
+    finally:
+        g.__dict__.clear()
+        g.__dict__.update(saved)
+
+
+@batch_bp.route('', methods=['POST'])
+def run_batch():
+    paths, error = _sub_request_paths(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+
+    app = current_app._get_current_object()
+    encode = app.json.encode
+    # JSON siempre: el cuerpo de cada sub-respuesta se inserta tal cual en la respuesta del lote
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    headers['Accept'] = app.json.mimetype
+
+    parts = []
+    for path in paths:
+        response, body = _sub_request(app, path, headers)
+        if not body:
+            body = b'null'
+        elif response.mimetype == app.json.mimetype:
+            body = body.rstrip(b'\n')
+        else:
+            body = encode(body.decode('utf-8', 'replace'))
+        parts.append(b'{"body":' + body + b',"path":' + encode(path) +
+                     b',"status":' + str(response.status_code).encode() + b'}')
+    return app.response_class(b'{"responses":[' + b','.join(parts) + b']}\n', mimetype=app.json.mimetype)
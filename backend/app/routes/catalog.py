@@ -1,8 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from .. import db
-from ..models import Book, User
-from app.utils.external_api import fetch_book_by_isbn
+from ..models import Book, Hold, Loan, LoanArchive, RelatedBook, SimilarBook, User
+from app.utils.external_api import fetch_book_by_isbn, normalize_isbn
+from ..serializers import book_to_dict
+from ..change_log import log_deleted
+from ..forecast import forecast_returns
+from ..holds import release_copy
+from ..related import forget_book
+from ..similar import forget_similar, index_book
+from ..utils.streaming import stream_list
 
 catalog = Blueprint('catalog', __name__)
 
@@ -18,13 +25,8 @@ def admin_required(fn):
     wrapper.__name__ = fn.__name__
     return wrapper
 
-# ruta para previsualizar libro desde ISBN (admin only)
-@catalog.route('/books/preview/<isbn>', methods=['GET'])
-@admin_required
-def preview_book(isbn):
-    """Preview book details from OpenLibrary API before adding to catalog"""
-    book_data = fetch_book_by_isbn(isbn)
-    
+def preview_result(isbn, book_data):
+    """ Build the preview response once the OpenLibrary lookup has finished """
     if not book_data:
         return jsonify({'error': 'Book not found or API error'}), 404
     
@@ -44,30 +46,37 @@ def preview_book(isbn):
     
     return jsonify(book_data), 200
 
-# ruta para crear libro / solo disponible para admin
-@catalog.route('/books', methods=['POST'])
+# ruta para previsualizar libro desde ISBN (admin only)
+@catalog.route('/books/preview/<isbn>', methods=['GET'])
 @admin_required
-def add_book():
-    data = request.get_json()
+def preview_book(isbn):
+    """Preview book details from OpenLibrary API before adding to catalog"""
+    return preview_result(isbn, fetch_book_by_isbn(isbn))
 
+def validate_new_book(data):
+    """ Error response for an invalid add_book payload, or None """
     if 'isbn' not in data or 'total_copies' not in data:
         return jsonify(msg='ISBN and total_copies are required'), 400
     
     if Book.query.filter_by(isbn=data['isbn']).first():
         return jsonify(msg='Book with this ISBN already exists'), 409
-    
-    # If title/author/cover not provided, try to fetch from API
-    if not data.get('title') or not data.get('author') or not data.get('cover_url'):
-        api_data = fetch_book_by_isbn(data['isbn'])
-        if api_data:
-            data['title'] = data.get('title') or api_data.get('title')
-            data['author'] = data.get('author') or api_data.get('author')
-            data['cover_url'] = data.get('cover_url') or api_data.get('cover_url')
-            data['description'] = data.get('description') or api_data.get('description')
+    return None
+
+def needs_api_data(data):
+    """ title/author/cover missing -> fetch them from OpenLibrary """
+    return not data.get('title') or not data.get('author') or not data.get('cover_url')
+
+def create_book(data, api_data=None):
+    """ Merge OpenLibrary data into the payload and insert the book """
+    if api_data:
+        data['title'] = data.get('title') or api_data.get('title')
+        data['author'] = data.get('author') or api_data.get('author')
+        data['cover_url'] = data.get('cover_url') or api_data.get('cover_url')
+        data['description'] = data.get('description') or api_data.get('description')
     
     # If still no cover_url, generate from ISBN
     if not data.get('cover_url') and data.get('isbn'):
-        clean_isbn = data['isbn'].replace('-', '').replace(' ', '')
+        clean_isbn = normalize_isbn(data['isbn'])
         data['cover_url'] = f'https://covers.openlibrary.org/b/isbn/{clean_isbn}-L.jpg'
     
     # Validate required fields after API fetch attempt
@@ -86,18 +95,25 @@ def add_book():
         description=data.get('description')
     )
     db.session.add(new_book)
+    db.session.flush()
+    # sin historial de prestamos: sus parecidos salen del texto (ver app/similar.py)
+    index_book(new_book)
     db.session.commit()
-    return jsonify({"msg":'Book added successfully', "book": {
-        'id': new_book.id,
-        'isbn': new_book.isbn,
-        'title': new_book.title,
-        'author': new_book.author,
-        'genre': new_book.genre,
-        'total_copies': new_book.total_copies,
-        'available_copies': new_book.available_copies,
-        'cover_url': new_book.cover_url,
-        'description': new_book.description
-    }}), 201
+    return jsonify({"msg":'Book added successfully', "book": book_to_dict(new_book)}), 201
+
+# ruta para crear libro / solo disponible para admin
+@catalog.route('/books', methods=['POST'])
+@admin_required
+def add_book():
+    data = request.get_json()
+
+    error = validate_new_book(data)
+    if error:
+        return error
+    
+    # If title/author/cover not provided, try to fetch from API
+    api_data = fetch_book_by_isbn(data['isbn']) if needs_api_data(data) else None
+    return create_book(data, api_data)
 
 # ruta para obtener lista de libros 
 @catalog.route('/books', methods=['GET'])
@@ -106,28 +122,17 @@ def get_books():
     search = request.args.get('search', '')
     
     if search:
-        books = Book.query.filter(
+        query = Book.query.filter(
             (Book.title.ilike(f'%{search}%')) |
             (Book.author.ilike(f'%{search}%')) |
             (Book.isbn.ilike(f'%{search}%'))
-        ).all()
+        )
     else:
-        books = Book.query.all()
+        query = Book.query
     
-    output = []
-    for book in books:
-        output.append({
-            'id': book.id,
-            'isbn': book.isbn,
-            'title': book.title,
-            'author': book.author,
-            'genre': book.genre,
-            'total_copies': book.total_copies,
-            'available_copies': book.available_copies,
-            'cover_url': book.cover_url,
-            'description': book.description
-        })
-    return jsonify({'books': output}), 200
+    if current_app.config.get('STREAM_LIST_RESPONSES'):
+        return stream_list(query, book_to_dict, key='books'), 200
+    return jsonify({'books': [book_to_dict(book) for book in query.all()]}), 200
 
 # ruta para obtener un libro específico
 @catalog.route('/books/<int:book_id>', methods=['GET'])
@@ -138,17 +143,31 @@ def get_book(book_id):
     if not book:
         return jsonify({'error': 'Book not found'}), 404
     
-    return jsonify({
-        'id': book.id,
-        'isbn': book.isbn,
-        'title': book.title,
-        'author': book.author,
-        'genre': book.genre,
-        'total_copies': book.total_copies,
-        'available_copies': book.available_copies,
-        'cover_url': book.cover_url,
-        'description': book.description
-    }), 200
+    data = book_to_dict(book)
+    data['forecast'] = forecast_returns(book) if book.next_return_at else []
+    return jsonify(data), 200
+
+# ruta para "quienes pidieron este libro tambien pidieron"
+@catalog.route('/books/<int:book_id>/related', methods=['GET'])
+def get_related_books(book_id):
+    """Books most often borrowed by the patrons who borrowed this one (see app/related.py)"""
+    rows = db.session.query(Book, RelatedBook.count).join(RelatedBook, RelatedBook.other_id == Book.id) \
+        .filter(RelatedBook.book_id == book_id).order_by(RelatedBook.rank).all()
+    if not rows and db.session.get(Book, book_id) is None:
+        return jsonify({'error': 'Book not found'}), 404
+
+    return jsonify({'related': [dict(book_to_dict(book), borrowed_together=count) for book, count in rows]}), 200
+
+# ruta para libros parecidos por titulo, autor, genero y descripcion
+@catalog.route('/books/<int:book_id>/similar', methods=['GET'])
+def get_similar_books(book_id):
+    """Books with the closest content (see app/similar.py)"""
+    rows = db.session.query(Book, SimilarBook.score).join(SimilarBook, SimilarBook.other_id == Book.id) \
+        .filter(SimilarBook.book_id == book_id).order_by(SimilarBook.rank).all()
+    if not rows and db.session.get(Book, book_id) is None:
+        return jsonify({'error': 'Book not found'}), 404
+
+    return jsonify({'similar': [dict(book_to_dict(book), score=round(score, 4)) for book, score in rows]}), 200
 
 # ruta para actualizar libro (admin only)
 @catalog.route('/books/<int:book_id>', methods=['PUT'])
@@ -178,35 +197,32 @@ def update_book(book_id):
     if 'cover_url' in data:
         book.cover_url = data['cover_url']
     
-    # Handle total_copies update - adjust available_copies proportionally
+    # Handle total_copies update - new copies go to the waitlist first, like a returned one
     if 'total_copies' in data:
         new_total = data['total_copies']
         if new_total < 0:
             return jsonify({'error': 'Total copies cannot be negative'}), 400
         
-        # Calculate current loans
-        current_loans = book.total_copies - book.available_copies
+        # Copies on loan or set aside for a ready hold
+        copies_in_use = book.total_copies - book.available_copies
         
-        if new_total < current_loans:
-            return jsonify({'error': f'Cannot reduce total copies below current loans ({current_loans})'}), 400
+        if new_total < copies_in_use:
+            return jsonify({'error': f'Cannot reduce total copies below copies on loan or held ({copies_in_use})'}), 400
         
-        book.available_copies = new_total - current_loans
+        added = new_total - book.total_copies
         book.total_copies = new_total
+        if added < 0:
+            book.available_copies += added
+        for _ in range(added):
+            release_copy(book)
     
+    if any(field in data for field in ('title', 'author', 'genre')):
+        index_book(book)
     db.session.commit()
     
     return jsonify({
         'msg': 'Book updated successfully',
-        'book': {
-            'id': book.id,
-            'isbn': book.isbn,
-            'title': book.title,
-            'author': book.author,
-            'genre': book.genre,
-            'total_copies': book.total_copies,
-            'available_copies': book.available_copies,
-            'cover_url': book.cover_url
-        }
+        'book': book_to_dict(book)
     }), 200
 
 # ruta para eliminar libro (admin only)
@@ -214,7 +230,6 @@ def update_book(book_id):
 @admin_required
 def delete_book(book_id):
     """Delete a book from catalog"""
-    from ..models import Loan
     
     book = Book.query.get(book_id)
     
@@ -224,6 +239,7 @@ def delete_book(book_id):
     # Check if book has active loans (On Loan or Overdue status)
     active_loans = Loan.query.filter(
         Loan.book_id == book_id,
+        Loan.return_date.is_(None),
         Loan.status.in_(['On Loan', 'Overdue'])
     ).count()
     
@@ -234,7 +250,14 @@ def delete_book(book_id):
         }), 400
     
     # Delete all loan history for this book first
-    Loan.query.filter_by(book_id=book_id).delete()
+    history = Loan.query.filter_by(book_id=book_id)
+    log_deleted(db.session, 'loan', history.with_entities(Loan.id, Loan.user_id))
+    history.delete()
+    LoanArchive.query.filter_by(book_id=book_id).delete()
+    forget_book(book_id)
+    forget_similar(book_id)
+    # y su lista de espera
+    Hold.query.filter_by(book_id=book_id).delete()
     
     db.session.delete(book)
     db.session.commit()
@@ -0,0 +1,77 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+from sqlalchemy import func
+from app import db
+from app.models import Book, ChangeLog, Loan
+from app.serializers import book_to_dict, loan_fields_to_dict
+
+changes_bp = Blueprint('changes', __name__)
+
+# prestamo sin libro/usuario anidados (los libros llegan por su propia entrada del feed), con la misma
+# multa que loan_to_dict
+MODELS = {'book': (Book, book_to_dict), 'loan': (Loan, loan_fields_to_dict)}
+
+
+def visible_changes(since):
+    """ changes after the cursor the caller may see: every book, and loans only their own (all for admins) """
+    query = ChangeLog.query.filter(ChangeLog.id > since)
+    if get_jwt().get('role') != 'admin':
+        user_id = int(get_jwt_identity())
+        query = query.filter((ChangeLog.entity == 'book') | (ChangeLog.user_id == user_id))
+    return query.order_by(ChangeLog.id)
+
+
+def compact(entries):
+    """ one delta per entity (its last change), with the current row for upserts
+
+        Rows are read now, after the logged change: an upsert whose row no longer
+        exists is sent as a delete (its delete entry may be past this page).
+    """
+    latest = {}
+    for entry in entries:
+        latest.pop((entry.entity, entry.entity_id), None)
+        latest[(entry.entity, entry.entity_id)] = entry
+
+    current = {}
+    for entity, (model, _) in MODELS.items():
+        ids = [entity_id for (kind, entity_id), entry in latest.items() if kind == entity and entry.op == 'upsert']
+        if ids:
+            current[entity] = {row.id: row for row in model.query.filter(model.id.in_(ids))}
+
+    changes = []
+    for (entity, entity_id), entry in latest.items():
+        row = current.get(entity, {}).get(entity_id) if entry.op == 'upsert' else None
+        change = {'cursor': entry.id, 'entity': entity, 'id': entity_id, 'op': 'upsert' if row else 'delete'}
+        if row is not None:
+            change['data'] = MODELS[entity][1](row)
+        changes.append(change)
+    return changes
+
+
+# ruta para sincronizar: cambios de libros y prestamos desde un cursor
+@changes_bp.route('', methods=['GET'])
+@jwt_required()
+def get_changes():
+    """ GET /api/changes?since=<cursor>&limit=<n>
+
+        Without since, returns the current cursor and no changes: fetch it before
+        the full lists, then ask for the changes since it.
+    """
+    since = request.args.get('since', type=int)
+    if since is None:
+        head = db.session.query(func.max(ChangeLog.id)).scalar() or 0
+        return jsonify({'changes': [], 'cursor': head, 'has_more': False}), 200
+    if since < 0:
+        return jsonify({'error': 'since must be a cursor returned by this endpoint'}), 400
+
+    max_limit = current_app.config.get('CHANGES_PAGE_SIZE', 500)
+    limit = min(max(request.args.get('limit', max_limit, type=int), 1), max_limit)
+    entries = visible_changes(since).limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    return jsonify({
+        'changes': compact(entries),
+        'cursor': entries[-1].id if entries else since,
+        'has_more': has_more,
+    }), 200
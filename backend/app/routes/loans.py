@@ -1,139 +1,295 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Loan, User, Book
+from app.models import Loan, LoanArchive, User, Book, Hold
+from app.utils.db_routing import use_primary
+from app.utils.group_commit import run_write
+from app.serializers import loan_to_dict, hold_to_dict
+from app.forecast import note_change, note_checkout
+from app.holds import ACTIVE, CANCELLED, FULFILLED, READY, active_hold, queue_position, release_copy
+from app.utils.streaming import stream_list
+from app.circulation import batch_checkout, batch_return
+from app.archive import loan_history
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 
 loans_bp = Blueprint('loans', __name__)
 
-@loans_bp.route('/reserve', methods=['POST'])
-@jwt_required()
-def book_reservation():
-    """ Endpoint to reserve/borrow a book """
-    current_user_id = int(get_jwt_identity())
-    data = request.get_json()
+def loans_query():
+    """ Loan query that loads book and user in the same SELECT (loan_to_dict uses both) """
+    return Loan.query.options(joinedload(Loan.book), joinedload(Loan.user))
 
-    book_id = data.get('book_id')
+def reserve(user_id, book_id, unavailable_error):
+    """ write operation: create a loan and take one copy (see run_write) """
     book = Book.query.get(book_id)
     if not book:
-        return jsonify({"error": "Book not found"}), 404
+        return {"error": "Book not found"}, 404
 
-    if book.available_copies <= 0:
-        return jsonify({"error": "No available copies for reservation"}), 400
+    hold = active_hold(user_id, book_id)
+    if hold is not None and hold.status == READY:
+        pass  # la copia ya estaba apartada para este usuario al devolverse
+    elif book.available_copies <= 0:
+        return {"error": unavailable_error, "can_hold": True}, 400
+    else:
+        book.available_copies -= 1
+    if hold is not None:
+        hold.status = FULFILLED
 
-    loan = Loan(user_id=current_user_id, book_id=book_id)
-    book.available_copies -= 1
+    loan = Loan(user_id=user_id, book_id=book_id)
+    note_checkout(book, loan)
 
     db.session.add(loan)
-    db.session.commit()
+    db.session.flush()
 
-    return jsonify({
+    return {
         'message': 'Book reserved successfully',
-        'loan': loan.to_dict()
-    }), 201
+        'loan': loan_to_dict(loan)
+    }, 201
 
-@loans_bp.route('/reserve/<int:book_id>', methods=['POST'])
-@jwt_required()
-def reserve_book_by_id(book_id):
-    """ Endpoint to reserve/borrow a book by ID in URL """
-    current_user_id = int(get_jwt_identity())
+def renew(user_id, loan_id):
+    """ write operation: renew a loan if eligible """
+    loan = Loan.query.get(loan_id)
+
+    if not loan or loan.user_id != user_id:
+        return {"error": "Loan not found"}, 404
+
+    previous_expiration = loan.expiration_date
+    if not loan.renewal():
+        return {"error": "Loan cannot be renewed"}, 400
+    note_change(loan.book, previous_expiration)
+
+    return {
+        'message': 'Loan renewed successfully',
+        'loan': loan_to_dict(loan)
+    }, 200
+
+def return_book(user_id, loan_id):
+    """ write operation: return a loaned book and give the copy back """
+    loan = Loan.query.get(loan_id)
+
+    if not loan or loan.user_id != user_id:
+        return {"error": "Loan not found"}, 404
+    # devolverlo otra vez daria a la lista de espera una copia que no existe
+    if loan.return_date is not None:
+        return {"error": "Loan already returned"}, 400
+
+    loan.return_date = datetime.utcnow()
+    loan.status = 'Returned'
+    # la copia pasa al primero de la lista de espera (en esta misma transaccion) o vuelve a estar disponible
+    release_copy(loan.book)
+    note_change(loan.book, loan.expiration_date)
+
+    return {
+        'message': 'Book returned successfully',
+        'final_fine_amount': loan.fine_amount,
+    }, 200
 
+def place_hold(user_id, book_id):
+    """ write operation: join the waitlist of a book with no available copies """
     book = Book.query.get(book_id)
     if not book:
-        return jsonify({"error": "Book not found"}), 404
+        return {"error": "Book not found"}, 404
 
-    if book.available_copies <= 0:
-        return jsonify({"error": "Book not available for reservation"}), 400
+    if book.available_copies > 0:
+        return {"error": "Book is available, reserve it instead"}, 400
 
-    loan = Loan(user_id=current_user_id, book_id=book_id)
-    book.available_copies -= 1
+    if active_hold(user_id, book_id) is not None:
+        return {"error": "You already have a hold for this book"}, 409
 
-    db.session.add(loan)
-    db.session.commit()
+    hold = Hold(user_id=user_id, book_id=book_id)
+    db.session.add(hold)
+    db.session.flush()
 
-    return jsonify({
-        'message': 'Book reserved successfully',
-        'loan': loan.to_dict()
-    }), 201
+    return {
+        'message': 'Hold placed successfully',
+        'hold': hold_to_dict(hold, queue_position(hold))
+    }, 201
+
+def cancel_hold(user_id, hold_id):
+    """ write operation: leave the waitlist, passing on a copy set aside for the hold """
+    hold = Hold.query.get(hold_id)
+
+    if not hold or hold.user_id != user_id:
+        return {"error": "Hold not found"}, 404
+
+    if hold.status not in ACTIVE:
+        return {"error": "Hold is no longer active"}, 400
+
+    was_ready = hold.status == READY
+    hold.status = CANCELLED
+    if was_ready:
+        release_copy(hold.book)
+
+    return {'message': 'Hold cancelled successfully'}, 200
+
+@loans_bp.route('/reserve', methods=['POST'])
+@jwt_required()
+def book_reservation():
+    """ Endpoint to reserve/borrow a book """
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json()
+
+    book_id = data.get('book_id')
+    payload, status = run_write(
+        lambda: reserve(current_user_id, book_id, "No available copies for reservation"))
+    return jsonify(payload), status
+
+@loans_bp.route('/reserve/<int:book_id>', methods=['POST'])
+@jwt_required()
+def reserve_book_by_id(book_id):
+    """ Endpoint to reserve/borrow a book by ID in URL """
+    current_user_id = int(get_jwt_identity())
+
+    payload, status = run_write(
+        lambda: reserve(current_user_id, book_id, "Book not available for reservation"))
+    return jsonify(payload), status
 
 @loans_bp.route('/myLoans', methods=['GET'])
+@use_primary  # read-your-writes: patrons reload this list right after reserve/return
 @jwt_required()
 def my_loans():
     """ endpoint to get all loans for the current user """
     current_user_id = int(get_jwt_identity())
-    loans = Loan.query.filter_by(user_id=current_user_id).all()
+    loans = loans_query().filter_by(user_id=current_user_id).all()
 
-    return jsonify({'loans': [loan.to_dict() for loan in loans]}), 200
+    return jsonify({'loans': [loan_to_dict(loan) for loan in loans]}), 200
 
 @loans_bp.route('/my-loans', methods=['GET'])
+@use_primary  # read-your-writes: patrons reload this list right after reserve/return
 @jwt_required()
 def my_loans_alias():
     """ endpoint to get all loans for the current user (kebab-case alias) """
     current_user_id = int(get_jwt_identity())
-    loans = Loan.query.filter_by(user_id=current_user_id).all()
+    loans = loans_query().filter_by(user_id=current_user_id).all()
+
+    return jsonify({'loans': [loan_to_dict(loan) for loan in loans]}), 200
+
+@loans_bp.route('/history', methods=['GET'])
+@jwt_required()
+def my_loan_history():
+    """ endpoint to page through the current user's returned loans, archived ones included
+
+        GET /api/loans/history?before=<id>&limit=<n>: pass the last id of a page as
+        before to get the next one.
+    """
+    current_user_id = int(get_jwt_identity())
+    max_limit = current_app.config.get('LOAN_HISTORY_PAGE_SIZE', 50)
+    limit = min(max(request.args.get('limit', max_limit, type=int), 1), max_limit)
+    loans = loan_history(current_user_id, request.args.get('before', type=int), limit)
+
+    return jsonify({
+        'loans': loans,
+        'before': loans[-1]['id'] if len(loans) == limit else None,
+    }), 200
+
+@loans_bp.route('/holds', methods=['POST'])
+@jwt_required()
+def hold_book():
+    """ endpoint to join the waitlist of an unavailable book """
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+
+    book_id = data.get('book_id')
+    payload, status = run_write(lambda: place_hold(current_user_id, book_id))
+    return jsonify(payload), status
+
+@loans_bp.route('/holds', methods=['GET'])
+@use_primary  # read-your-writes: the list is reloaded right after placing or cancelling a hold
+@jwt_required()
+def my_holds():
+    """ endpoint to get the active holds of the current user with their queue position """
+    current_user_id = int(get_jwt_identity())
+    holds = Hold.query.filter(Hold.user_id == current_user_id, Hold.status.in_(ACTIVE)) \
+        .order_by(Hold.id).all()
 
-    return jsonify({'loans': [loan.to_dict() for loan in loans]}), 200
+    return jsonify({'holds': [hold_to_dict(hold, queue_position(hold)) for hold in holds]}), 200
+
+@loans_bp.route('/holds/<int:hold_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_hold_by_id(hold_id):
+    """ endpoint to cancel a hold """
+    current_user_id = int(get_jwt_identity())
+
+    payload, status = run_write(lambda: cancel_hold(current_user_id, hold_id))
+    return jsonify(payload), status
 
 @loans_bp.route('/loans/<int:loan_id>/renew', methods=['POST'])
 @jwt_required()
 def renew_loan(loan_id):
     """ endpoint to renew a loan if eligible """
     current_user_id = int(get_jwt_identity())
-    loan = Loan.query.get(loan_id)
 
-    if not loan or loan.user_id != current_user_id:
-        return jsonify({"error": "Loan not found"}), 404
-    
-    if loan.renewal():
-        db.session.commit()
-        return jsonify({
-            'message': 'Loan renewed successfully',
-            'loan': loan.to_dict()
-        }), 200
-    else:
-        return jsonify({"error": "Loan cannot be renewed"}), 400
+    payload, status = run_write(lambda: renew(current_user_id, loan_id))
+    return jsonify(payload), status
 
 @loans_bp.route('/loans/<int:loan_id>/return', methods=['POST'])
 @jwt_required()
 def return_loan(loan_id):
     """ endpoint to return a loaned book """
     current_user_id = int(get_jwt_identity())
-    loan = Loan.query.get(loan_id)
-
-    if not loan or loan.user_id != current_user_id:
-        return jsonify({"error": "Loan not found"}), 404
-
-    loan.return_date = datetime.utcnow()
-    loan.status = 'Returned'
-    loan.book.available_copies += 1
 
-    db.session.commit()
-
-    return jsonify({
-        'message': 'Book returned successfully',
-        'final_fine_amount': loan.fine_amount,
-    }), 200
+    payload, status = run_write(lambda: return_book(current_user_id, loan_id))
+    return jsonify(payload), status
 
 @loans_bp.route('/return/<int:loan_id>', methods=['POST'])
 @jwt_required()
 def return_loan_alias(loan_id):
     """ endpoint to return a loaned book (shorter route) """
     current_user_id = int(get_jwt_identity())
-    loan = Loan.query.get(loan_id)
 
-    if not loan or loan.user_id != current_user_id:
-        return jsonify({"error": "Loan not found"}), 404
+    payload, status = run_write(lambda: return_book(current_user_id, loan_id))
+    return jsonify(payload), status
+
+def desk_items(data):
+    """ validate the item list of a desk request: book/loan ids (int) or ISBNs (str) """
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return None, 'items must be a non-empty list'
+    limit = current_app.config.get('DESK_MAX_ITEMS', 50)
+    if len(items) > limit:
+        return None, f'at most {limit} items per request'
+    if any(isinstance(item, bool) or not isinstance(item, (int, str)) for item in items):
+        return None, 'each item must be an id or an ISBN'
+    return items, None
+
+@loans_bp.route('/desk/checkout', methods=['POST'])
+@jwt_required()
+def desk_checkout():
+    """ endpoint to lend several books to a patron at once -> only for admin users """
+    current_user_id = int(get_jwt_identity())
+    user = User.query.get(current_user_id)
 
-    loan.return_date = datetime.utcnow()
-    loan.status = 'Returned'
-    loan.book.available_copies += 1
+    if user.role != 'admin':
+        return jsonify({"error": "Admin access required"}), 403
 
-    db.session.commit()
+    data = request.get_json(silent=True) or {}
+    items, error = desk_items(data)
+    if error:
+        return jsonify({"error": error}), 400
+    patron_id = data.get('user_id')
+    if not isinstance(patron_id, int) or isinstance(patron_id, bool):
+        return jsonify({"error": "user_id is required"}), 400
 
-    return jsonify({
-        'message': 'Book returned successfully',
-        'final_fine_amount': loan.fine_amount,
-    }), 200
+    payload, status = run_write(lambda: batch_checkout(patron_id, items))
+    return jsonify(payload), status
+
+@loans_bp.route('/desk/return', methods=['POST'])
+@jwt_required()
+def desk_return():
+    """ endpoint to return several loans at once -> only for admin users """
+    current_user_id = int(get_jwt_identity())
+    user = User.query.get(current_user_id)
+
+    if user.role != 'admin':
+        return jsonify({"error": "Admin access required"}), 403
+
+    data = request.get_json(silent=True) or {}
+    items, error = desk_items(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    payload, status = run_write(lambda: batch_return(items, data.get('user_id')))
+    return jsonify(payload), status
 
 @loans_bp.route('/all', methods=['GET'])
 @jwt_required()
@@ -145,8 +301,10 @@ def get_all_loans():
     if user.role != 'admin':
         return jsonify({"error": "Admin access required"}), 403
     
-    loans = Loan.query.all()
-    return jsonify([loan.to_dict() for loan in loans]), 200
+    if current_app.config.get('STREAM_LIST_RESPONSES'):
+        return stream_list(loans_query(), loan_to_dict), 200
+    loans = loans_query().all()
+    return jsonify([loan_to_dict(loan) for loan in loans]), 200
 
 @loans_bp.route('/stats', methods=['GET'])
 @jwt_required()
@@ -159,14 +317,22 @@ def get_loan_stats():
         return jsonify({"error": "Admin access required"}), 403
 
     from datetime import datetime, timedelta
-    active = Loan.query.filter(Loan.status == 'On Loan').count()
+    # return_date IS NULL: los conteos de activos solo recorren el indice parcial de prestamos activos
+    active = Loan.query.filter(Loan.return_date.is_(None), Loan.status == 'On Loan').count()
     overdue = Loan.query.filter(
+        Loan.return_date.is_(None),
         Loan.status == 'On Loan',
         Loan.expiration_date < datetime.utcnow()
     ).count()
-    returned = Loan.query.filter(Loan.status == 'Returned').count()
-
-    total_fines = db.session.query(db.func.sum(Loan.fine_amount)).scalar() or 0.0
+    # devueltos y multas de la tabla activa y del archivo: una consulta por tabla
+    returned, total_fines = 0, 0.0
+    for model in (Loan, LoanArchive):
+        count, fines = db.session.query(
+            db.func.count(db.case((model.status == 'Returned', 1))),
+            db.func.sum(model.fine_amount),
+        ).one()
+        returned += count
+        total_fines += fines or 0.0
     
     return jsonify({
         'active_loans': active,
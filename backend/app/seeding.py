@@ -0,0 +1,200 @@
+""" Synthetic data generator for benchmarking at library scale (flask seed).
+
+    Rows are generated as plain dicts and written with Core executemany in large
+    batches; every user shares one precomputed password hash, so the cost is the
+    inserts themselves. The same --seed always produces the same rows (dates are
+    relative to the day of the run).
+
+    Distributions:
+      * book popularity is Zipfian (a few titles get most of the loans)
+      * genres are skewed (fiction heavy), authors are reused across titles
+      * patron activity is skewed too (some patrons borrow far more than others)
+      * loans spread over the last `days` days; old ones are mostly returned,
+        recent ones are on loan, some overdue (with fines) or renewed
+"""
+import itertools
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, update, bindparam
+from werkzeug.security import generate_password_hash
+from . import db
+from .models import User, Book, Loan
+from .rollups import rebuild_rollups
+
+GENRES = {
+    'Fiction': 30, 'Mystery': 14, 'Romance': 12, 'Science Fiction': 10, 'Fantasy': 10,
+    'Biography': 7, 'History': 7, 'Children': 5, 'Poetry': 3, 'Science': 2,
+}
+ADJECTIVES = ('Silent', 'Lost', 'Hidden', 'Last', 'Broken', 'Golden', 'Secret', 'Endless', 'Little',
+              'Dark', 'Burning', 'Forgotten', 'Winter', 'Quiet', 'Wild', 'Distant', 'Crimson', 'Glass')
+NOUNS = ('River', 'Garden', 'House', 'Kingdom', 'Road', 'Letter', 'Sea', 'City', 'Night', 'Empire',
+         'Forest', 'Mirror', 'Station', 'Island', 'Song', 'Child', 'Storm', 'Library', 'Orchard')
+FIRST_NAMES = ('Ana', 'Luis', 'Maria', 'John', 'Sofia', 'Diego', 'Emma', 'Noah', 'Lucia', 'Omar',
+               'Grace', 'Kenji', 'Amara', 'Mateo', 'Elena', 'Ravi', 'Chloe', 'Ivan', 'Zoe', 'Hugo')
+LAST_NAMES = ('Garcia', 'Smith', 'Lopez', 'Kim', 'Martin', 'Hernandez', 'Brown', 'Nguyen', 'Rossi',
+              'Silva', 'Khan', 'Muller', 'Sato', 'Okafor', 'Torres', 'Dubois', 'Cohen', 'Ramos')
+
+LOAN_DAYS = 14
+
+
+def zipf_cum_weights(n, s):
+    """ cumulative weights of a Zipf(s) distribution over ranks 1..n """
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def generate_users(rng, count, first_id, password_hash):
+    for i in range(count):
+        user_id = first_id + i
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            'id': user_id, 'email': f'patron{user_id}@seed.mybookspace', 'password': password_hash,
+            'first_name': first, 'last_name': last, 'role': 'user',
+        }
+
+
+def generate_books(rng, count, first_id):
+    genres, genre_weights = list(GENRES), list(GENRES.values())
+    authors = [f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}' for _ in range(max(1, count // 8))]
+    author_weights = zipf_cum_weights(len(authors), 0.9)
+    for i in range(count):
+        book_id = first_id + i
+        copies = rng.randint(1, 8)
+        yield {
+            'id': book_id,
+            'isbn': f'979{book_id:010d}',
+            'title': f'The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {book_id}',
+            'author': rng.choices(authors, cum_weights=author_weights)[0],
+            'genre': rng.choices(genres, genre_weights)[0],
+            'total_copies': copies,
+            'available_copies': copies,
+            'cover_url': f'https://covers.openlibrary.org/b/isbn/979{book_id:010d}-L.jpg',
+            'description': None,
+        }
+
+
+LOAN_COLUMNS = ('user_id', 'book_id', 'loan_date', 'expiration_date', 'return_date',
+                'status', 'fine_amount', 'renewals')
+
+
+def _sql_datetime(value):
+    # mismo formato que guarda el tipo DateTime de SQLAlchemy en SQLite
+    return value.isoformat(sep=' ', timespec='microseconds') if value else None
+
+
+def generate_loans(rng, count, book_ids, user_ids, days, now, active_by_book, chunk=100000):
+    """ yields loan rows as LOAN_COLUMNS tuples; counts active loans per book in active_by_book """
+    # popularidad independiente del id: se baraja el orden de los ranks
+    books_by_rank = list(book_ids)
+    rng.shuffle(books_by_rank)
+    users_by_rank = list(user_ids)
+    rng.shuffle(users_by_rank)
+    book_weights = zipf_cum_weights(len(books_by_rank), 1.0)
+    user_weights = zipf_cum_weights(len(users_by_rank), 0.8)
+    span = days * 86400
+    loan_period = timedelta(days=LOAN_DAYS)
+
+    for offset in range(0, count, chunk):
+        size = min(chunk, count - offset)
+        picked_books = rng.choices(books_by_rank, cum_weights=book_weights, k=size)
+        picked_users = rng.choices(users_by_rank, cum_weights=user_weights, k=size)
+        renewal_counts = rng.choices((0, 1, 2), (70, 20, 10), k=size)
+
+        for book_id, user_id, renewals in zip(picked_books, picked_users, renewal_counts):
+            loan_date = now - timedelta(seconds=rng.random() * span)
+            age_days = (now - loan_date).days
+            expiration = loan_date + loan_period * (1 + renewals)
+
+            # prestamos viejos casi siempre devueltos; recientes, casi siempre activos
+            returned = rng.random() < (0.97 if age_days > 60 else 0.5 if age_days > LOAN_DAYS else 0.1)
+            if returned:
+                return_date = min(now, loan_date + timedelta(days=rng.uniform(1, LOAN_DAYS * (1 + renewals) + 5)))
+                status, fine = 'Returned', 0.0
+            else:
+                return_date = None
+                active_by_book[book_id] = active_by_book.get(book_id, 0) + 1
+                if expiration < now:
+                    status, fine = 'Overdue', float((now - expiration).days)
+                else:
+                    status, fine = 'On Loan', 0.0
+
+            yield (user_id, book_id, _sql_datetime(loan_date), _sql_datetime(expiration),
+                   _sql_datetime(return_date), status, fine, renewals)
+
+
+def seed_database(books=1000, users=100, loans=5000, seed=42, days=730, batch_size=20000,
+                  password='password123', log=print):
+    """ Append synthetic books, users and loans; returns the number of rows per table """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    password_hash = generate_password_hash(password, method='scrypt')  # una sola vez
+    session = db.session
+
+    first_user, first_book = _next_id(User), _next_id(Book)
+
+    for batch in _batched(generate_users(rng, users, first_user, password_hash), batch_size):
+        session.execute(insert(User.__table__), batch)
+    session.commit()
+    log(f'{users} users')
+
+    for batch in _batched(generate_books(rng, books, first_book), batch_size):
+        session.execute(insert(Book.__table__), batch)
+    session.commit()
+    log(f'{books} books')
+
+    book_ids = range(first_book, first_book + books)
+    user_ids = range(first_user, first_user + users)
+    active_by_book = {}
+    if loans and books and users:
+        # los prestamos son el grueso: executemany directo con tuplas, sin procesar binds por fila
+        sql = (f'INSERT INTO "{Loan.__tablename__}" ({", ".join(LOAN_COLUMNS)}) '
+               f'VALUES ({", ".join("?" * len(LOAN_COLUMNS))})')
+        written = 0
+        for batch in _batched(generate_loans(rng, loans, book_ids, user_ids, days, now, active_by_book),
+                              batch_size):
+            session.connection().exec_driver_sql(sql, batch)
+            session.commit()
+            written += len(batch)
+            if written % (batch_size * 25) == 0:
+                log(f'  {written}/{loans} loans')
+        log(f'{loans} loans')
+
+    # copias disponibles coherentes con los prestamos activos
+    if active_by_book:
+        table = Book.__table__
+        stmt = update(table).where(table.c.id == bindparam('b_id')).values(
+            total_copies=func.max(table.c.total_copies, bindparam('active')),
+            available_copies=func.max(table.c.total_copies, bindparam('active')) - bindparam('active'),
+        )
+        rows = [{'b_id': book_id, 'active': active} for book_id, active in active_by_book.items()]
+        for batch in _batched(rows, batch_size):
+            session.execute(stmt, batch)
+        session.commit()
+
+        # prevision de devoluciones: primer vencimiento activo de cada libro (ver app/forecast.py)
+        loans_table = Loan.__table__
+        session.execute(update(table).values(next_return_at=(
+            select(func.min(loans_table.c.expiration_date))
+            .where(loans_table.c.book_id == table.c.id, loans_table.c.return_date.is_(None))
+            .scalar_subquery())))
+        session.commit()
+
+    # los prestamos se insertaron sin el ORM: las rollups de circulacion se recalculan
+    if loans:
+        rebuild_rollups()
+
+    return {'users': users, 'books': books, 'loans': loans}
@@ -0,0 +1,285 @@
+""" Response serialization: per-model encoders and the app's JSON provider.
+
+    Encoders are generated once per model from a field tuple (a single dict
+    literal over the instance state per object) instead of a hand-written dict
+    in every route.
+    Datetimes are left as datetime objects; the JSON provider writes them as ISO
+    8601 (same text as .isoformat()), natively in C when orjson or msgspec is
+    installed and through the stdlib json module otherwise.
+    /api/ GET requests may ask for MessagePack or CBOR with the Accept header;
+    those formats encode the same dicts, with the same string forms for dates,
+    decimals and UUIDs, so only the wire encoding differs from the JSON.
+"""
+import dataclasses
+import decimal
+import functools
+import json
+import uuid
+from datetime import date, datetime
+from typing import Callable, NamedTuple
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # optional
+    cbor2 = None
+
+
+def model_encoder(fields):
+    """ precompiled encoder: obj -> {field: value} for the given attribute names
+
+        The function is generated once per field list (as dataclasses does for
+        __init__) so each object costs a single dict literal. Loaded ORM instances
+        keep their column values in obj.__dict__, which is read directly instead of
+        going through one descriptor per attribute; expired or unloaded attributes
+        fall back to normal attribute access (which lets the ORM load them).
+    """
+    fields = tuple(fields)
+    for name in fields:
+        if not name.isidentifier():
+            raise ValueError(f'invalid field name: {name!r}')
+    from_state = ', '.join(f'{name!r}: state[{name!r}]' for name in fields)
+    from_attributes = ', '.join(f'{name!r}: obj.{name}' for name in fields)
+    source = (
+        'def encode(obj):\n'
+        '    state = obj.__dict__\n'
+        '    try:\n'
+        f'        return {{{from_state}}}\n'
+        '    except KeyError:\n'
+        f'        return {{{from_attributes}}}\n'
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace['encode']
+
+
+BOOK_FIELDS = ('id', 'isbn', 'title', 'author', 'genre', 'total_copies', 'available_copies',
+               'cover_url', 'description', 'next_return_at')
+LOAN_FIELDS = ('id', 'user_id', 'book_id', 'loan_date', 'expiration_date', 'return_date',
+               'status', 'fine_amount', 'renewals')
+USER_FIELDS = ('id', 'email', 'first_name', 'last_name', 'role', 'created_at')
+HOLD_FIELDS = ('id', 'user_id', 'book_id', 'status', 'created_at', 'ready_at', 'expires_at')
+
+book_to_dict = model_encoder(BOOK_FIELDS)
+_loan_fields = model_encoder(LOAN_FIELDS)
+_loan_book = model_encoder(('id', 'title', 'author', 'isbn', 'cover_url'))
+_loan_user = model_encoder(('id', 'email', 'first_name', 'last_name'))
+_user_fields = model_encoder(USER_FIELDS)
+_hold_fields = model_encoder(HOLD_FIELDS)
+
+
+def loan_fields_to_dict(loan):
+    """ loan without its book and borrower (the /api/changes deltas), fine recalculated """
+    loan.calculate_fine()
+    return _loan_fields(loan)
+
+
+def loan_to_dict(loan):
+    """ loan with its book and borrower (load both with joinedload to avoid N+1) """
+    data = loan_fields_to_dict(loan)
+    book, user = loan.book, loan.user
+    data['book'] = _loan_book(book) if book else None
+    data['user'] = _loan_user(user) if user else None
+    return data
+
+
+def loan_row_to_dict(row, book):
+    """ loan read with Core (the history across Loans and LoansArchive) and its book """
+    data = dict(row._mapping)
+    data['book'] = _loan_book(book) if book else None
+    return data
+
+
+def hold_to_dict(hold, position=None):
+    """ hold with its book and its place in the queue (None once allocated) """
+    data = _hold_fields(hold)
+    data['book'] = _loan_book(hold.book) if hold.book else None
+    data['position'] = position
+    return data
+
+
+def user_to_dict(user):
+    data = _user_fields(user)
+    data['full_name'] = f'{user.first_name} {user.last_name}'
+    return data
+
+
+# --- JSON provider -------------------------------------------------------------------
+
+def _default(obj):
+    """ types the fast backends (and json) do not know natively """
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _stdlib_encoder(indent):
+    if indent:
+        return lambda obj: json.dumps(obj, default=_default, sort_keys=True, ensure_ascii=False,
+                                      indent=2).encode()
+    return lambda obj: json.dumps(obj, default=_default, sort_keys=True, ensure_ascii=False,
+                                  separators=(',', ':')).encode()
+
+
+def _orjson_encoder(indent):
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return lambda obj: orjson.dumps(obj, default=_default, option=option)
+
+
+def _msgspec_encoder(indent):
+    encode = msgspec.json.Encoder(enc_hook=_default, order='sorted').encode
+    if indent:
+        return lambda obj: msgspec.json.format(encode(obj), indent=2)
+    return encode
+
+
+BACKENDS = {'stdlib': _stdlib_encoder}
+if orjson is not None:
+    BACKENDS['orjson'] = _orjson_encoder
+if msgspec is not None:
+    BACKENDS['msgspec'] = _msgspec_encoder
+
+
+def best_backend():
+    for name in ('orjson', 'msgspec'):
+        if name in BACKENDS:
+            return name
+    return 'stdlib'
+
+
+# --- binary formats (Accept negotiation) ----------------------------------------------
+
+class ListFormat(NamedTuple):
+    """ wire format of a response body, and how to frame a list sent in pieces """
+    mimetype: str
+    encode: Callable        # obj -> bytes
+    header: Callable        # (key, count) -> bytes; count is None when streaming
+    separator: bytes        # between encoded items
+    trailer: Callable       # key -> bytes
+    streamable: bool        # False: the header needs the item count up front
+
+
+def _msgpack_format(mimetype):
+    # packb y no un Packer compartido: el buffer de un Packer no es seguro entre hilos
+    encode = functools.partial(msgpack.packb, default=_default, datetime=False)
+
+    def header(key, count):
+        packer = msgpack.Packer(autoreset=True)
+        head = b'' if key is None else packer.pack_map_header(1) + encode(key)
+        return head + packer.pack_array_header(count)
+
+    return ListFormat(mimetype, encode, header, b'', lambda key: b'', streamable=False)
+
+
+def _cbor_format(mimetype):
+    # cbor2 escribiria fechas/decimales/UUID con sus propias etiquetas: mismo texto que en JSON
+    as_json = lambda encoder, value: encoder.encode(_default(value))  # noqa: E731
+    encoders = {datetime: as_json, date: as_json, decimal.Decimal: as_json, uuid.UUID: as_json}
+    encode = lambda obj: cbor2.dumps(obj, encoders=encoders, default=as_json)  # noqa: E731
+
+    def header(key, count):
+        # array de longitud indefinida (0x9f ... 0xff): se puede enviar sin conocer el total
+        return b'\x9f' if key is None else b'\xa1' + encode(key) + b'\x9f'
+
+    return ListFormat(mimetype, encode, header, b'', lambda key: b'\xff', streamable=True)
+
+
+BINARY_FORMATS = {}
+if msgpack is not None:
+    BINARY_FORMATS['application/msgpack'] = _msgpack_format('application/msgpack')
+    BINARY_FORMATS['application/x-msgpack'] = _msgpack_format('application/x-msgpack')
+if cbor2 is not None:
+    BINARY_FORMATS['application/cbor'] = _cbor_format('application/cbor')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """ Flask JSON provider on orjson/msgspec when installed (JSON_BACKEND='auto'),
+        with the stdlib json module as fallback. Output keeps Flask's sorted keys.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        name = app.config.get('JSON_BACKEND', 'auto')
+        if name == 'auto':
+            name = best_backend()
+        if name not in BACKENDS:
+            raise RuntimeError(f"JSON_BACKEND '{name}' is not installed (available: {', '.join(BACKENDS)})")
+        self.backend = name
+        self._encode = BACKENDS[name](indent=False)
+        self._encode_pretty = BACKENDS[name](indent=True)
+        self._decode = orjson.loads if name == 'orjson' else json.loads
+        self.binary_formats = BINARY_FORMATS if app.config.get('BINARY_RESPONSES', True) else {}
+        self.json_format = ListFormat(
+            self.mimetype, self._encode,
+            lambda key, count: b'[' if key is None else b'{' + self._encode(key) + b':[',
+            b',', lambda key: b']\n' if key is None else b']}\n', streamable=True)
+        # JSON primero: es lo que recibe quien acepta */* o no manda Accept
+        self._offered = [self.mimetype, *self.binary_formats]
+
+    def encode(self, obj):
+        """ compact JSON as bytes (what the responses send) """
+        return self._encode(obj)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:  # opciones explicitas de json.dumps: respetarlas
+            kwargs.setdefault('default', _default)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return self._encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return self._decode(s)
+
+    def negotiate(self):
+        """ ListFormat for the current request and whether it was negotiated
+
+            Only /api/ GET (and HEAD) responses are negotiated; everything else,
+            and any client that does not prefer a binary format, gets JSON.
+        """
+        if not (self.binary_formats and has_request_context() and request.method in ('GET', 'HEAD')
+                and request.path.startswith('/api/')):
+            return self.json_format, False
+        mimetype = request.accept_mimetypes.best_match(self._offered, default=self.mimetype)
+        return self.binary_formats.get(mimetype, self.json_format), True
+
+    def response(self, *args, **kwargs):
+        """ like DefaultJSONProvider.response, without the bytes -> str -> bytes round trip,
+            in the binary format the client asked for (see negotiate)
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        fmt, negotiated = self.negotiate()
+        if fmt is not self.json_format:
+            response = self._app.response_class(fmt.encode(obj), mimetype=fmt.mimetype)
+        else:
+            encode = self._encode_pretty if self.compact is False or (self.compact is None and self._app.debug) \
+                else self._encode
+            response = self._app.response_class(encode(obj) + b'\n', mimetype=self.mimetype)
+        if negotiated:
+            response.vary.add('Accept')
+        return response
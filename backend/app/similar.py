@@ -0,0 +1,219 @@
+""" Content-based similar books (GET /api/catalog/books/<id>/similar).
+
+    Each book gets a hashed TF-IDF vector over its title, author, genre and
+    description: words (title words count twice), plus the author and the
+    genre as whole terms, hashed into 2**SIMILAR_HASH_BITS features so no
+    vocabulary is kept. Features present in more than SIMILAR_MAX_DF of the
+    books carry no signal and are dropped. The L2-normalised vectors are stored
+    as an inverted index (BookFeatures, clustered by feature), so the cosine of
+    a block of books against the catalog is one sparse product that SQLite
+    runs as a join over the postings of the block's features. Only features
+    in at most SIMILAR_MAX_POSTINGS books propose candidates (a genre shared by
+    a third of the catalog would pair every book with every other one); the
+    common ones still add to the exact score of each candidate pair. The top
+    SIMILAR_TOP_K of every book are kept in SimilarBooks.
+
+    rebuild_similar() / `flask rebuild-similar` streams the catalog twice
+    (document frequencies, then weights) and scores it in blocks of
+    SIMILAR_BLOCK_SIZE books: memory depends on the block and the hash size,
+    not on the number of books. It keeps the document frequencies of every
+    feature (FeatureFrequencies, the dropped ones too) and the number of books
+    (JobWatermarks): add_book (and update_book, when the text changes) weights
+    the book with those counts plus the book itself, so it drops the same
+    common features a rebuild would, and puts it in the lists it now belongs
+    to. The counts and the weights of the other books catch up with the next
+    rebuild. Those requests hold the write lock, so they re-score at most
+    SIMILAR_MAX_RESCORED of the other lists (the closest books first): with a
+    common author or genre the rest get the new book, or lose a deleted or
+    edited one's entry without a replacement, at the next rebuild.
+"""
+import math
+import re
+import zlib
+from collections import Counter
+from flask import current_app
+from sqlalchemy import and_, delete, func, select
+from . import db
+from .models import Book, BookFeature, FeatureFrequency, JobWatermark, SimilarBook
+
+WORD = re.compile(r'[^\W\d_]{3,}')  # palabras de 3 letras o mas, sin numeros
+STOPWORDS = frozenset('the and for with from that this into its'
+                      ' los las del una por con para que como sus'.split())
+WATERMARK = 'similar_books'  # libros contados por el ultimo rebuild
+
+
+def _settings():
+    config = current_app.config
+    return (config.get('SIMILAR_HASH_BITS', 20), config.get('SIMILAR_TOP_K', 10),
+            config.get('SIMILAR_MAX_DF', 0.5), config.get('SIMILAR_BLOCK_SIZE', 500),
+            config.get('SIMILAR_MAX_POSTINGS', 1000))
+
+
+def terms(book):
+    """ raw term counts of a book (any object with title/author/genre/description) """
+    counts = Counter()
+    for text, weight in ((book.title, 2), (book.description, 1)):
+        for word in WORD.findall((text or '').lower()):
+            if word not in STOPWORDS:
+                counts[word] += weight
+    if book.author:
+        counts['author:' + ' '.join(book.author.lower().split())] += 1
+    if book.genre:
+        counts['genre:' + book.genre.lower()] += 1
+    return counts
+
+
+def hashed_tf(book, bits):
+    """ {feature: 1 + log(tf)} with the terms hashed into 2**bits features """
+    mask = (1 << bits) - 1
+    tf = Counter()
+    for term, count in terms(book).items():
+        tf[zlib.crc32(term.encode()) & mask] += count
+    return {feature: 1.0 + math.log(count) for feature, count in tf.items()}
+
+
+def tfidf(tf, df, n, max_df):
+    """ L2-normalised tf-idf of one book, without the features in more than max_df of the n books """
+    weights = {feature: value * (math.log((1 + n) / (1 + df[feature])) + 1.0)
+               for feature, value in tf.items() if df[feature] <= max_df * n}
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {feature: w / norm for feature, w in weights.items()} if norm else {}
+
+
+def _scores(book_ids, max_postings):
+    """ cosine of each book in book_ids with its candidates, the books sharing one of its features
+        that are in at most max_postings books (the common ones add to the score, propose no one) """
+    a, b, p = (BookFeature.__table__.alias(name) for name in ('a', 'b', 'p'))
+    common = select(p.c.book_id).where(p.c.feature == a.c.feature).limit(1).offset(max_postings).exists()
+    candidates = select(a.c.book_id, b.c.book_id.label('other_id')).distinct() \
+        .select_from(a.join(b, and_(b.c.feature == a.c.feature, b.c.book_id != a.c.book_id))) \
+        .where(a.c.book_id.in_(book_ids), ~common).subquery('candidates')
+    # producto disperso exacto de cada par candidato: un acceso por clave a cada termino del libro
+    x, y = BookFeature.__table__.alias('x'), BookFeature.__table__.alias('y')
+    return select(candidates.c.book_id, candidates.c.other_id, func.sum(x.c.weight * y.c.weight).label('score')) \
+        .select_from(candidates.join(x, x.c.book_id == candidates.c.book_id)
+                     .join(y, and_(y.c.feature == x.c.feature, y.c.book_id == candidates.c.other_id))) \
+        .group_by(candidates.c.book_id, candidates.c.other_id)
+
+
+def _store_top_k(book_ids, k, max_postings):
+    similar = SimilarBook.__table__
+    scored = _scores(book_ids, max_postings).subquery()
+    rank = func.row_number().over(partition_by=scored.c.book_id,
+                                  order_by=(scored.c.score.desc(), scored.c.other_id))
+    ranked = select(scored.c.book_id, rank.label('rank'), scored.c.other_id, scored.c.score).subquery()
+    db.session.execute(delete(similar).where(similar.c.book_id.in_(book_ids)))
+    db.session.execute(similar.insert().from_select(
+        ['book_id', 'rank', 'other_id', 'score'], select(ranked).where(ranked.c.rank <= k)))
+
+
+def _watermark():
+    mark = db.session.get(JobWatermark, WATERMARK)
+    if mark is None:
+        mark = JobWatermark(name=WATERMARK, position=0)
+        db.session.add(mark)
+    return mark
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _book_blocks(size):
+    """ the catalog's text columns, size books at a time (keyset on id) """
+    books = Book.__table__
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(books.c.id, books.c.title, books.c.author, books.c.genre, books.c.description)
+            .where(books.c.id > last_id).order_by(books.c.id).limit(size)).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def rebuild_similar():
+    """ recompute BookFeatures and SimilarBooks for the whole catalog; returns the books indexed """
+    bits, k, max_df, block, max_postings = _settings()
+    features, frequencies = BookFeature.__table__, FeatureFrequency.__table__
+    db.session.execute(delete(SimilarBook.__table__))
+    db.session.execute(delete(features))
+    db.session.execute(delete(frequencies))
+
+    df, n = Counter(), 0
+    for rows in _book_blocks(block):
+        for row in rows:
+            df.update(hashed_tf(row, bits).keys())
+        n += len(rows)
+    for chunk in _chunks(sorted(df.items()), 5000):
+        db.session.execute(frequencies.insert(), [{'feature': feature, 'books': books} for feature, books in chunk])
+    _watermark().position = n
+    for rows in _book_blocks(block):
+        entries = [{'feature': feature, 'book_id': row.id, 'weight': weight}
+                   for row in rows for feature, weight in tfidf(hashed_tf(row, bits), df, n, max_df).items()]
+        if entries:
+            db.session.execute(features.insert(), entries)
+    db.session.commit()
+
+    # un bloque de libros por transaccion: el resto de escrituras no espera a todo el catalogo
+    for rows in _book_blocks(block):
+        _store_top_k([row.id for row in rows], k, max_postings)
+        db.session.commit()
+    return n
+
+
+def index_book(book):
+    """ (re)index a flushed book: its features, its list and the lists it now belongs to """
+    bits, k, max_df, _, max_postings = _settings()
+    features, frequencies, similar = BookFeature.__table__, FeatureFrequency.__table__, SimilarBook.__table__
+    forget_similar(book.id)  # lo que dejo un indice anterior (libro editado)
+    tf = hashed_tf(book, bits)
+    # frecuencias del ultimo rebuild mas este libro: las comunes se descartan igual que en el rebuild
+    df = Counter(dict(db.session.execute(
+        select(frequencies.c.feature, frequencies.c.books).where(frequencies.c.feature.in_(tf))).all()))
+    df.update(tf.keys())
+    weights = tfidf(tf, df, _watermark().position + 1, max_df)
+    if not weights:
+        return
+    db.session.execute(features.insert(), [{'feature': feature, 'book_id': book.id, 'weight': weight}
+                                           for feature, weight in weights.items()])
+    _store_top_k([book.id], k, max_postings)
+
+    # entra en la lista de cada libro al que supera (o que aun no tiene k vecinos)
+    scores = {row.other_id: row.score for row in db.session.execute(_scores([book.id], max_postings))}
+    lists = {}
+    for chunk in _chunks(scores):
+        lists.update((row.book_id, (row.size, row.lowest)) for row in db.session.execute(
+            select(similar.c.book_id, func.count().label('size'), func.min(similar.c.score).label('lowest'))
+            .where(similar.c.book_id.in_(chunk)).group_by(similar.c.book_id)))
+    beaten = [other for other, score in scores.items()
+              if other not in lists or lists[other][0] < k or score > lists[other][1]]
+    for chunk in _chunks(_most_similar(beaten, scores)):
+        _store_top_k(chunk, k, max_postings)
+
+
+def _most_similar(book_ids, scores):
+    """ the SIMILAR_MAX_RESCORED of book_ids closest to the book being (re)indexed or deleted """
+    limit = current_app.config.get('SIMILAR_MAX_RESCORED', 100)
+    return sorted(book_ids, key=lambda book_id: (-scores[book_id], book_id))[:limit]
+
+
+def forget_similar(book_id):
+    """ drop a book from the index and from every list; the closest of those lists are refilled """
+    _, k, _, _, max_postings = _settings()
+    features, similar = BookFeature.__table__, SimilarBook.__table__
+    scores = {row.other_id: row.score for row in db.session.execute(_scores([book_id], max_postings))}
+    listed = []
+    for chunk in _chunks(scores):
+        listed += db.session.execute(select(similar.c.book_id).where(
+            similar.c.book_id.in_(chunk), similar.c.other_id == book_id)).scalars().all()
+    owned = db.session.execute(select(features.c.feature).where(features.c.book_id == book_id)).scalars().all()
+    db.session.execute(delete(features).where(features.c.feature.in_(owned), features.c.book_id == book_id))
+    db.session.execute(delete(similar).where(similar.c.book_id == book_id))
+    for chunk in _chunks(listed):
+        db.session.execute(delete(similar).where(similar.c.book_id.in_(chunk), similar.c.other_id == book_id))
+    for chunk in _chunks(_most_similar(listed, scores)):
+        _store_top_k(chunk, k, max_postings)
@@ -0,0 +1,159 @@
+""" Live book availability for Server-Sent Events (ASGI mode, see app/asgi.py).
+
+    Writes publish after commit: a session hook records the Books whose
+    available/total copies changed in each flush and hands them to the hub when
+    the transaction commits (nothing is sent for rolled-back writes), whichever
+    route made the change (reserve, return, update_book, ...).
+
+    The hub lives on the ASGI event loop. Subscribers are plain objects with a
+    dict of pending books and an asyncio.Event, served by two coroutines, not
+    threads: an idle connection costs about 6 KB (5000 in ~30 MB). Publishes
+    from worker threads are merged into one pending dict and fanned out once per
+    SSE_COALESCE_MS, so a burst of reservations of one book becomes a single
+    event with its last value.
+    Each subscriber also coalesces per book until its connection takes the
+    changes; one that falls more than SSE_MAX_PENDING books behind (or whose
+    socket does not accept a write within SSE_SEND_TIMEOUT) is dropped with a
+    reset event, and the browser reconnects and reloads the list.
+"""
+import asyncio
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+HUB_KEY = 'availability_hub'
+_SESSION_KEY = 'availability_changes'
+
+
+class Subscriber:
+    __slots__ = ('pending', 'wakeup', 'dropped', 'closed')
+
+    def __init__(self):
+        self.pending = {}
+        self.wakeup = asyncio.Event()
+        self.dropped = False
+        self.closed = False
+
+    def take(self):
+        """ pending changes ({book_id: (available, total)}), None once dropped """
+        self.wakeup.clear()
+        if self.dropped:
+            return None
+        changes, self.pending = self.pending, {}
+        return changes
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+
+
+class AvailabilityHub:
+    """ Fan-out of availability changes to SSE subscribers (see module docstring) """
+
+    def __init__(self, coalesce_ms=250, max_pending=1000, max_subscribers=10000):
+        self.coalesce = coalesce_ms / 1000.0
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self.stats = {'published': 0, 'events': 0, 'dropped': 0}
+        self._subscribers = set()
+        self._loop = None
+        self._pending = {}
+        self._flush_scheduled = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    # --- event loop side ----------------------------------------------------------
+
+    def subscribe(self):
+        """ new Subscriber, or None when the hub is full (call on the event loop) """
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    def close(self):
+        """ end every subscription (server shutdown) """
+        for subscriber in list(self._subscribers):
+            subscriber.close()
+
+    def _flush(self):
+        with self._lock:
+            changes, self._pending = self._pending, {}
+            self._flush_scheduled = False
+        for subscriber in list(self._subscribers):
+            if subscriber.dropped:
+                continue
+            subscriber.pending.update(changes)
+            if len(subscriber.pending) > self.max_pending:
+                # demasiado atrasado: se desconecta en vez de acumular sin limite
+                subscriber.dropped = True
+                self.stats['dropped'] += 1
+            subscriber.wakeup.set()
+        self.stats['events'] += 1
+
+    # --- any thread ---------------------------------------------------------------
+
+    def publish(self, changes):
+        """ queue {book_id: (available, total)} for the next fan-out (thread-safe) """
+        loop = self._loop
+        if not changes or loop is None or not self._subscribers or loop.is_closed():
+            return
+        with self._lock:
+            self._pending.update(changes)
+            self.stats['published'] += len(changes)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        loop.call_soon_threadsafe(loop.call_later, self.coalesce, self._flush)
+
+
+# --- session hooks -----------------------------------------------------------------
+
+def _collect_changes(session, flush_context):
+    from ..models import Book
+    for obj in list(session.new) + list(session.dirty):
+        if type(obj) is Book:
+            attrs = inspect(obj).attrs
+            if obj in session.new or attrs.available_copies.history.has_changes() or \
+                    attrs.total_copies.history.has_changes():
+                session.info.setdefault(_SESSION_KEY, {})[obj.id] = (obj.available_copies, obj.total_copies)
+
+
+def note_availability(session, changes):
+    """ record {book_id: (available, total)} changed by a Core UPDATE (no flush hook) """
+    session.info.setdefault(_SESSION_KEY, {}).update(changes)
+
+
+def _publish_committed(session):
+    changes = session.info.pop(_SESSION_KEY, None)
+    if changes and has_app_context():
+        hub = current_app.extensions.get(HUB_KEY)
+        if hub is not None:
+            hub.publish(changes)
+
+
+def _discard_changes(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+def init_availability(app):
+    """ Create the app's hub and register the session hooks once per process """
+    hub = AvailabilityHub(
+        coalesce_ms=app.config.get('SSE_COALESCE_MS', 250),
+        max_pending=app.config.get('SSE_MAX_PENDING', 1000),
+        max_subscribers=app.config.get('SSE_MAX_SUBSCRIBERS', 10000),
+    )
+    app.extensions[HUB_KEY] = hub
+    if not event.contains(Session, 'after_flush', _collect_changes):
+        event.listen(Session, 'after_flush', _collect_changes)
+        event.listen(Session, 'after_commit', _publish_committed)
+        event.listen(Session, 'after_rollback', _discard_changes)
+    return hub
@@ -0,0 +1,178 @@
+""" Response compression (COMPRESSION_ENABLED): brotli when installed, gzip otherwise.
+
+    Only responses whose type is in COMPRESSION_MIMETYPES and whose body is at
+    least COMPRESSION_MIN_SIZE bytes are compressed; streamed bodies are
+    compressed chunk by chunk (flushed after each one so the client still
+    receives them as they are produced). Buffered bodies are kept in a small
+    LRU keyed by a digest of the uncompressed body, which works as its version:
+    an unchanged response is hashed (~1 ms/MB) but never compressed again, and
+    any change to the data gives a new key. Only shared bodies go in the
+    cache: anonymous GETs, or responses marked cacheable (ETag, public
+    Cache-Control). Per-user responses (/myLoans, /holds, ...) would only
+    evict the ones it exists for.
+
+    Streamed bodies never go in the cache: the point of streaming is not to
+    hold the whole body in memory, and buffering it to hash it would undo
+    that. With STREAM_LIST_RESPONSES the lists longer than STREAM_YIELD_PER
+    (a large catalog page) are compressed on every request; the cache serves
+    the smaller, buffered ones (book details, short or filtered lists).
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 16+15: cabecera gzip
+
+    def compress(self, data):
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+class CompressedCache:
+    """ LRU of compressed bodies, bounded by their total size in bytes """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Compressor:
+    """ Encodings offered to clients and the compressed-body cache """
+
+    def __init__(self, config):
+        self.min_size = config.get('COMPRESSION_MIN_SIZE', 1024)
+        self.mimetypes = frozenset(config.get('COMPRESSION_MIMETYPES', ()))
+        self.levels = {'gzip': config.get('COMPRESSION_GZIP_LEVEL', 6)}
+        if brotli is not None:
+            self.levels['br'] = config.get('COMPRESSION_BROTLI_QUALITY', 4)
+        self.offered = [name for name in ('br', 'gzip') if name in self.levels]
+        self.cache = CompressedCache(config.get('COMPRESSION_CACHE_BYTES', 32 * 1024 * 1024))
+
+    def compressor(self, encoding):
+        return (_Brotli if encoding == 'br' else _Gzip)(self.levels[encoding])
+
+    def _compress(self, encoding, body):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.levels['br'])
+        return zlib.compress(body, self.levels['gzip'], wbits=31)
+
+    def compress(self, encoding, body, cache=True):
+        if not cache:
+            return self._compress(encoding, body)
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = self._compress(encoding, body)
+            self.cache.put(key, compressed)
+        return compressed
+
+    @staticmethod
+    def shared(response):
+        """ is the body the same for every client (worth keeping in the cache)? """
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if response.headers.get('ETag') or response.cache_control.public:
+            return True
+        return 'Authorization' not in request.headers
+
+    def wants(self, response):
+        """ encoding to use for this response, or None to send it as is """
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or response.mimetype not in self.mimetypes):
+            return None
+        if not response.is_streamed and response.content_length < self.min_size:
+            return None
+        return request.accept_encodings.best_match(self.offered)
+
+
+def _compress_stream(chunks, compressor):
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def init_compression(app):
+    """ Register the after_request hook that compresses responses """
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return None
+
+    compression = Compressor(app.config)
+    app.extensions['compression'] = compression
+
+    @app.after_request
+    def _compress_response(response):
+        # el cuerpo depende de Accept-Encoding aunque esta respuesta no se comprima
+        if response.mimetype in compression.mimetypes:
+            response.vary.add('Accept-Encoding')
+        encoding = compression.wants(response)
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, compression.compressor(encoding))
+        else:
+            body = response.get_data()
+            response.set_data(compression.compress(encoding, body, cache=compression.shared(response)))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return compression
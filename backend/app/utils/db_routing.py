@@ -0,0 +1,92 @@
+import os
+from flask import g, request, current_app, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+from .sqlite_tuning import is_sqlite_file
+
+READ_BIND = 'readonly'
+READ_METHODS = ('GET', 'HEAD')
+
+
+def readonly_uri_for(uri, instance_path):
+    """ Build a mode=ro URI for the same SQLite file as the primary database """
+    url = make_url(uri)
+    path = url.database
+    if path.startswith('file:'):
+        path = path[5:]
+    if not os.path.isabs(path):
+        path = os.path.join(instance_path, path)
+    return f'sqlite:///file:{path}?mode=ro&uri=true'
+
+
+def configure_read_bind(app):
+    """ Add the read-only engine to SQLALCHEMY_BINDS.
+
+        Uses SQLALCHEMY_READONLY_URI when set (e.g. a replica file), otherwise opens
+        the primary SQLite file again with mode=ro. In-memory databases have no
+        second connection to route to, so routing stays off for them.
+    """
+    if not app.config.get('READ_REPLICA_ENABLED'):
+        return
+
+    uri = app.config.get('SQLALCHEMY_READONLY_URI')
+    if not uri:
+        primary = app.config.get('SQLALCHEMY_DATABASE_URI')
+        if not primary or not is_sqlite_file(primary):
+            return
+        uri = readonly_uri_for(primary, app.instance_path)
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds.setdefault(READ_BIND, uri)
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def _use_read_bind():
+    return has_app_context() and g.get('db_bind') == READ_BIND
+
+
+class RoutingSession(Session):
+    """ Session that sends queries to the read-only engine while the current request
+        is flagged for it. Flushes always go to the primary engine.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _use_read_bind():
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(fn):
+    """ Route a view's queries to the read-only engine regardless of HTTP method """
+    fn._db_bind = READ_BIND
+    return fn
+
+
+def use_primary(fn):
+    """ Keep a view on the primary engine (writes and read-your-writes paths) """
+    fn._db_bind = None
+    return fn
+
+
+def init_db_routing(app, db):
+    """ Flag each request with the engine its queries should use.
+
+        Views marked with @read_only / @use_primary win; otherwise GET/HEAD requests
+        to the blueprints listed in READ_ROUTED_BLUEPRINTS use the read-only engine.
+    """
+    # el bind de lectura no tiene tablas propias; sin su metadata create_all/drop_all
+    # no intentan usarlo (la metadata es global al objeto db, compartida entre apps)
+    metadata = db.metadatas.get(READ_BIND)
+    if metadata is not None and not metadata.tables:
+        del db.metadatas[READ_BIND]
+
+    @app.before_request
+    def _select_db_bind():
+        view = current_app.view_functions.get(request.endpoint)
+        if hasattr(view, '_db_bind'):
+            g.db_bind = view._db_bind
+        elif request.method in READ_METHODS and \
+                request.blueprint in current_app.config.get('READ_ROUTED_BLUEPRINTS', ()):
+            g.db_bind = READ_BIND
@@ -1,72 +1,135 @@
-import requests 
+import os
+
+# base de la API de OpenLibrary (se puede apuntar a un mock para pruebas de carga)
+OPENLIBRARY_URL = os.environ.get('OPENLIBRARY_URL', 'https://openlibrary.org')
+
+def normalize_isbn(isbn):
+    """ ISBN without hyphens or spaces (978-0-14-143951-8 -> 9780141439518) """
+    # dos replace() encadenados son ~5x mas rapidos que str.translate (benchmark_micro.py)
+    return isbn.replace('-', '').replace(' ', '')
+
+def _book_info(data, clean_isbn):
+    """ Build title/description/cover from an OpenLibrary edition record """
+    book_info = {
+        'title': data.get('title'),
+        'description': None,
+        'cover_url': None,
+        'author': None
+    }
+
+    if 'description' in data:
+        if isinstance(data['description'], dict):
+            book_info['description'] = data['description'].get('value', '')
+        else:
+            book_info['description'] = data['description']
+
+    # Try to get cover URL - try multiple approaches
+    if 'covers' in data and data['covers']:
+        cover_id = data['covers'][0]
+        book_info['cover_url'] = f'https://covers.openlibrary.org/b/id/{cover_id}-L.jpg'
+
+    # Always also try ISBN-based cover as fallback (might work even if covers array is empty)
+    if not book_info['cover_url']:
+        book_info['cover_url'] = f'https://covers.openlibrary.org/b/isbn/{clean_isbn}-L.jpg'
+    return book_info
 
 def fetch_book_by_isbn(isbn):
-    """ Fetch book details from an openLibrary API using ISBN 
+    """ Fetch book details from an openLibrary API using ISBN
         returns with title, author, cover_url
     """
+    # import diferido: requests tarda ~70 ms en cargar y solo lo usan las rutas de admin
+    import requests
+
     try:
-        clean_isbn = isbn.replace('-', '').replace(' ', '')
-        url = f'https://openlibrary.org/isbn/{clean_isbn}.json'
+        clean_isbn = normalize_isbn(isbn)
+        url = f'{OPENLIBRARY_URL}/isbn/{clean_isbn}.json'
         response = requests.get(url, timeout=15)
 
         if response.status_code != 200:
             print(f"OpenLibrary API error: {response.status_code}")
             return None
-        
-        data = response.json()
 
-        book_info = {
-            'title': data.get('title'),
-            'description': None,
-            'cover_url': None,
-            'author': None
-        }
-
-        if 'description' in data:
-            if isinstance(data['description'], dict):
-                book_info['description'] = data['description'].get('value', '')
-            else:
-                book_info['description'] = data['description']
-        
-        # Try to get cover URL - try multiple approaches
-        if 'covers' in data and data['covers']:
-            cover_id = data['covers'][0]
-            book_info['cover_url'] = f'https://covers.openlibrary.org/b/id/{cover_id}-L.jpg'
-        
-        # Always also try ISBN-based cover as fallback (might work even if covers array is empty)
-        if not book_info['cover_url']:
-            book_info['cover_url'] = f'https://covers.openlibrary.org/b/isbn/{clean_isbn}-L.jpg'
+        data = response.json()
+        book_info = _book_info(data, clean_isbn)
 
         if 'authors' in data and data['authors']:
             author_key = data['authors'][0].get('key', '')
             if author_key:
-                author_url = f'https://openlibrary.org{author_key}.json'
+                author_url = f'{OPENLIBRARY_URL}{author_key}.json'
                 author_response = requests.get(author_url, timeout=15)
                 if author_response.status_code == 200:
                     author_data = author_response.json()
                     book_info['author'] = author_data.get('name', 'Unknown Author')
-        
+
         # Fallback if author not found
         if not book_info['author'] and 'works' in data and data['works']:
             work_key = data['works'][0].get('key', '')
             if work_key:
-                work_url = f'https://openlibrary.org{work_key}.json'
+                work_url = f'{OPENLIBRARY_URL}{work_key}.json'
                 work_response = requests.get(work_url, timeout=15)
                 if work_response.status_code == 200:
                     work_data = work_response.json()
                     if 'authors' in work_data and work_data['authors']:
                         author_key = work_data['authors'][0].get('author', {}).get('key', '')
                         if author_key:
-                            author_url = f'https://openlibrary.org{author_key}.json'
+                            author_url = f'{OPENLIBRARY_URL}{author_key}.json'
                             author_response = requests.get(author_url, timeout=15)
                             if author_response.status_code == 200:
                                 author_data = author_response.json()
                                 book_info['author'] = author_data.get('name', 'Unknown Author')
         return book_info
-    
+
     except requests.exceptions.RequestException as e:
         print(f"Error fetching book from OpenLibrary: {e}")
         return None
     except Exception as e:
         print(f"Unexpected error in fetch_book_by_isbn: {e}")
-        return None
\ No newline at end of file
+        return None
+
+async def fetch_book_by_isbn_async(isbn, client):
+    """ Same lookup as fetch_book_by_isbn on an httpx.AsyncClient, so waiting on
+        OpenLibrary does not hold a thread (used by the ASGI mode, see app/asgi.py)
+    """
+    import httpx
+
+    try:
+        clean_isbn = normalize_isbn(isbn)
+        response = await client.get(f'{OPENLIBRARY_URL}/isbn/{clean_isbn}.json', timeout=15)
+
+        if response.status_code != 200:
+            print(f"OpenLibrary API error: {response.status_code}")
+            return None
+
+        data = response.json()
+        book_info = _book_info(data, clean_isbn)
+
+        async def author_name(author_key):
+            author_response = await client.get(f'{OPENLIBRARY_URL}{author_key}.json', timeout=15)
+            if author_response.status_code == 200:
+                return author_response.json().get('name', 'Unknown Author')
+            return None
+
+        if 'authors' in data and data['authors']:
+            author_key = data['authors'][0].get('key', '')
+            if author_key:
+                book_info['author'] = await author_name(author_key)
+
+        # Fallback if author not found
+        if not book_info['author'] and 'works' in data and data['works']:
+            work_key = data['works'][0].get('key', '')
+            if work_key:
+                work_response = await client.get(f'{OPENLIBRARY_URL}{work_key}.json', timeout=15)
+                if work_response.status_code == 200:
+                    work_data = work_response.json()
+                    if 'authors' in work_data and work_data['authors']:
+                        author_key = work_data['authors'][0].get('author', {}).get('key', '')
+                        if author_key:
+                            book_info['author'] = await author_name(author_key)
+        return book_info
+
+    except httpx.HTTPError as e:
+        print(f"Error fetching book from OpenLibrary: {e}")
+        return None
+    except Exception as e:
+        print(f"Unexpected error in fetch_book_by_isbn_async: {e}")
+        return None
@@ -0,0 +1,147 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from flask import current_app
+
+
+class GroupCommitWriter:
+    """ Single writer thread that commits queued write operations in micro-batches.
+
+        Each operation is a callable run inside the writer's app context against
+        db.session; it must not commit. Operations are collected until the batch
+        reaches ``max_batch`` items or ``max_delay`` seconds have passed since the
+        first one arrived, then committed together. Futures resolve only after the
+        commit, so callers never answer before their write is durable.
+    """
+
+    def __init__(self, app, db, max_batch=64, max_delay=0.005):
+        self.app = app
+        self.db = db
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats = {'batches': 0, 'operations': 0, 'fallbacks': 0}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, operation):
+        """ Queue an operation and return a Future with its result """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((operation, future))
+        return future
+
+    def run(self, operation, timeout=None):
+        """ Submit an operation and block until its batch has been committed """
+        return self.submit(operation).result(timeout=timeout)
+
+    def stop(self, timeout=5):
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+        self._thread = None
+
+    def _ensure_started(self):
+        # el hilo se crea en el primer uso (y de nuevo tras un fork del servidor)
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop, name='group-commit', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+            if stop:
+                return
+
+    def _commit_batch(self, batch):
+        with self.app.app_context():
+            session = self.db.session
+            results = []
+            try:
+                for operation, _ in batch:
+                    results.append(operation())
+                session.commit()
+            except Exception:
+                session.rollback()
+                self.stats['fallbacks'] += 1
+                self._commit_individually(batch)
+                return
+            finally:
+                self.stats['batches'] += 1
+                self.stats['operations'] += len(batch)
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _commit_individually(self, batch):
+        """ A failing operation must not fail its neighbours: retry one by one """
+        session = self.db.session
+        for operation, future in batch:
+            try:
+                result = operation()
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+def init_group_commit(app, db):
+    """ Attach a GroupCommitWriter to the app when GROUP_COMMIT_ENABLED is set """
+    if not app.config.get('GROUP_COMMIT_ENABLED'):
+        return None
+    writer = GroupCommitWriter(
+        app, db,
+        max_batch=app.config.get('GROUP_COMMIT_MAX_BATCH', 64),
+        max_delay=app.config.get('GROUP_COMMIT_MAX_DELAY_MS', 5) / 1000.0
+    )
+    app.extensions['group_commit'] = writer
+    return writer
+
+
+def run_write(operation):
+    """ Run a write operation and commit it.
+
+        Goes through the group-commit writer when it is enabled; otherwise runs
+        inline on the request session and commits immediately.
+    """
+    writer = current_app.extensions.get('group_commit')
+    if writer is not None:
+        return writer.run(operation, timeout=current_app.config.get('GROUP_COMMIT_TIMEOUT', 30))
+
+    session = current_app.extensions['sqlalchemy'].session
+    try:
+        result = operation()
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return result
@@ -0,0 +1,80 @@
+""" Schema upgrade at startup (AUTO_CREATE_DB, development).
+
+    db.create_all() only creates the tables that are missing: a database made
+    by an older version of the models keeps its tables without the columns
+    and indexes added since (Books.next_return_at, ...) and the first query
+    that reads them fails. The startup runs the Alembic migrations up to head
+    instead, the same path as `flask db upgrade` in production, so existing
+    databases also get new columns, table rebuilds and the migrations'
+    backfills.
+
+    Importing alembic costs more than the rest of the startup, so the usual
+    case, a database already at head, is checked without it: the revision is
+    read with one query and compared with the head found by reading the
+    revision identifiers of migrations/versions. Only when they differ (or
+    the history has several heads) alembic runs the upgrade, through
+    alembic.command on this connection (migrations/env.py uses it instead of
+    the Flask-Migrate extension). A database created by create_all before
+    the migrations existed (the checked-in app.db: Users, Books and Loans
+    without a revision) is stamped at the initial revision first.
+"""
+import os
+import re
+from sqlalchemy import inspect, text
+
+INITIAL_REVISION = 'e0d06540082c'
+INITIAL_TABLES = {'Users', 'Books', 'Loans'}
+VERSION_TABLE = 'alembic_version'
+REVISION_LINE = re.compile(r"^(down_revision|revision) = (.+)$", re.MULTILINE)
+REVISION_ID = re.compile(r"'(\w+)'")
+
+
+def migrations_directory(app):
+    return os.path.join(os.path.dirname(app.root_path), 'migrations')
+
+
+def head_revision(app):
+    """ the head of migrations/versions without importing alembic; None if there is not exactly one """
+    versions = os.path.join(migrations_directory(app), 'versions')
+    revisions, parents = set(), set()
+    for name in os.listdir(versions):
+        if not name.endswith('.py'):
+            continue
+        with open(os.path.join(versions, name), encoding='utf-8') as script:
+            for field, value in REVISION_LINE.findall(script.read()):
+                (revisions if field == 'revision' else parents).update(REVISION_ID.findall(value))
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+def current_revision(connection):
+    """ (revision, tables) of the database; revision is None when it was never stamped """
+    tables = set(inspect(connection).get_table_names())
+    revision = None
+    if VERSION_TABLE in tables:
+        revision = connection.execute(text(f'SELECT version_num FROM {VERSION_TABLE}')).scalar()
+    return revision, tables - {VERSION_TABLE}
+
+
+def upgrade_schema(app, db):
+    """ run the pending migrations on the default engine """
+    with db.engine.connect() as connection:
+        revision, tables = current_revision(connection)
+        if revision is not None and revision == head_revision(app):
+            return
+        if revision is None and tables - INITIAL_TABLES:
+            # tablas de un create_all posterior a las migraciones: no se sabe en que revision esta
+            raise RuntimeError(
+                f'{db.engine.url.database}: tables {sorted(tables)} without a migration revision; '
+                'recreate the database or mark its revision with `flask db stamp <revision>`')
+
+        from alembic import command
+        from alembic.config import Config
+
+        config = Config()
+        config.set_main_option('script_location', migrations_directory(app))
+        config.attributes['connection'] = connection
+        if revision is None and tables:
+            command.stamp(config, INITIAL_REVISION)
+        command.upgrade(config, 'head')
+        connection.commit()
@@ -0,0 +1,83 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# orden en el que se aplican los pragmas: busy_timeout primero para que el cambio
+# a WAL espere en lugar de fallar si otra conexion tiene la base bloqueada
+PRAGMA_ORDER = (
+    'busy_timeout',
+    'journal_mode',
+    'synchronous',
+    'foreign_keys',
+    'cache_size',
+    'mmap_size',
+    'temp_store',
+    'query_only',
+)
+
+# pragmas que escriben en el archivo y no se pueden aplicar a conexiones de solo lectura
+WRITE_PRAGMAS = {'journal_mode'}
+
+
+def is_sqlite_file(uri):
+    """ True when the URI points to an on-disk SQLite database (not :memory:) """
+    url = make_url(uri)
+    if not url.drivername.startswith('sqlite'):
+        return False
+    database = url.database or ''
+    return database not in ('', ':memory:') and 'mode=memory' not in str(url)
+
+
+def is_read_only_uri(uri):
+    """ True for SQLite URIs opened with mode=ro """
+    return make_url(uri).query.get('mode') == 'ro'
+
+
+def build_engine_options(config):
+    """ Merge the pool profile into SQLALCHEMY_ENGINE_OPTIONS for file databases.
+
+        In-memory databases use StaticPool (set by Flask-SQLAlchemy), which does not
+        accept pool sizing arguments, so the profile is only applied to files.
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    if uri and is_sqlite_file(uri):
+        for key, value in (config.get('SQLITE_POOL_OPTIONS') or {}).items():
+            if key == 'connect_args':
+                connect_args = dict(value)
+                connect_args.update(options.get('connect_args') or {})
+                options['connect_args'] = connect_args
+            else:
+                options.setdefault(key, value)
+    return options
+
+
+def _pragma_statements(pragmas, read_only=False):
+    ordered = [name for name in PRAGMA_ORDER if name in pragmas]
+    ordered += [name for name in pragmas if name not in PRAGMA_ORDER]
+    statements = []
+    for name in ordered:
+        if read_only and name in WRITE_PRAGMAS:
+            continue
+        statements.append(f'PRAGMA {name}={pragmas[name]}')
+    return statements
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """ Register a connect listener that runs the pragma profile on every new
+        DBAPI connection of a SQLite engine. Returns the statements applied.
+    """
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return []
+
+    statements = _pragma_statements(pragmas, read_only=is_read_only_uri(engine.url))
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    return statements
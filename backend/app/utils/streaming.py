@@ -0,0 +1,75 @@
+""" Streaming list responses (STREAM_LIST_RESPONSES).
+
+    Rows come from the database in yield_per batches and each batch is encoded
+    and sent before the next one is fetched, so a list endpoint never holds the
+    whole table, the list of dicts or the full JSON document in memory. Rows are
+    read in a session of their own, since the request's session is removed at
+    teardown before the body is sent. Its identity map is weak, so clean instances go away with each batch;
+    instances the encoder modified (Loan.calculate_fine) are expunged after every
+    batch so they are not kept alive until the end of the request.
+    The body is JSON or the binary format negotiated by the JSON provider; CBOR
+    streams the same way (indefinite-length array), MessagePack needs the item
+    count in its array header, so its encoded items are collected and sent at
+    the end (still without keeping the rows or the dicts).
+"""
+from itertools import islice
+from flask import current_app, stream_with_context
+from .. import db
+
+
+def stream_list(query, encode, key=None):
+    """ Response with the query rows as an array, or {key: [...]} when key is given.
+
+        The first batch is fetched before anything is sent, so SQL errors still
+        produce a normal error response (and the query runs inside the view);
+        results that fit in that batch are sent as a plain response.
+    """
+    app = current_app._get_current_object()
+    fmt, negotiated = app.json.negotiate()
+    dumps = fmt.encode
+    batch_size = app.config.get('STREAM_YIELD_PER', 1000)
+
+    # sesion propia: la de la peticion se cierra (teardown) antes de enviar el cuerpo
+    session = db.session.session_factory()
+
+    def next_batch():
+        for obj in list(session.dirty):
+            session.expunge(obj)
+        return [dumps(encode(row)) for row in islice(rows, batch_size)]
+
+    try:
+        # la consulta y el primer lote se ejecutan aqui, dentro de la vista
+        rows = iter(query.with_session(session).yield_per(batch_size))
+        pieces = [dumps(encode(row)) for row in islice(rows, batch_size)]
+        if len(pieces) >= batch_size and not fmt.streamable:
+            # el formato necesita el total antes del primer elemento: se juntan los elementos ya codificados
+            while len(pieces) % batch_size == 0:
+                batch = next_batch()
+                if not batch:
+                    break
+                pieces += batch
+    except Exception:
+        session.close()
+        raise
+    if len(pieces) < batch_size or not fmt.streamable:
+        # cabe en un lote: respuesta normal (con Content-Length), no hace falta streaming
+        session.close()
+        response = app.response_class(fmt.header(key, len(pieces)) + fmt.separator.join(pieces) + fmt.trailer(key),
+                                      mimetype=fmt.mimetype)
+    else:
+        def generate():
+            try:
+                batch = pieces
+                chunk_prefix = fmt.header(key, None)
+                while len(batch) >= batch_size:
+                    yield chunk_prefix + fmt.separator.join(batch)
+                    chunk_prefix = fmt.separator
+                    batch = next_batch()
+                yield (chunk_prefix + fmt.separator.join(batch) if batch else b'') + fmt.trailer(key)
+            finally:
+                session.close()
+
+        response = app.response_class(stream_with_context(generate()), mimetype=fmt.mimetype)
+    if negotiated:
+        response.vary.add('Accept')
+    return response
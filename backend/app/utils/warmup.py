@@ -0,0 +1,56 @@
+""" Optional warmup before taking traffic (STARTUP_WARMUP).
+
+    Fills each engine's pool (every new connection runs the SQLite PRAGMAs),
+    configures the mappers and runs the hot per-request statements once with
+    parameters that match no rows, so SQLAlchemy's compiled-statement cache and
+    sqlite3's per-connection statement cache are warm for the first requests.
+    Full scans (catalog list, search, counts) are left out on purpose: on a big
+    database they would make startup as slow as the first request was.
+"""
+import time
+from flask import g
+from sqlalchemy.orm import configure_mappers
+from .db_routing import READ_BIND
+
+
+def _hot_statements(db):
+    from ..models import User, Book, Loan
+    from ..routes.loans import loans_query
+
+    return (
+        lambda: db.session.get(User, 0),
+        lambda: User.query.filter_by(email='').first(),
+        lambda: db.session.get(Book, 0),
+        lambda: Book.query.filter_by(isbn='').first(),
+        lambda: db.session.get(Loan, 0),
+        lambda: loans_query().filter_by(user_id=0).all(),
+    )
+
+
+def _fill_pool(engine):
+    pool = engine.pool
+    size = pool.size() if hasattr(pool, 'size') else 1
+    connections = [engine.connect() for _ in range(max(1, size))]
+    for connection in connections:
+        connection.close()
+
+
+def warm_up(app, db):
+    """ returns the seconds spent warming up """
+    start = time.perf_counter()
+    configure_mappers()
+    with app.app_context():
+        for engine in db.engines.values():
+            _fill_pool(engine)
+
+        binds = [None] + ([READ_BIND] if READ_BIND in db.engines else [])
+        for bind in binds:
+            with app.test_request_context():
+                g.db_bind = bind
+                for statement in _hot_statements(db):
+                    statement()
+                db.session.remove()
+
+    elapsed = time.perf_counter() - start
+    app.logger.info('startup warmup finished in %.3fs', elapsed)
+    return elapsed
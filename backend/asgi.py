@@ -0,0 +1,4 @@
+from app.asgi import create_asgi_app
+
+# modo ASGI: uvicorn asgi:app --port 5001 (ver app/asgi.py)
+app = create_asgi_app()
@@ -0,0 +1,92 @@
+""" Circulation analytics over a large loan history.
+
+    Seeds a file database with the flask seed generator (10M loans by default,
+    a few GB and several minutes), archives the loans returned over a year ago
+    so the reports read both tables, then times every report. For comparison it
+    also times the per-row ORM approach (load Loan objects, calculate_fine, sum
+    in Python) on a sample and extrapolates it to the full history.
+
+    python benchmark_analytics.py --loans 10000000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from app import create_app, db
+from app.analytics import circulation_by_genre, circulation_by_period
+from app.archive import archive_loans
+from app.models import Loan
+from app.seeding import seed_database
+from config import Config
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def orm_report(sample):
+    """ what the reports cost with ORM objects: one Loan instance per row """
+    buckets = {}
+    for loan in Loan.query.limit(sample).yield_per(10000):
+        fine = loan.fine_amount if loan.return_date else loan.calculate_fine()
+        end = loan.return_date or datetime.utcnow()
+        row = buckets.setdefault(loan.loan_date.strftime('%Y-%m'), [0, 0, 0.0, 0.0])
+        row[0] += 1
+        row[1] += end > loan.expiration_date
+        row[2] += fine or 0.0
+        row[3] += (end - loan.loan_date).total_seconds() / 86400
+    db.session.rollback()  # calculate_fine modifica los objetos
+    return buckets
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MyBookSpace circulation analytics benchmark')
+    parser.add_argument('--loans', type=int, default=10_000_000, help='loans to seed')
+    parser.add_argument('--books', type=int, default=50_000, help='books to seed')
+    parser.add_argument('--users', type=int, default=20_000, help='patrons to seed')
+    parser.add_argument('--orm-sample', type=int, default=200_000, help='loans read by the ORM baseline')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_analytics_')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmpdir, 'analytics.db')
+        METRICS_ENABLED = False
+
+    try:
+        app = create_app(BenchConfig)
+        with app.app_context():
+            _, seconds = timed(lambda: seed_database(books=args.books, users=args.users, loans=args.loans,
+                                                      days=3650, batch_size=50000, log=lambda msg: None))
+            print(f'seeded {args.loans} loans in {seconds:.1f}s')
+            moved, seconds = timed(lambda: archive_loans(older_than_days=365, batch_size=50000))
+            print(f'archived {moved} loans in {seconds:.1f}s')
+
+            print("=" * 80)
+            print(f"REPORTS over {args.loans} loans (Loans + LoansArchive)")
+            print("=" * 80)
+            reports = {
+                'by month': lambda: circulation_by_period('month'),
+                'by year': lambda: circulation_by_period('year'),
+                'by genre': circulation_by_genre,
+                'last year by month': lambda: circulation_by_period(
+                    'month', since=datetime.utcnow().replace(year=datetime.utcnow().year - 1)),
+            }
+            for name, report in reports.items():
+                rows, seconds = timed(report)
+                print(f'{name:<20} {len(rows):>5} rows  {seconds:8.2f}s')
+
+            sample = min(args.orm_sample, args.loans)
+            _, seconds = timed(lambda: orm_report(sample))
+            print(f'{"ORM per row":<20} {sample:>5} loans {seconds:8.2f}s  '
+                  f'(~{seconds * args.loans / sample:.0f}s extrapolated to {args.loans})')
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import httpx
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import User
+from config import Config
+
+CONCURRENCY = 200
+REQUESTS = 600
+THREADS = 16                 # WSGI worker threads == ASGI sync thread pool
+UPSTREAM_DELAY = 0.2         # latency of each (mocked) OpenLibrary call
+JWT_SECRET = 'benchmark-secret-key-with-32-bytes!'
+
+
+async def fake_openlibrary(reader, writer):
+    """ slow OpenLibrary stand-in serving edition + author records (asyncio, so the
+        mock itself never runs out of threads)
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        writer.close()
+        return
+    while (await reader.readline()) not in (b'\r\n', b''):
+        pass
+    await asyncio.sleep(UPSTREAM_DELAY)
+
+    path = request_line.split()[1].decode()
+    if path.startswith('/isbn/'):
+        body = {'title': 'Benchmark Book', 'authors': [{'key': '/authors/OL1A'}], 'covers': [1]}
+    else:
+        body = {'name': 'Benchmark Author'}
+    data = json.dumps(body).encode()
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n'
+                 b'Content-Length: %d\r\n\r\n' % len(data) + data)
+    await writer.drain()
+    writer.close()
+
+
+def start_upstream():
+    """ run the mock in its own thread/event loop; returns its port """
+    ready = threading.Event()
+    port = []
+
+    async def serve():
+        server = await asyncio.start_server(fake_openlibrary, '127.0.0.1', 0, backlog=1024)
+        port.append(server.sockets[0].getsockname()[1])
+        ready.set()
+        await server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return port[0]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def prepare_database(db_path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        JWT_SECRET_KEY = JWT_SECRET
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.session.add(User(email='admin@bench.com', password='x', first_name='Admin',
+                            last_name='Bench', role='admin'))
+        db.session.commit()
+        token = create_access_token(identity='1', additional_claims={'role': 'admin'})
+        db.engine.dispose()
+    return token
+
+
+def start_server(command, env, port):
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/', timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'server did not start: {" ".join(command)}')
+
+
+async def drive(port, token):
+    url = f'http://127.0.0.1:{port}/api/catalog/books/preview/9780000000001'
+    headers = {'Authorization': f'Bearer {token}'}
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url, headers=headers)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(REQUESTS)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'throughput': REQUESTS / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    tmpdir = tempfile.mkdtemp(prefix='bench_asgi_')
+    upstream_port = start_upstream()
+
+    try:
+        db_path = os.path.join(tmpdir, 'bench.db')
+        token = prepare_database(db_path)
+        env = dict(os.environ,
+                   DATABASE_URL='sqlite:///' + db_path,
+                   JWT_SECRET_KEY=JWT_SECRET,
+                   OPENLIBRARY_URL=f'http://127.0.0.1:{upstream_port}',
+                   ASGI_THREADPOOL_SIZE=str(THREADS))
+
+        modes = {
+            'WSGI (waitress)': [sys.executable, '-m', 'waitress', f'--threads={THREADS}',
+                                '--listen=127.0.0.1:{port}', 'run:app'],
+            'ASGI (uvicorn)': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1',
+                               '--port', '{port}', '--log-level', 'warning'],
+        }
+        results = {}
+        for label, command in modes.items():
+            port = free_port()
+            process = start_server([part.format(port=port) for part in command], env, port)
+            try:
+                results[label] = asyncio.run(drive(port, token))
+            finally:
+                process.terminate()
+                process.wait()
+            r = results[label]
+            print(f"{label:18} {r['throughput']:8.1f} req/s  p50 {r['p50_ms']:8.1f} ms  "
+                  f"p99 {r['p99_ms']:8.1f} ms  errors {r['errors']}")
+        return results
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    print("=" * 80)
+    print("WSGI vs ASGI BENCHMARK (preview_book, slow OpenLibrary)")
+    print("=" * 80)
+    print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{REQUESTS} requests, {CONCURRENCY} concurrent clients, {THREADS} threads, "
+          f"upstream delay {UPSTREAM_DELAY * 1000:.0f} ms per call\n")
+    main()
+    print("=" * 80)
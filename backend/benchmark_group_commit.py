@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import User, Book
+from config import Config
+
+CLIENTS = 50
+DURATION = 5.0
+
+
+def make_config(db_path, group_commit, synchronous):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, synchronous=synchronous)
+        GROUP_COMMIT_ENABLED = group_commit
+        SQLITE_POOL_OPTIONS = dict(Config.SQLITE_POOL_OPTIONS, pool_size=CLIENTS, max_overflow=10)
+    return BenchConfig
+
+
+def seed(app):
+    """ one user per client and one book per client so clients never run out of copies """
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {'email': f'bench{i}@test.com', 'password': 'x', 'first_name': 'Bench',
+             'last_name': str(i), 'role': 'user'} for i in range(CLIENTS)])
+        db.session.execute(Book.__table__.insert(), [
+            {'isbn': f'978-0-00{i:07d}', 'title': f'Bench Book {i}', 'author': 'Bench',
+             'total_copies': 1000000, 'available_copies': 1000000} for i in range(CLIENTS)])
+        db.session.commit()
+        return [create_access_token(identity=str(i + 1)) for i in range(CLIENTS)]
+
+
+def client_loop(app, token, book_id, stop, counts, latencies):
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = client.post(f'/api/loans/reserve/{book_id}', headers=headers)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 201:
+            counts['errors'] += 1
+            continue
+        counts['writes'] += 1
+
+        start = time.perf_counter()
+        response = client.post(f"/api/loans/return/{response.json['loan']['id']}", headers=headers)
+        latencies.append(time.perf_counter() - start)
+        counts['writes' if response.status_code == 200 else 'errors'] += 1
+
+
+def run(group_commit, synchronous, duration=DURATION):
+    tmpdir = tempfile.mkdtemp(prefix='bench_group_commit_')
+    try:
+        app = create_app(make_config(os.path.join(tmpdir, 'bench.db'), group_commit, synchronous))
+        tokens = seed(app)
+
+        stop = threading.Event()
+        counts = [{'writes': 0, 'errors': 0} for _ in range(CLIENTS)]
+        latencies = [[] for _ in range(CLIENTS)]
+        threads = [threading.Thread(target=client_loop,
+                                    args=(app, tokens[i], i + 1, stop, counts[i], latencies[i]))
+                   for i in range(CLIENTS)]
+        for t in threads:
+            t.start()
+        time.sleep(duration)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        writer = app.extensions.get('group_commit')
+        batches = writer.stats['batches'] if writer else None
+        if writer:
+            writer.stop()
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    all_latencies = sorted(l for per_client in latencies for l in per_client)
+    writes = sum(c['writes'] for c in counts)
+    return {
+        'writes': writes,
+        'errors': sum(c['errors'] for c in counts),
+        'writes_per_sec': writes / duration,
+        'p50_ms': all_latencies[len(all_latencies) // 2] * 1000 if all_latencies else 0,
+        'p99_ms': all_latencies[int(len(all_latencies) * 0.99)] * 1000 if all_latencies else 0,
+        'batches': batches,
+    }
+
+
+if __name__ == '__main__':
+    print("=" * 80)
+    print("GROUP COMMIT BENCHMARK")
+    print("=" * 80)
+    print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{CLIENTS} concurrent clients doing reserve/return cycles, {DURATION:.0f}s per run\n")
+
+    for synchronous in ('FULL', 'NORMAL'):
+        print(f"synchronous={synchronous}")
+        print("-" * 80)
+        results = {}
+        for group_commit in (False, True):
+            r = run(group_commit, synchronous)
+            results[group_commit] = r
+            label = 'group commit   ' if group_commit else 'commit per call'
+            extra = f", {r['writes'] / r['batches']:.1f} writes/batch" if r['batches'] else ''
+            print(f"   {label}: {r['writes_per_sec']:8.1f} writes/s  "
+                  f"p50 {r['p50_ms']:6.1f} ms  p99 {r['p99_ms']:6.1f} ms  "
+                  f"errors {r['errors']}{extra}")
+        if results[False]['writes']:
+            print(f"   speedup: {results[True]['writes'] / results[False]['writes']:.2f}x\n")
+    print("=" * 80)
@@ -0,0 +1,308 @@
+""" End-to-end concurrent load harness.
+
+    Builds the app once and drives a weighted mix of realistic scenarios (browse,
+    search, checkout, return, login, admin stats) from many concurrent workers,
+    either through the in-process WSGI test client or against a running server.
+    Prints (and optionally writes) a JSON report with throughput and p50/p95/p99
+    latency per scenario so runs can be diffed.
+
+    python benchmark_load.py --workers 32 --duration 20 --output load.json
+    python benchmark_load.py --target http://127.0.0.1:5001 --workers 64
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_MIX = 'browse=35,search=25,checkout=12,return=12,login=6,admin_stats=10'
+SEARCH_TERMS = ('Book', 'Author 1', 'Fiction', '978-0', 'Dune', 'Test', 'History', 'Sea')
+USER_PASSWORD = 'loadtest123'
+ADMIN_EMAIL = 'admin@load.test'
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f'unknown scenarios: {", ".join(sorted(unknown))}')
+    return mix
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# --- transports ----------------------------------------------------------------
+
+class ClientTransport:
+    """ in-process WSGI test client (one per worker) """
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, headers=None, json_body=None):
+        response = self.client.open(path, method=method, headers=headers, json=json_body)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpTransport:
+    """ real HTTP against a running server (one requests.Session per worker) """
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def request(self, method, path, headers=None, json_body=None):
+        response = self.session.request(method, self.base_url + path, headers=headers,
+                                        json=json_body, timeout=60)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+
+# --- scenarios -----------------------------------------------------------------
+
+class Worker:
+    def __init__(self, index, transport, email, admin_token, book_ids, seed):
+        self.transport = transport
+        self.email = email
+        self.admin_headers = {'Authorization': f'Bearer {admin_token}'}
+        self.book_ids = book_ids
+        self.rng = random.Random(seed + index)
+        self.loans = []
+        self.headers = None
+        self.login()
+
+    def login(self):
+        status, body = self.transport.request('POST', '/api/auth/login',
+                                              json_body={'email': self.email, 'password': USER_PASSWORD})
+        if status == 200:
+            self.headers = {'Authorization': f"Bearer {body['access_token']}"}
+        return status == 200
+
+    def browse(self):
+        status, _ = self.transport.request('GET', '/api/catalog/books')
+        if status == 200 and self.rng.random() < 0.5:
+            status, _ = self.transport.request('GET', f'/api/catalog/books/{self.rng.choice(self.book_ids)}')
+        return status == 200
+
+    def search(self):
+        term = self.rng.choice(SEARCH_TERMS)
+        status, _ = self.transport.request('GET', f'/api/catalog/books?search={term}')
+        return status == 200
+
+    def checkout(self):
+        status, body = self.transport.request('POST', '/api/loans/reserve', headers=self.headers,
+                                              json_body={'book_id': self.rng.choice(self.book_ids)})
+        if status == 201:
+            self.loans.append(body['loan']['id'])
+        # 400 = sin copias disponibles: respuesta valida bajo carga
+        return status in (201, 400)
+
+    def return_book(self):
+        if not self.loans:
+            return self.checkout()
+        loan_id = self.loans.pop(self.rng.randrange(len(self.loans)))
+        status, _ = self.transport.request('POST', f'/api/loans/return/{loan_id}', headers=self.headers)
+        return status == 200
+
+    def admin_stats(self):
+        ok = True
+        for path in ('/api/catalog/stats', '/api/loans/stats'):
+            status, _ = self.transport.request('GET', path, headers=self.admin_headers)
+            ok = ok and status == 200
+        return ok
+
+
+SCENARIOS = {
+    'browse': Worker.browse,
+    'search': Worker.search,
+    'checkout': Worker.checkout,
+    'return': Worker.return_book,
+    'login': Worker.login,
+    'admin_stats': Worker.admin_stats,
+}
+
+
+def run_worker(worker, mix, stop, warmup_until, results):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    while not stop.is_set():
+        name = worker.rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            ok = SCENARIOS[name](worker)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        if time.perf_counter() >= warmup_until:
+            results.append((name, elapsed, ok))
+
+
+# --- setup -----------------------------------------------------------------------
+
+def build_local_app(args):
+    """ temp file database seeded with books and one account per worker """
+    from werkzeug.security import generate_password_hash
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.models import User, Book
+    from config import Config
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_load_')
+
+    class LoadConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmpdir, 'load.db')
+        GROUP_COMMIT_ENABLED = args.group_commit
+
+    app = create_app(LoadConfig)
+    password = generate_password_hash(USER_PASSWORD, method='scrypt')  # un solo hash para todos
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {'email': ADMIN_EMAIL, 'password': password, 'first_name': 'Load', 'last_name': 'Admin',
+             'role': 'admin'}] + [
+            {'email': f'user{i}@load.test', 'password': password, 'first_name': 'Load',
+             'last_name': str(i), 'role': 'user'} for i in range(args.workers)])
+        genres = ('Fiction', 'Science Fiction', 'Fantasy', 'History', 'Mystery')
+        db.session.execute(Book.__table__.insert(), [
+            {'isbn': f'978-0-{i:09d}', 'title': f'Test Book {i}', 'author': f'Author {i % 200}',
+             'genre': rng.choice(genres), 'total_copies': 5, 'available_copies': 5,
+             'cover_url': 'https://example.com/cover.jpg'} for i in range(args.books)])
+        db.session.commit()
+        admin = User.query.filter_by(email=ADMIN_EMAIL).first()
+        admin_token = create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'})
+        book_ids = [b.id for b in Book.query.with_entities(Book.id)]
+        db.session.remove()
+    return app, admin_token, book_ids, tmpdir
+
+
+def prepare_remote(args):
+    """ register the load accounts (ignoring 'already exists') and read the catalog """
+    transport = HttpTransport(args.target)
+    for i in range(args.workers):
+        transport.request('POST', '/api/auth/register', json_body={
+            'email': f'user{i}@load.test', 'password': USER_PASSWORD,
+            'first_name': 'Load', 'last_name': str(i), 'role': 'user'})
+    status, body = transport.request('POST', '/api/auth/login',
+                                     json_body={'email': args.admin_email, 'password': args.admin_password})
+    if status != 200:
+        raise SystemExit(f'admin login failed on {args.target} ({status})')
+    _, catalog = transport.request('GET', '/api/catalog/books')
+    book_ids = [b['id'] for b in catalog['books']]
+    if not book_ids:
+        raise SystemExit('the target catalog is empty')
+    return body['access_token'], book_ids
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(results, measured_seconds):
+    report = {}
+    by_name = {}
+    for name, elapsed, ok in results:
+        by_name.setdefault(name, []).append((elapsed, ok))
+    by_name['all'] = [(elapsed, ok) for _, elapsed, ok in results]
+
+    for name, samples in sorted(by_name.items()):
+        latencies = sorted(e for e, _ in samples)
+        report[name] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, ok in samples if not ok),
+            'throughput_per_sec': round(len(samples) / measured_seconds, 2),
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies) * 1000, 3),
+                'p50': round(percentile(latencies, 50) * 1000, 3),
+                'p95': round(percentile(latencies, 95) * 1000, 3),
+                'p99': round(percentile(latencies, 99) * 1000, 3),
+                'max': round(latencies[-1] * 1000, 3),
+            },
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MyBookSpace load harness')
+    parser.add_argument('--target', default='client',
+                        help="'client' for the in-process WSGI test client, or a base URL")
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds discarded at the start')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='scenario=weight,...')
+    parser.add_argument('--books', type=int, default=500, help='catalog size (client mode)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--group-commit', action='store_true', help='enable group commit (client mode)')
+    parser.add_argument('--admin-email', default='admin@library.com', help='admin account (URL mode)')
+    parser.add_argument('--admin-password', default='admin123')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    tmpdir = None
+    if args.target == 'client':
+        app, admin_token, book_ids, tmpdir = build_local_app(args)
+        make_transport = lambda: ClientTransport(app)
+    else:
+        admin_token, book_ids = prepare_remote(args)
+        make_transport = lambda: HttpTransport(args.target)
+
+    try:
+        workers = [Worker(i, make_transport(), f'user{i}@load.test', admin_token, book_ids, args.seed)
+                   for i in range(args.workers)]
+        stop = threading.Event()
+        results = [[] for _ in workers]
+        warmup_until = time.perf_counter() + args.warmup
+        threads = [threading.Thread(target=run_worker, args=(w, mix, stop, warmup_until, r))
+                   for w, r in zip(workers, results)]
+        for t in threads:
+            t.start()
+        time.sleep(args.warmup + args.duration)
+        stop.set()
+        for t in threads:
+            t.join()
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    report = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'target': args.target,
+        'workers': args.workers,
+        'duration_sec': args.duration,
+        'warmup_sec': args.warmup,
+        'mix': mix,
+        'group_commit': args.group_commit,
+        'scenarios': summarize([r for per_worker in results for r in per_worker], args.duration),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+    return report
+
+
+if __name__ == '__main__':
+    main()
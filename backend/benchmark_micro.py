@@ -0,0 +1,350 @@
+""" Microbenchmarks for the hot functions, with a stored baseline and regression gate.
+
+    Each benchmark is calibrated so one round lasts at least --min-time, runs a few
+    warmup rounds, then --rounds measured rounds (time per operation per round).
+    --compare checks every benchmark against the baseline JSON: a regression is a
+    median slowdown beyond --threshold that is also statistically significant
+    (one-sided Mann-Whitney U over the round samples, p < 0.01). Any regression
+    makes the command exit with status 1. Rounds are interleaved across benchmarks
+    and times are normalized by a pure-Python reference loop, so a machine that is
+    busier than when the baseline was taken does not fail the gate.
+
+    python benchmark_micro.py                      # run and print
+    python benchmark_micro.py --save-baseline      # store docs/micro_baseline.json
+    python benchmark_micro.py --compare            # fail on regressions
+
+    Baselines are machine specific: save one on the machine that runs --compare.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'docs', 'micro_baseline.json')
+PASSWORD = 'password123'
+
+BENCHMARKS = {}
+# carga fija de CPU en Python puro: mide la velocidad de la maquina en esta corrida
+REFERENCE = 'reference_loop'
+
+
+def benchmark(name):
+    """ register a setup function that returns the callable to time (one operation) """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# --- benchmarks ----------------------------------------------------------------
+
+@benchmark(REFERENCE)
+def bench_reference(app):
+    def run():
+        total = 0
+        for i in range(2000):
+            total += i * i % 7
+        return total
+    return run
+
+
+@benchmark('loan_to_dict')
+def bench_loan_to_dict(app):
+    from app.routes.loans import loans_query
+    loans = loans_query().limit(100).all()
+    return lambda: [loan.to_dict() for loan in loans]
+
+
+@benchmark('loan_calculate_fine')
+def bench_calculate_fine(app):
+    from app.models import Loan
+    loans = Loan.query.limit(100).all()
+    return lambda: [loan.calculate_fine() for loan in loans]
+
+
+@benchmark('catalog_list')
+def bench_catalog_list(app):
+    from app.routes.catalog import get_books
+
+    def run():
+        # contexto propio como una peticion real: sesion nueva, sin los libros de la vuelta anterior
+        with app.app_context(), app.test_request_context('/api/catalog/books'):
+            return get_books()
+    return run
+
+
+@benchmark('catalog_search')
+def bench_catalog_search(app):
+    from app.routes.catalog import get_books
+
+    def run():
+        # contexto propio como una peticion real: sesion nueva, sin los libros de la vuelta anterior
+        with app.app_context(), app.test_request_context('/api/catalog/books?search=Silent'):
+            return get_books()
+    return run
+
+
+@benchmark('normalize_isbn')
+def bench_normalize_isbn(app):
+    from app.utils.external_api import normalize_isbn
+    isbns = [f'978-0-{i:02d}-{i * 7919 % 1000000:06d}-{i % 10}' for i in range(100)] + \
+            [f'978 1 {i:03d} {i * 31 % 100000:05d} 1' for i in range(100)]
+    return lambda: [normalize_isbn(isbn) for isbn in isbns]
+
+
+@benchmark('jwt_issue')
+def bench_jwt_issue(app):
+    from flask_jwt_extended import create_access_token
+    from app.models import User
+    user = User.query.first()
+    claims = {'role': user.role, 'email': user.email, 'first_name': user.first_name,
+              'last_name': user.last_name}
+    return lambda: create_access_token(identity=str(user.id), additional_claims=claims)
+
+
+@benchmark('login')
+def bench_login(app):
+    from app.models import User
+    from app.routes.auth import login
+    email = User.query.first().email
+
+    def run():
+        with app.test_request_context('/api/auth/login', method='POST',
+                                      json={'email': email, 'password': PASSWORD}):
+            response, status = login()
+            assert status == 200
+    return run
+
+
+# --- runner ----------------------------------------------------------------------
+
+def build_app():
+    """ in-memory database with a small seeded library """
+    from app import create_app
+    from app.seeding import seed_database
+    from config import TestConfig
+
+    class MicroConfig(TestConfig):
+        METRICS_ENABLED = False
+        JWT_SECRET_KEY = 'micro-benchmark-secret-key-0123456789'
+
+    app = create_app(MicroConfig)
+    with app.app_context():
+        seed_database(books=300, users=50, loans=2000, seed=42, password=PASSWORD, log=lambda msg: None)
+    return app
+
+
+def calibrate(fn, min_time):
+    """ operations per round so that a round lasts at least min_time """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return number
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+
+
+def summarize(samples, number):
+    ordered = sorted(samples)
+    quartiles = statistics.quantiles(ordered, n=4) if len(ordered) > 1 else [ordered[0]] * 3
+    return {
+        'number': number,
+        'rounds': len(samples),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'iqr': quartiles[2] - quartiles[0],
+        'samples': samples,
+    }
+
+
+def run_benchmarks(names, rounds, warmup, min_time):
+    """ rounds are interleaved (every benchmark once per round) so slow drifts of the
+        machine hit all benchmarks alike instead of whichever happened to run then
+    """
+    app = build_app()
+    contexts = {}
+    functions = {}
+    numbers = {}
+    for name in [REFERENCE] + names:
+        contexts[name] = app.app_context()
+        contexts[name].push()
+        functions[name] = BENCHMARKS[name](app)
+        numbers[name] = calibrate(functions[name], min_time)
+        contexts[name].pop()
+
+    samples = {name: [] for name in functions}
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(warmup + rounds):
+            for name, fn in functions.items():
+                with contexts[name]:
+                    start = time.perf_counter()
+                    for _ in range(numbers[name]):
+                        fn()
+                    elapsed = (time.perf_counter() - start) / numbers[name]
+                if i >= warmup:
+                    samples[name].append(elapsed)
+                gc.collect()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    results = {}
+    for name in functions:
+        stats = results[name] = summarize(samples[name], numbers[name])
+        print(f'{name:<22} median {format_time(stats["median"]):>10}  '
+              f'min {format_time(stats["min"]):>10}  iqr {format_time(stats["iqr"]):>10}  '
+              f'({stats["rounds"]} x {stats["number"]})')
+    return results
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.3f} {unit}'
+    return f'{seconds / 1e-9:.1f} ns'
+
+
+# --- comparison --------------------------------------------------------------------
+
+def mann_whitney_greater(current, baseline):
+    """ one-sided p-value that `current` samples tend to be larger than `baseline`
+        (normal approximation with average ranks for ties)
+    """
+    n1, n2 = len(current), len(baseline)
+    if not n1 or not n2:
+        return 1.0
+    combined = sorted([(v, 0) for v in current] + [(v, 1) for v in baseline])
+    ranks = [0.0] * len(combined)
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        i = j + 1
+    rank_sum = sum(r for r, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    sigma = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    if sigma == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(results, baseline, threshold, alpha=0.01):
+    """ list of (name, ratio, p_value, verdict) against the baseline benchmarks
+
+        Ratios are normalized by the reference loop (current/baseline machine
+        speed), so a busier or slower machine does not read as a regression.
+    """
+    speed = 1.0
+    if REFERENCE in results and REFERENCE in baseline:
+        speed = results[REFERENCE]['median'] / baseline[REFERENCE]['median']
+
+    rows = []
+    for name, stats in results.items():
+        if name == REFERENCE:
+            continue
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, None, 'new'))
+            continue
+        current = [value / speed for value in stats['samples']]
+        ratio = statistics.median(current) / base['median']
+        p_slower = mann_whitney_greater(current, base['samples'])
+        p_faster = mann_whitney_greater(base['samples'], current)
+        if ratio > 1 + threshold and p_slower < alpha:
+            verdict = 'REGRESSION'
+        elif ratio < 1 - threshold and p_faster < alpha:
+            verdict = 'faster'
+        else:
+            verdict = 'ok'
+        rows.append((name, ratio, min(p_slower, p_faster), verdict))
+    return rows, speed
+
+
+def git_revision():
+    import subprocess
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='MyBookSpace microbenchmarks')
+    parser.add_argument('--rounds', type=int, default=15)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=0.05, help='minimum seconds per round')
+    parser.add_argument('--filter', default='', help='only benchmarks whose name contains this text')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the baseline')
+    parser.add_argument('--compare', action='store_true', help='exit 1 if any benchmark regressed')
+    parser.add_argument('--threshold', type=float, default=0.20, help='allowed median slowdown (0.20 = 20%%)')
+    parser.add_argument('--output', help='also write the results JSON here')
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if name != REFERENCE and args.filter in name]
+    print("=" * 80)
+    print(f"MICROBENCHMARKS ({args.rounds} rounds, {args.warmup} warmup, >= {args.min_time}s per round)")
+    print("=" * 80)
+    results = run_benchmarks(names, args.rounds, args.warmup, args.min_time)
+
+    report = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': f'{platform.system()} {platform.machine()} ({os.cpu_count()} cpu)',
+        'benchmarks': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if not args.compare:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print("\n" + "=" * 80)
+    print(f"COMPARISON vs baseline {baseline.get('revision')} ({baseline.get('generated')}), "
+          f"threshold {args.threshold:.0%}")
+    print("=" * 80)
+    rows, speed = compare(results, baseline['benchmarks'], args.threshold)
+    print(f"machine speed vs baseline: {speed:.2f}x time ({REFERENCE}); ratios below are normalized")
+    for name, ratio, p_value, verdict in rows:
+        if ratio is None:
+            print(f'{name:<22} {"":>8}  {"":>10}  {verdict}')
+        else:
+            print(f'{name:<22} {ratio:>7.2f}x  p={p_value:<8.3g}  {verdict}')
+
+    regressions = [name for name, _, _, verdict in rows if verdict == 'REGRESSION']
+    if regressions:
+        print(f"\nFAILED: {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
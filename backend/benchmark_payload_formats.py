@@ -0,0 +1,84 @@
+""" Payload size and encode/decode time per response format.
+
+    Encodes the catalog list and the admin loans list (same dicts the endpoints
+    send) as JSON on every installed backend and as MessagePack/CBOR when
+    installed, and reports body size, gzip size, encode time and the time a
+    Python client needs to decode the body.
+"""
+import gzip
+import json
+import time
+from app import create_app, db
+from app.models import Book
+from app.routes.loans import loans_query
+from app.seeding import seed_database
+from app.serializers import BACKENDS, BINARY_FORMATS, FastJSONProvider, book_to_dict, loan_to_dict
+from config import TestConfig
+
+BOOKS = 10000
+LOANS = 10000
+REPEAT = 5
+
+
+def best_of(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def decoders():
+    found = {'application/json': json.loads}
+    try:
+        import msgpack
+        found['application/msgpack'] = msgpack.unpackb
+    except ImportError:
+        pass
+    try:
+        import cbor2
+        found['application/cbor'] = cbor2.loads
+    except ImportError:
+        pass
+    return found
+
+
+def main():
+    app = create_app(TestConfig)
+    with app.app_context():
+        seed_database(books=BOOKS, users=500, loans=LOANS, seed=1, log=lambda msg: None)
+        payloads = {
+            'books': {'books': [book_to_dict(b) for b in Book.query.all()]},
+            'loans': [loan_to_dict(loan) for loan in loans_query().all()],
+        }
+
+        formats = []
+        for backend in BACKENDS:
+            app.config['JSON_BACKEND'] = backend
+            formats.append((f'json ({backend})', 'application/json', FastJSONProvider(app).encode))
+        for mimetype, fmt in BINARY_FORMATS.items():
+            if mimetype != 'application/x-msgpack':
+                formats.append((mimetype.split('/')[1], mimetype, fmt.encode))
+        decode = decoders()
+
+        print("=" * 80)
+        print(f"PAYLOAD FORMATS ({BOOKS} books, {LOANS} loans, best of {REPEAT})")
+        print("=" * 80)
+        for name, payload in payloads.items():
+            print(f"\n{name}")
+            print(f"  {'format':<18} {'size':>10} {'gzip':>10} {'encode':>11} {'decode':>11}")
+            json_size = None
+            for label, mimetype, encode in formats:
+                body = encode(payload)
+                json_size = json_size or len(body)
+                encode_time = best_of(lambda: encode(payload))
+                decode_time = best_of(lambda: decode[mimetype](body))
+                print(f"  {label:<18} {len(body) / 1e6:7.2f} MB {len(gzip.compress(body, 6)) / 1e6:7.2f} MB "
+                      f"{encode_time * 1000:8.1f} ms {decode_time * 1000:8.1f} ms "
+                      f"({len(body) / json_size:4.0%} of JSON size)")
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
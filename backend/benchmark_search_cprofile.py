@@ -5,9 +5,11 @@ from datetime import datetime
 from app import create_app, db
 from app.models import Book
 
+# build the app once: creating it inside each search measured create_app()/create_all(), not the query
+app = create_app()
+
 def create_test_data():
     """ create 300 book entries for benchmarking """
-    app = create_app()
     with app.app_context():
         count = Book.query.count()
         if count >= 300:
@@ -33,7 +35,6 @@ def create_test_data():
 
 # before optimization
 def search_unoptimized():
-    app = create_app()
     with app.app_context():
         search_term = "Book"
     
@@ -48,7 +49,6 @@ def run_unoptimized_searches(iterations=50):
 
 # after optimization
 def search_optimized():
-    app = create_app()
     with app.app_context():
         search_term = "Book"
     
@@ -62,7 +62,6 @@ def run_optimized_searches(iterations=50):
 
 # add indexes
 def add_database_indexes():
-    app = create_app()
     with app.app_context():
         print("Adding indexes to the database...")
         try:
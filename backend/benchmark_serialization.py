@@ -0,0 +1,94 @@
+""" Serialization benchmark for large list responses.
+
+    Compares the old path (hand-built dicts, isoformat() per datetime, Flask's
+    default stdlib provider) with the serializer layer on every installed JSON
+    backend, for the catalog list and the admin loans list.
+"""
+import time
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app import create_app, db
+from app.models import Book
+from app.routes.loans import loans_query
+from app.seeding import seed_database
+from app.serializers import BACKENDS, FastJSONProvider, book_to_dict, loan_to_dict
+from config import TestConfig
+
+BOOKS = 10000
+LOANS = 10000
+REPEAT = 5
+
+
+def old_book_dict(book):
+    return {
+        'id': book.id,
+        'isbn': book.isbn,
+        'title': book.title,
+        'author': book.author,
+        'genre': book.genre,
+        'total_copies': book.total_copies,
+        'available_copies': book.available_copies,
+        'cover_url': book.cover_url,
+        'description': book.description
+    }
+
+
+def old_loan_dict(loan):
+    loan.calculate_fine()
+    return {
+        'id': loan.id,
+        'user_id': loan.user_id,
+        'book_id': loan.book_id,
+        'loan_date': loan.loan_date.isoformat(),
+        'expiration_date': loan.expiration_date.isoformat(),
+        'return_date': loan.return_date.isoformat() if loan.return_date else None,
+        'status': loan.status,
+        'fine_amount': loan.fine_amount,
+        'renewals': loan.renewals,
+        'book': {'id': loan.book.id, 'title': loan.book.title, 'author': loan.book.author,
+                 'isbn': loan.book.isbn, 'cover_url': loan.book.cover_url} if loan.book else None,
+        'user': {'id': loan.user.id, 'email': loan.user.email, 'first_name': loan.user.first_name,
+                 'last_name': loan.user.last_name} if loan.user else None
+    }
+
+
+def best_of(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    app = create_app(TestConfig)
+    with app.app_context():
+        seed_database(books=BOOKS, users=500, loans=LOANS, seed=1, log=lambda msg: None)
+        books = Book.query.all()
+        loans = loans_query().all()
+
+        stdlib_app = Flask('stdlib')
+        stdlib_app.json = DefaultJSONProvider(stdlib_app)
+        providers = [('old: dicts + Flask stdlib provider', stdlib_app.json, old_book_dict, old_loan_dict)]
+        for backend in BACKENDS:
+            app.config['JSON_BACKEND'] = backend
+            providers.append((f'serializers + {backend}', FastJSONProvider(app), book_to_dict, loan_to_dict))
+
+        print("=" * 80)
+        print(f"SERIALIZATION ({BOOKS} books, {LOANS} loans, best of {REPEAT})")
+        print("=" * 80)
+        baseline = {}
+        for label, provider, book_fn, loan_fn in providers:
+            with app.test_request_context():
+                book_time = best_of(lambda: provider.response({'books': [book_fn(b) for b in books]}))
+                loan_time = best_of(lambda: provider.response([loan_fn(l) for l in loans]))
+            baseline.setdefault('books', book_time)
+            baseline.setdefault('loans', loan_time)
+            print(f"{label:<38} books {book_time * 1000:8.1f} ms ({baseline['books'] / book_time:4.1f}x)   "
+                  f"loans {loan_time * 1000:8.1f} ms ({baseline['loans'] / loan_time:4.1f}x)")
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
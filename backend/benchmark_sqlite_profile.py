@@ -0,0 +1,126 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.models import Book
+from config import Config
+
+READERS = 8
+WRITERS = 4
+DURATION = 5.0
+
+
+def make_config(db_path, tuned):
+    """ config class pointing at a temp database, with or without the sqlite profile """
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        SQLITE_PRAGMAS = Config.SQLITE_PRAGMAS if tuned else {}
+        SQLITE_POOL_OPTIONS = Config.SQLITE_POOL_OPTIONS if tuned else {}
+    return BenchConfig
+
+
+def seed_books(app, count=300):
+    with app.app_context():
+        db.session.execute(Book.__table__.insert(), [{
+            'isbn': f'978-0-00{i:07d}',
+            'title': f'Test Book {i+1}',
+            'author': f'Author {i+1}',
+            'genre': 'Fiction',
+            'total_copies': 5,
+            'available_copies': 5,
+        } for i in range(count)])
+        db.session.commit()
+
+
+def reader(app, stop, stats):
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                term = f'Book {random.randint(1, 300)}'
+                Book.query.filter(Book.title.ilike(f'%{term}%')).limit(50).all()
+                db.session.rollback()
+                stats['reads'] += 1
+            except OperationalError:
+                db.session.rollback()
+                stats['errors'] += 1
+
+
+def writer(app, stop, stats):
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                book_id = random.randint(1, 300)
+                db.session.execute(
+                    update(Book).where(Book.id == book_id)
+                    .values(available_copies=random.randint(0, 5))
+                )
+                db.session.commit()
+                stats['writes'] += 1
+            except OperationalError:
+                db.session.rollback()
+                stats['errors'] += 1
+
+
+def run_profile(tuned, duration=DURATION):
+    tmpdir = tempfile.mkdtemp(prefix='bench_sqlite_')
+    try:
+        app = create_app(make_config(os.path.join(tmpdir, 'bench.db'), tuned))
+        seed_books(app)
+
+        stop = threading.Event()
+        stats = {'reads': 0, 'writes': 0, 'errors': 0}
+        reader_stats = [{'reads': 0, 'writes': 0, 'errors': 0} for _ in range(READERS)]
+        writer_stats = [{'reads': 0, 'writes': 0, 'errors': 0} for _ in range(WRITERS)]
+        threads = [threading.Thread(target=reader, args=(app, stop, s)) for s in reader_stats]
+        threads += [threading.Thread(target=writer, args=(app, stop, s)) for s in writer_stats]
+
+        for t in threads:
+            t.start()
+        time.sleep(duration)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        for s in reader_stats + writer_stats:
+            for key in stats:
+                stats[key] += s[key]
+        with app.app_context():
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    stats['reads_per_sec'] = stats['reads'] / duration
+    stats['writes_per_sec'] = stats['writes'] / duration
+    return stats
+
+
+def print_stats(label, stats):
+    print(f"{label}:")
+    print(f"   Reads:  {stats['reads']:>8}  ({stats['reads_per_sec']:.1f}/s)")
+    print(f"   Writes: {stats['writes']:>8}  ({stats['writes_per_sec']:.1f}/s)")
+    print(f"   Errors (database is locked): {stats['errors']}")
+
+
+if __name__ == '__main__':
+    print("=" * 80)
+    print("SQLITE PROFILE BENCHMARK")
+    print("=" * 80)
+    print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{READERS} reader threads, {WRITERS} writer threads, {DURATION:.0f}s per run\n")
+
+    baseline = run_profile(tuned=False)
+    print_stats("Default SQLite settings", baseline)
+    tuned = run_profile(tuned=True)
+    print_stats("Tuned profile (WAL, synchronous=NORMAL, mmap, busy_timeout)", tuned)
+
+    print("\n" + "-" * 80)
+    if baseline['reads'] and baseline['writes']:
+        print(f"Read throughput:  {tuned['reads'] / baseline['reads']:.2f}x")
+        print(f"Write throughput: {tuned['writes'] / baseline['writes']:.2f}x")
+    print("=" * 80)
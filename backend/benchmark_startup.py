@@ -0,0 +1,112 @@
+""" Cold start benchmark: app factory, `flask` CLI and server boot, each in a fresh process.
+
+    Scenarios (every run is a new interpreter, so imports are always cold):
+      * create_app() with create_all (development default) vs AUTO_CREATE_DB=0
+      * `flask --app app routes` (CLI boot, includes Flask-Migrate/alembic)
+      * waitress boot: process start until GET / answers, then the latency of the
+        first real request, with and without STARTUP_WARMUP
+
+    python benchmark_startup.py --runs 7
+"""
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+
+def timed_process(args, env):
+    start = time.perf_counter()
+    subprocess.run(args, cwd=BACKEND, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def get(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+    except urllib.error.HTTPError as error:  # 404 del libro tambien es una respuesta completa
+        error.read()
+    return time.perf_counter() - start
+
+
+def server_boot(env, timeout=60):
+    """ seconds until the server answers GET /, and the first catalog request latency """
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'waitress', '--listen', f'127.0.0.1:{port}', '--call', 'app:create_app'],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                get(f'http://127.0.0.1:{port}/')
+                break
+            except OSError:
+                if time.perf_counter() - start > timeout or process.poll() is not None:
+                    raise RuntimeError('server did not start')
+                time.sleep(0.005)
+        ready = time.perf_counter() - start
+        first = get(f'http://127.0.0.1:{port}/api/catalog/books/1')
+        return ready, first
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def report(name, values):
+    values = sorted(values)
+    print(f'{name:<52} median {statistics.median(values) * 1000:8.1f} ms   '
+          f'min {values[0] * 1000:8.1f} ms   max {values[-1] * 1000:8.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MyBookSpace cold start benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_startup_')
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmpdir, 'startup.db'))
+    try:
+        # esquema creado una vez, como tras `flask db upgrade`
+        subprocess.run([sys.executable, '-c', 'from app import create_app; create_app()'],
+                       cwd=BACKEND, env=env, check=True)
+
+        factory = [sys.executable, '-c', 'from app import create_app; create_app()']
+        cli = [sys.executable, '-m', 'flask', '--app', 'app', 'routes']
+        prod = dict(env, AUTO_CREATE_DB='0')
+        warm = dict(prod, STARTUP_WARMUP='1')
+
+        print("=" * 80)
+        print(f"COLD START ({args.runs} runs each)")
+        print("=" * 80)
+        report('create_app() with create_all', [timed_process(factory, env) for _ in range(args.runs)])
+        report('create_app() AUTO_CREATE_DB=0', [timed_process(factory, prod) for _ in range(args.runs)])
+        report('flask routes (CLI)', [timed_process(cli, env) for _ in range(args.runs)])
+
+        for label, boot_env in (('waitress', prod), ('waitress + STARTUP_WARMUP', warm)):
+            runs = [server_boot(boot_env) for _ in range(args.runs)]
+            report(f'{label}: boot until first response', [ready for ready, _ in runs])
+            report(f'{label}: first GET /books/<id>', [first for _, first in runs])
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
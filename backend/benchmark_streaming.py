@@ -0,0 +1,100 @@
+""" Peak memory of the large list endpoints, buffered vs streamed.
+
+    For each size a file database is seeded once (flask seed generator), then every
+    (endpoint, mode) runs in a fresh process that reads the whole response in
+    chunks and reports the growth of its peak RSS during the request. With
+    streaming the growth should stay flat as the tables grow.
+
+    python benchmark_streaming.py --sizes 20000 100000
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = '''
+import json, resource, sys, time
+from flask_jwt_extended import create_access_token
+from sqlalchemy import update
+from app import create_app, db
+from app.models import User
+from config import Config
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + sys.argv[1]
+    STREAM_LIST_RESPONSES = sys.argv[2] == 'stream'
+    METRICS_ENABLED = False
+    # mmap y la cache de paginas de sqlite (hasta 64 MB) crecen con las paginas leidas y
+    # cuentan en el RSS sin ser memoria de la peticion: se reducen para medir solo Python
+    SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, mmap_size=0, cache_size=-2000)
+
+app = create_app(BenchConfig)
+with app.app_context():
+    db.session.execute(update(User).where(User.id == 1).values(role='admin'))
+    db.session.commit()
+    token = create_access_token(identity='1', additional_claims={'role': 'admin'})
+client = app.test_client()
+client.get('/api/catalog/books/1')  # calentar imports/pool antes de medir
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+response = client.get(sys.argv[3], headers={'Authorization': f'Bearer {token}'})
+size = sum(len(chunk) for chunk in response.response)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'status': response.status_code, 'bytes': size, 'seconds': elapsed,
+                  'rss_growth_mb': (peak - before) / 1024}))
+'''
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+
+def seed(db_path, size):
+    code = ('import sys\n'
+            'from app import create_app\n'
+            'from app.seeding import seed_database\n'
+            'from config import Config\n'
+            'class C(Config):\n'
+            f'    SQLALCHEMY_DATABASE_URI = "sqlite:///{db_path}"\n'
+            'app = create_app(C)\n'
+            'with app.app_context():\n'
+            f'    seed_database(books={size}, users=1000, loans={size}, seed=1, log=lambda m: None)\n')
+    subprocess.run([sys.executable, '-c', code], cwd=BACKEND, check=True)
+
+
+def measure(db_path, mode, path):
+    output = subprocess.run([sys.executable, '-c', CHILD, db_path, mode, path], cwd=BACKEND,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak RSS of list endpoints, buffered vs streamed')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20000, 100000],
+                        help='books and loans per run')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("LIST ENDPOINTS: peak RSS growth during one request")
+    print("=" * 80)
+    tmpdir = tempfile.mkdtemp(prefix='bench_streaming_')
+    try:
+        for size in args.sizes:
+            db_path = os.path.join(tmpdir, f'stream_{size}.db')
+            seed(db_path, size)
+            for path in ('/api/catalog/books', '/api/loans/all'):
+                for mode in ('buffered', 'stream'):
+                    result = measure(db_path, mode, path)
+                    print(f"{size:>8} rows  {path:<20} {mode:<9} "
+                          f"RSS +{result['rss_growth_mb']:7.1f} MB  {result['seconds']:6.2f}s  "
+                          f"{result['bytes'] / 1e6:6.1f} MB body")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
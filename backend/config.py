@@ -14,4 +14,134 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
 
     # clave secreta para flask
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'ee85446227993beed298'
\ No newline at end of file
+    SECRET_KEY = os.environ.get('SECRET_KEY') or 'ee85446227993beed298'
+
+    # perfil de ajustes para sqlite, se aplica en cada conexion nueva (app/utils/sqlite_tuning.py)
+    # WAL permite lectores concurrentes con un escritor; busy_timeout evita "database is locked"
+    SQLITE_PRAGMAS = {
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'foreign_keys': 'ON',
+        'cache_size': -64000,       # negativo = KiB (~64 MB por conexion)
+        'mmap_size': 268435456,     # 256 MB
+        'temp_store': 'MEMORY',
+    }
+
+    # pool para servidores con hilos (solo se aplica a bases sqlite en archivo); la espera por bloqueo
+    # es el busy_timeout de SQLITE_PRAGMAS, que reemplaza el timeout de sqlite3.connect
+    SQLITE_POOL_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+        'pool_recycle': 3600,
+        'connect_args': {'check_same_thread': False},
+    }
+
+    # rutas GET de estos blueprints leen desde un engine de solo lectura (pool separado)
+    # por defecto es el mismo archivo abierto con mode=ro; DATABASE_READONLY_URL apunta a una replica
+    READ_REPLICA_ENABLED = os.environ.get('READ_REPLICA_ENABLED', '1') == '1'
+    SQLALCHEMY_READONLY_URI = os.environ.get('DATABASE_READONLY_URL')
+    READ_ROUTED_BLUEPRINTS = ('catalog', 'loans')
+
+    # group commit (opt-in): reserve/renew/return se encolan a un solo hilo escritor que
+    # confirma en micro-lotes (tamano maximo o latencia maxima, lo que ocurra primero)
+    GROUP_COMMIT_ENABLED = os.environ.get('GROUP_COMMIT_ENABLED', '0') == '1'
+    GROUP_COMMIT_MAX_BATCH = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', 64))
+    GROUP_COMMIT_MAX_DELAY_MS = float(os.environ.get('GROUP_COMMIT_MAX_DELAY_MS', 5))
+    GROUP_COMMIT_TIMEOUT = 30
+
+    # modo ASGI (asgi.py): hilos para la parte sincrona de las vistas y conexiones a OpenLibrary
+    ASGI_THREADPOOL_SIZE = int(os.environ.get('ASGI_THREADPOOL_SIZE', 32))
+    ASGI_HTTP_MAX_CONNECTIONS = int(os.environ.get('ASGI_HTTP_MAX_CONNECTIONS', 100))
+
+    # metricas por endpoint en formato Prometheus en /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+
+    # serializador JSON de las respuestas: 'auto' usa orjson/msgspec si estan instalados, si no 'stdlib'
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+    # GET /api/* responde MessagePack/CBOR si el cliente lo pide en Accept (msgpack/cbor2 instalados)
+    BINARY_RESPONSES = os.environ.get('BINARY_RESPONSES', '1') == '1'
+
+    # compresion de respuestas (brotli si esta instalado, si no gzip) a partir de COMPRESSION_MIN_SIZE bytes;
+    # los cuerpos comprimidos se guardan en una LRU de COMPRESSION_CACHE_BYTES por hash del cuerpo
+    # (solo respuestas completas: las listas enviadas por partes, ver STREAM_YIELD_PER, se comprimen siempre)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_MIMETYPES = ['application/json', 'application/msgpack', 'application/x-msgpack',
+                             'application/cbor', 'text/html', 'text/plain', 'text/css', 'application/javascript']
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+    COMPRESSION_CACHE_BYTES = int(os.environ.get('COMPRESSION_CACHE_BYTES', 32 * 1024 * 1024))
+
+    # POST /api/batch: maximo de sub-peticiones GET por lote
+    BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 10))
+
+    # GET /api/changes: maximo de entradas del change log por pagina
+    CHANGES_PAGE_SIZE = int(os.environ.get('CHANGES_PAGE_SIZE', 500))
+
+    # SSE de disponibilidad (modo ASGI): rafagas agrupadas cada SSE_COALESCE_MS; un suscriptor con mas
+    # de SSE_MAX_PENDING libros sin enviar, o cuyo socket no acepta datos en SSE_SEND_TIMEOUT s, se desconecta
+    SSE_COALESCE_MS = int(os.environ.get('SSE_COALESCE_MS', 250))
+    SSE_MAX_PENDING = int(os.environ.get('SSE_MAX_PENDING', 1000))
+    SSE_MAX_SUBSCRIBERS = int(os.environ.get('SSE_MAX_SUBSCRIBERS', 10000))
+    SSE_SEND_TIMEOUT = float(os.environ.get('SSE_SEND_TIMEOUT', 10))
+    SSE_HEARTBEAT = float(os.environ.get('SSE_HEARTBEAT', 15))
+
+    # lista de espera: dias para recoger (reservar) una copia apartada antes de que pase al siguiente
+    HOLD_PICKUP_DAYS = int(os.environ.get('HOLD_PICKUP_DAYS', 3))
+
+    # GET /api/catalog/books/<id>: proximas devoluciones previstas que se muestran
+    FORECAST_RETURNS = int(os.environ.get('FORECAST_RETURNS', 3))
+
+    # mostrador de circulacion: maximo de libros/prestamos por prestamo o devolucion en lote
+    DESK_MAX_ITEMS = int(os.environ.get('DESK_MAX_ITEMS', 50))
+
+    # flask archive-loans: prestamos devueltos hace mas de LOAN_ARCHIVE_DAYS pasan a LoansArchive por lotes
+    LOAN_ARCHIVE_DAYS = int(os.environ.get('LOAN_ARCHIVE_DAYS', 365))
+    LOAN_ARCHIVE_BATCH = int(os.environ.get('LOAN_ARCHIVE_BATCH', 1000))
+
+    # GET /api/loans/history: maximo de prestamos por pagina
+    LOAN_HISTORY_PAGE_SIZE = int(os.environ.get('LOAN_HISTORY_PAGE_SIZE', 50))
+
+    # GET /api/analytics/trends: maximo de buckets (horas o dias) por grafico
+    ROLLUP_MAX_BUCKETS = int(os.environ.get('ROLLUP_MAX_BUCKETS', 1000))
+
+    # "prestados juntos": vecinos guardados por libro y prestamos leidos por lote en flask update-related
+    RELATED_TOP_K = int(os.environ.get('RELATED_TOP_K', 10))
+    RELATED_BATCH_SIZE = int(os.environ.get('RELATED_BATCH_SIZE', 1000))
+    # al reconstruir se descartan los pares con tan pocos usuarios que no esten en el top-K de ningun libro
+    RELATED_PRUNE_COUNT = int(os.environ.get('RELATED_PRUNE_COUNT', 1))
+
+    # libros parecidos por contenido: vecinos por libro, bits del hash de terminos, fraccion maxima de
+    # libros en que puede aparecer un termino, libros por bloque al recalcular (flask rebuild-similar)
+    # y libros a partir de los cuales un termino ya no propone candidatos (solo puntua)
+    SIMILAR_TOP_K = int(os.environ.get('SIMILAR_TOP_K', 10))
+    SIMILAR_HASH_BITS = int(os.environ.get('SIMILAR_HASH_BITS', 20))
+    SIMILAR_MAX_DF = float(os.environ.get('SIMILAR_MAX_DF', 0.5))
+    SIMILAR_BLOCK_SIZE = int(os.environ.get('SIMILAR_BLOCK_SIZE', 500))
+    SIMILAR_MAX_POSTINGS = int(os.environ.get('SIMILAR_MAX_POSTINGS', 1000))
+    # listas de otros libros que se recalculan al anadir, editar o borrar uno (el resto al reconstruir)
+    SIMILAR_MAX_RESCORED = int(os.environ.get('SIMILAR_MAX_RESCORED', 100))
+
+    # listas grandes (catalogo, /api/loans/all) se envian por partes leyendo en lotes de STREAM_YIELD_PER
+    STREAM_LIST_RESPONSES = os.environ.get('STREAM_LIST_RESPONSES', '1') == '1'
+    STREAM_YIELD_PER = int(os.environ.get('STREAM_YIELD_PER', 1000))
+
+    # arranque: en desarrollo cada inicio aplica las migraciones pendientes (app/utils/schema.py; sin
+    # importar alembic si la base ya esta al dia); en produccion las aplica `flask db upgrade` y se puede
+    # precalentar antes de recibir trafico
+    AUTO_CREATE_DB = os.environ.get('AUTO_CREATE_DB', '1') == '1'
+    STARTUP_WARMUP = os.environ.get('STARTUP_WARMUP', '0') == '1'
+
+
+class ProductionConfig(Config):
+    AUTO_CREATE_DB = os.environ.get('AUTO_CREATE_DB', '0') == '1'
+    STARTUP_WARMUP = os.environ.get('STARTUP_WARMUP', '1') == '1'
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    JWT_SECRET_KEY = 'test-secret-key'
+    WTF_CSRF_ENABLED = False
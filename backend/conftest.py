@@ -1,5 +1,11 @@
+import os
+import traceback
+from contextlib import contextmanager
 import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from app import create_app, db
+from config import TestConfig
 from app.models import User, Book, Loan
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
@@ -7,14 +13,8 @@ from datetime import datetime, timedelta
 @pytest.fixture(scope='session')
 def app():
     """Create and configure a test app instance."""
-    app = create_app()
-    app.config.update({
-        'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
-        'JWT_SECRET_KEY': 'test-secret-key',
-        'WTF_CSRF_ENABLED': False
-    })
-    
+    app = create_app(TestConfig)
+
     with app.app_context():
         db.create_all()
         yield app
@@ -121,3 +121,53 @@ def admin_headers(client, init_database):
     })
     token = response.json['access_token']
     return {'Authorization': f'Bearer {token}'}
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app')
+
+class QueryRecorder:
+    """Collects the SQL statements executed while listening, with their call sites."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, self._call_site()))
+
+    def __len__(self):
+        return len(self.statements)
+
+    @staticmethod
+    def _call_site():
+        # innermost frames inside app/ (the code that triggered the query)
+        frames = [f for f in traceback.extract_stack()[:-2] if f.filename.startswith(APP_DIR)]
+        return ' <- '.join(
+            f'{os.path.relpath(f.filename, os.path.dirname(APP_DIR))}:{f.lineno} in {f.name}'
+            for f in reversed(frames[-3:])
+        ) or '<outside app>'
+
+    def report(self, limit):
+        lines = [f'{len(self.statements)} SQL statements executed, budget is {limit}:']
+        for i, (statement, site) in enumerate(self.statements, 1):
+            lines.append(f'  {i}. {" ".join(statement.split())[:200]}')
+            lines.append(f'     at {site}')
+        return '\n'.join(lines)
+
+@pytest.fixture
+def query_budget(app):
+    """Fail the test when the wrapped block runs more than `limit` SQL statements.
+
+    Usage:
+        with query_budget(3):
+            client.get('/api/loans/all', headers=admin_headers)
+    """
+    @contextmanager
+    def budget(limit):
+        recorder = QueryRecorder()
+        event.listen(Engine, 'before_cursor_execute', recorder)
+        try:
+            yield recorder
+        finally:
+            event.remove(Engine, 'before_cursor_execute', recorder)
+        if len(recorder) > limit:
+            pytest.fail(recorder.report(limit), pytrace=False)
+    return budget
@@ -9,9 +9,14 @@ from alembic import context
 # access to the values within the .ini file in use.
 config = context.config
 
+# app/utils/schema.py (development startup) runs the migrations on its own
+# connection, without alembic.ini or the Flask-Migrate extension
+shared_connection = config.attributes.get('connection')
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-fileConfig(config.config_file_name)
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
 logger = logging.getLogger('alembic.env')
 
 
@@ -36,8 +41,11 @@ def get_engine_url():
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-config.set_main_option('sqlalchemy.url', get_engine_url())
-target_db = current_app.extensions['migrate'].db
+if shared_connection is None:
+    config.set_main_option('sqlalchemy.url', get_engine_url())
+    target_db = current_app.extensions['migrate'].db
+else:
+    target_db = current_app.extensions['sqlalchemy']
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -79,6 +87,11 @@ def run_migrations_online():
     and associate a connection with the context.
 
     """
+    if shared_connection is not None:
+        context.configure(connection=shared_connection, target_metadata=get_metadata())
+        with context.begin_transaction():
+            context.run_migrations()
+        return
 
     # this callback is used to prevent an auto-migration from being generated
     # when there are no changes to the schema
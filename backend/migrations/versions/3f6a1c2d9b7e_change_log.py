@@ -0,0 +1,38 @@
+"""change log for incremental sync
+
+Revision ID: 3f6a1c2d9b7e
+Revises: e0d06540082c
+Create Date: 2026-10-19 18:20:11.402913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6a1c2d9b7e'
+down_revision = 'e0d06540082c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ChangeLog',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=10), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('ChangeLog', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ChangeLog_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ChangeLog', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ChangeLog_user_id'))
+
+    op.drop_table('ChangeLog')
@@ -0,0 +1,33 @@
+"""loans autoincrement
+
+Revision ID: c02932dd33af
+Revises: e8191632a1ff
+Create Date: 2026-10-19 16:12:34.961461
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c02932dd33af'
+down_revision = 'e8191632a1ff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite solo admite AUTOINCREMENT al crear la tabla: batch la copia a una nueva
+    with op.batch_alter_table('Loans', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+    # el siguiente id tampoco puede repetir uno ya archivado
+    op.execute('UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT COALESCE(MAX(id), 0) FROM "LoansArchive")) '
+               "WHERE name = 'Loans'")
+    op.execute('INSERT INTO sqlite_sequence (name, seq) SELECT \'Loans\', seq FROM '
+               '(SELECT MAX(id) AS seq FROM "LoansArchive") WHERE seq IS NOT NULL '
+               "AND NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'Loans')")
+
+
+def downgrade():
+    with op.batch_alter_table('Loans', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
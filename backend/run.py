@@ -1,6 +1,4 @@
-from app import create_app, db
+from app import create_app
 app = create_app()
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    app.run(debug=True, port=5001)
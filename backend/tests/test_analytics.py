@@ -0,0 +1,79 @@
+from datetime import datetime
+import pytest
+from app import db
+from app.analytics import circulation_by_genre, circulation_by_period
+from app.models import Book, Loan, LoanArchive, User
+
+YEAR_2020 = {'since': datetime(2020, 1, 1), 'until': datetime(2021, 1, 1)}
+NOW = datetime(2020, 2, 20, 12)
+
+
+@pytest.fixture
+def history(app, init_database):
+    """Two Fiction loans in January 2020 (one archived, returned late) and one Science Fiction loan still out."""
+    with app.app_context():
+        user = User.query.filter_by(email='user@test.com').first()
+        fiction = Book.query.filter_by(genre='Fiction').first()
+        sci_fi = Book.query.filter_by(genre='Science Fiction').first()
+
+        on_time = Loan(user_id=user.id, book_id=fiction.id)
+        on_time.loan_date, on_time.expiration_date = datetime(2020, 1, 1), datetime(2020, 1, 15)
+        on_time.return_date, on_time.status = datetime(2020, 1, 11), 'Returned'
+        late = LoanArchive(id=100000, user_id=user.id, book_id=fiction.id, loan_date=datetime(2020, 1, 20),
+                           expiration_date=datetime(2020, 2, 3), return_date=datetime(2020, 2, 8),
+                           status='Returned', fine_amount=5.0, renewals=0)
+        still_out = Loan(user_id=user.id, book_id=sci_fi.id)
+        still_out.loan_date, still_out.expiration_date = datetime(2020, 2, 1), datetime(2020, 2, 15)
+        db.session.add_all([on_time, late, still_out])
+        db.session.commit()
+        yield
+        db.session.query(LoanArchive).delete()
+        db.session.commit()
+
+
+class TestAnalytics:
+    """Test suite for the circulation analytics reports."""
+
+    def test_by_period(self, app, history):
+        """Test overdue rate, fines and duration per month, across Loans and LoansArchive."""
+        with app.app_context():
+            rows = circulation_by_period('month', now=NOW, **YEAR_2020)
+
+        assert rows == [
+            {'period': '2020-01', 'loans': 2, 'overdue': 1, 'overdue_rate': 0.5, 'fines': 5.0,
+             'avg_duration_days': 14.5},
+            # aun prestado: 5.5 dias de retraso -> $5 como calculate_fine
+            {'period': '2020-02', 'loans': 1, 'overdue': 1, 'overdue_rate': 1.0, 'fines': 5.0,
+             'avg_duration_days': 19.5},
+        ]
+        with app.app_context():
+            assert [r['period'] for r in circulation_by_period('year', now=NOW, **YEAR_2020)] == ['2020']
+
+    def test_by_genre(self, app, history):
+        """Test the same measures per genre, busiest first."""
+        with app.app_context():
+            rows = circulation_by_genre(now=NOW, **YEAR_2020)
+
+        assert [(r['genre'], r['loans'], r['overdue'], r['fines']) for r in rows] == \
+            [('Fiction', 2, 1, 5.0), ('Science Fiction', 1, 1, 5.0)]
+
+    def test_endpoints_are_admin_only(self, client, auth_headers, admin_headers, history):
+        """Test the analytics endpoints validate their arguments and require an admin."""
+        url = '/api/analytics/circulation?period=year&since=2020-01-01&until=2021-01-01'
+
+        assert client.get(url, headers=auth_headers).status_code == 403
+        response = client.get(url, headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json['rows'][0]['loans'] == 3
+        assert client.get('/api/analytics/genres?since=2020-01-01', headers=admin_headers).status_code == 200
+        assert client.get('/api/analytics/circulation?period=week', headers=admin_headers).status_code == 400
+        assert client.get('/api/analytics/genres?since=yesterday', headers=admin_headers).status_code == 400
+
+    def test_cli(self, app, history):
+        """Test flask analytics prints one line per genre."""
+        result = app.test_cli_runner().invoke(args=['analytics', '--by', 'genre', '--since', '2020-01-01',
+                                                    '--until', '2021-01-01'])
+
+        assert result.exit_code == 0
+        assert 'Science Fiction' in result.output
+        assert '2 rows in' in result.output
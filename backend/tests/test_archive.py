@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.archive import archive_loans
+from app.models import Book, Loan, LoanArchive, User
+
+
+@pytest.fixture
+def old_loans(app, init_database):
+    """Three loans returned two years ago, one active and one just returned, oldest first."""
+    with app.app_context():
+        user = User.query.filter_by(email='user@test.com').first()
+        book = Book.query.filter_by(isbn='978-0-14-143951-8').first()
+        long_ago = datetime.utcnow() - timedelta(days=730)
+        loans = [Loan(user_id=user.id, book_id=book.id) for _ in range(5)]
+        for loan in loans[:3]:
+            loan.loan_date, loan.expiration_date = long_ago, long_ago + timedelta(days=14)
+            loan.return_date, loan.status = long_ago + timedelta(days=7), 'Returned'
+        loans[3].loan_date = loans[3].expiration_date = long_ago
+        loans[4].return_date, loans[4].status = datetime.utcnow(), 'Returned'
+        db.session.add_all(loans)
+        db.session.commit()
+        yield [loan.id for loan in loans]
+        db.session.query(LoanArchive).delete()
+        db.session.commit()
+
+
+class TestLoanArchive:
+    """Test suite for the loan history archive."""
+
+    def test_archive_moves_old_returned_loans(self, app, old_loans):
+        """Test only loans returned before the cutoff move, in chunks, keeping their ids."""
+        with app.app_context():
+            assert archive_loans(batch_size=2) == 3
+            assert archive_loans() == 0
+
+            assert {loan.id for loan in LoanArchive.query} == set(old_loans[:3])
+            assert {loan.id for loan in Loan.query} & set(old_loans) == set(old_loans[3:])
+            assert LoanArchive.query.first().status == 'Returned'
+
+    def test_newest_loan_id_not_reused(self, app, old_loans):
+        """Test archiving the max id does not let SQLite hand it out again (AUTOINCREMENT)."""
+        with app.app_context():
+            db.session.get(Loan, old_loans[4]).return_date = datetime.utcnow() - timedelta(days=730)
+            db.session.commit()
+
+            assert archive_loans() == 4
+            active = db.session.get(Loan, old_loans[3])
+            loan = Loan(user_id=active.user_id, book_id=active.book_id)
+            db.session.add(loan)
+            db.session.commit()
+            assert loan.id > old_loans[4]
+
+    def test_archive_logs_deletes(self, app, client, auth_headers, old_loans):
+        """Test clients syncing through /api/changes see the archived loans leave /myLoans."""
+        cursor = client.get('/api/changes', headers=auth_headers).json['cursor']
+        with app.app_context():
+            archive_loans()
+
+        deltas = client.get('/api/changes', headers=auth_headers, query_string={'since': cursor}).json['changes']
+        assert {(c['entity'], c['id'], c['op']) for c in deltas} == {('loan', id_, 'delete') for id_ in old_loans[:3]}
+
+    def test_history_reads_both_tables(self, app, client, auth_headers, old_loans):
+        """Test the history API pages through returned loans, archived or not."""
+        with app.app_context():
+            archive_loans()
+
+        first = client.get('/api/loans/history?limit=2', headers=auth_headers).json
+        second = client.get(f"/api/loans/history?limit=2&before={first['before']}", headers=auth_headers).json
+
+        assert [loan['id'] for loan in first['loans']] == [old_loans[4], old_loans[2]]
+        assert [loan['archived'] for loan in first['loans']] == [False, True]
+        assert first['loans'][1]['book']['isbn'] == '978-0-14-143951-8'
+        assert [loan['id'] for loan in second['loans']] == [old_loans[1], old_loans[0]]
+        assert second['before'] == old_loans[0]
+
+    def test_stats_include_archive(self, app, client, admin_headers, old_loans):
+        """Test loan statistics count archived loans as returned."""
+        before = client.get('/api/loans/stats', headers=admin_headers).json
+
+        with app.app_context():
+            result = app.test_cli_runner().invoke(args=['archive-loans', '--batch-size', '1'])
+        after = client.get('/api/loans/stats', headers=admin_headers).json
+
+        assert 'Archived 3 loans.' in result.output
+        assert after == before
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+
+pytest.importorskip('asgiref')
+httpx = pytest.importorskip('httpx')
+
+import app.asgi as asgi_module
+from app.asgi import AsgiApp
+from app.models import Book
+
+FAKE_BOOK = {'title': 'Async Book', 'author': 'Async Author', 'description': 'From the mock',
+             'cover_url': 'https://covers.openlibrary.org/b/id/1-L.jpg'}
+
+
+@pytest.fixture
+def fake_openlibrary(monkeypatch):
+    """Replace the OpenLibrary lookup with a coroutine that records the ISBNs."""
+    calls = []
+
+    async def fake_fetch(isbn, client):
+        calls.append(isbn)
+        await asyncio.sleep(0)
+        return dict(FAKE_BOOK)
+
+    monkeypatch.setattr(asgi_module, 'fetch_book_by_isbn_async', fake_fetch)
+    return calls
+
+
+def call(app, method, path, **kwargs):
+    """Send one request through the ASGI app and return the httpx response."""
+    async def run():
+        asgi_app = AsgiApp(app)
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            response = await client.request(method, path, **kwargs)
+        await asgi_app.aclose()
+        return response
+    return asyncio.run(run())
+
+
+class TestAsgiMode:
+    """Test suite for the ASGI deployment mode."""
+
+    def test_preview_awaits_async_lookup(self, app, admin_headers, fake_openlibrary):
+        """Test preview_book is served by the async handler."""
+        response = call(app, 'GET', '/api/catalog/books/preview/9780000000001', headers=admin_headers)
+
+        assert response.status_code == 200
+        assert response.json()['title'] == 'Async Book'
+        assert fake_openlibrary == ['9780000000001']
+
+    def test_preview_requires_admin(self, app, auth_headers, fake_openlibrary):
+        """Test the async handler keeps the admin check and skips the lookup."""
+        response = call(app, 'GET', '/api/catalog/books/preview/9780000000001', headers=auth_headers)
+
+        assert response.status_code == 403
+        assert response.json()['msg'] == 'Admin privilege required'
+        assert fake_openlibrary == []
+
+    def test_preview_without_token(self, app, init_database, fake_openlibrary):
+        """Test JWT errors come from the Flask error handlers."""
+        response = call(app, 'GET', '/api/catalog/books/preview/9780000000001')
+
+        assert response.status_code == 401
+
+    def test_add_book_fetches_missing_fields(self, app, admin_headers, fake_openlibrary):
+        """Test add_book fills title/author from the async lookup and inserts the book."""
+        response = call(app, 'POST', '/api/catalog/books', headers=admin_headers,
+                        json={'isbn': '978-0-00-000000-2', 'total_copies': 2})
+
+        assert response.status_code == 201
+        assert response.json()['book']['author'] == 'Async Author'
+        with app.app_context():
+            assert Book.query.filter_by(isbn='978-0-00-000000-2').count() == 1
+
+    def test_add_book_duplicate_isbn(self, app, admin_headers, fake_openlibrary):
+        """Test validation runs before the lookup."""
+        response = call(app, 'POST', '/api/catalog/books', headers=admin_headers,
+                        json={'isbn': '978-0-14-143951-8', 'total_copies': 2})
+
+        assert response.status_code == 409
+        assert fake_openlibrary == []
+
+    def test_other_routes_fall_through_to_wsgi(self, app, init_database):
+        """Test CPU/DB-bound routes are served by the wrapped Flask app."""
+        response = call(app, 'GET', '/api/catalog/books')
+
+        assert response.status_code == 200
+        assert len(response.json()['books']) == 3
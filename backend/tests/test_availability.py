@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from app import db
+from app.models import Book
+from app.utils.availability import HUB_KEY, AvailabilityHub
+
+
+class RecordingHub:
+    """Stands in for the app's hub and keeps what was published."""
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, changes):
+        self.published.append(changes)
+
+
+@pytest.fixture
+def recording_hub(app):
+    previous = app.extensions[HUB_KEY]
+    app.extensions[HUB_KEY] = hub = RecordingHub()
+    yield hub
+    app.extensions[HUB_KEY] = previous
+
+
+class TestAvailabilityHub:
+    """Test suite for the availability fan-out hub."""
+
+    def test_bursts_coalesced_per_book(self):
+        """Test several publishes of one book reach a subscriber as its last value."""
+        async def run():
+            hub = AvailabilityHub(coalesce_ms=10)
+            subscriber = hub.subscribe()
+            for available in (4, 3, 2):
+                hub.publish({1: (available, 5)})
+            hub.publish({2: (0, 1)})
+            await asyncio.wait_for(subscriber.wakeup.wait(), 1)
+            return hub, subscriber.take()
+
+        hub, changes = asyncio.run(run())
+        assert changes == {1: (2, 5), 2: (0, 1)}
+        assert hub.stats['events'] == 1
+
+    def test_slow_consumer_dropped(self):
+        """Test a subscriber too far behind is dropped instead of buffering."""
+        async def run():
+            hub = AvailabilityHub(coalesce_ms=1, max_pending=2)
+            slow, fast = hub.subscribe(), hub.subscribe()
+            for book_id in (1, 2, 3):
+                hub.publish({book_id: (1, 1)})
+                await asyncio.wait_for(fast.wakeup.wait(), 1)
+                fast.take()
+            return hub, slow.take()
+
+        hub, changes = asyncio.run(run())
+        assert changes is None
+        assert hub.stats['dropped'] == 1
+
+    def test_subscriber_limit(self):
+        """Test subscriptions beyond SSE_MAX_SUBSCRIBERS are refused."""
+        async def run():
+            hub = AvailabilityHub(max_subscribers=1)
+            return hub.subscribe(), hub.subscribe()
+
+        first, second = asyncio.run(run())
+        assert first is not None and second is None
+
+    def test_publish_after_commit_only(self, app, client, auth_headers, admin_headers, recording_hub):
+        """Test reserve publishes the new copies and rolled back or unrelated changes do not."""
+        book = client.get('/api/catalog/books').json['books'][0]
+        client.post(f"/api/loans/reserve/{book['id']}", headers=auth_headers)
+        client.put(f"/api/catalog/books/{book['id']}", json={'title': 'Renamed'}, headers=admin_headers)
+        with app.app_context():
+            Book.query.get(book['id']).available_copies = 0
+            db.session.flush()
+            db.session.rollback()
+
+        assert recording_hub.published == [{book['id']: (book['available_copies'] - 1, book['total_copies'])}]
+
+
+class TestAvailabilityStream:
+    """Test suite for the SSE endpoint in ASGI mode."""
+
+    def test_stream_pushes_reservations(self, app, client, auth_headers):
+        """Test a reservation reaches an open stream as an availability event."""
+        pytest.importorskip('asgiref')
+        pytest.importorskip('httpx')
+        from app.asgi import AsgiApp
+
+        book = client.get('/api/catalog/books').json['books'][0]
+        hub = app.extensions[HUB_KEY]
+
+        async def run():
+            asgi_app = AsgiApp(app)
+            sent = asyncio.Queue()
+            disconnect = asyncio.Event()
+
+            async def receive():
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            scope = {'type': 'http', 'method': 'GET', 'path': '/api/catalog/availability/stream',
+                     'query_string': b'', 'headers': []}
+            task = asyncio.ensure_future(asgi_app(scope, receive, sent.put))
+            start = await asyncio.wait_for(sent.get(), 1)
+            retry = await asyncio.wait_for(sent.get(), 1)
+
+            hub.coalesce = 0.01
+            client.post(f"/api/loans/reserve/{book['id']}", headers=auth_headers)
+            event = await asyncio.wait_for(sent.get(), 1)
+
+            disconnect.set()
+            await asyncio.wait_for(task, 1)
+            await asgi_app.aclose()
+            return start, retry, event
+
+        start, retry, event = asyncio.run(run())
+        assert start['status'] == 200
+        assert (b'content-type', b'text/event-stream') in start['headers']
+        assert retry['body'].startswith(b'retry:')
+        assert event['body'].startswith(b'event: availability\ndata: ')
+        assert app.json.loads(event['body'].split(b'data: ', 1)[1]) == {'books': [
+            {'id': book['id'], 'available_copies': book['available_copies'] - 1,
+             'total_copies': book['total_copies']}]}
+        assert len(hub) == 0
@@ -0,0 +1,84 @@
+import pytest
+from app import db
+from app.models import Book, Loan, User
+
+
+def batch(client, paths, headers=None):
+    return client.post('/api/batch', json={'requests': paths}, headers=headers or {})
+
+
+class TestBatch:
+    """Test suite for POST /api/batch."""
+
+    def test_patron_page(self, client, auth_headers):
+        """Test the sub-responses match the same requests made one by one."""
+        paths = ['/api/catalog/books', '/api/loans/myLoans']
+        response = batch(client, paths, auth_headers)
+
+        assert response.status_code == 200
+        results = response.json['responses']
+        assert [r['path'] for r in results] == paths
+        for path, result in zip(paths, results):
+            single = client.get(path, headers=auth_headers)
+            assert result['status'] == single.status_code
+            assert result['body'] == single.json
+
+    def test_dashboard_with_streamed_list(self, app, client, admin_headers):
+        """Test a streamed list inside a batch is read completely."""
+        with app.app_context():
+            user = User.query.filter_by(email='user@test.com').first()
+            book = Book.query.first()
+            db.session.add_all([Loan(user_id=user.id, book_id=book.id) for _ in range(6)])
+            db.session.commit()
+        previous = app.config['STREAM_YIELD_PER']
+        app.config['STREAM_YIELD_PER'] = 2
+        try:
+            response = batch(client, ['/api/catalog/stats', '/api/loans/stats', {'path': '/api/loans/all'}],
+                             admin_headers)
+        finally:
+            app.config['STREAM_YIELD_PER'] = previous
+
+        stats, loan_stats, loans = response.json['responses']
+        assert [stats['status'], loan_stats['status'], loans['status']] == [200, 200, 200]
+        assert len(loans['body']) == 7
+        assert loans['body'] == client.get('/api/loans/all', headers=admin_headers).json
+
+    def test_sub_requests_keep_caller_identity(self, client, auth_headers):
+        """Test a sub-request is authorized with the caller's token, not more."""
+        response = batch(client, ['/api/catalog/stats', '/api/catalog/books?search=Test Book 1'], auth_headers)
+
+        forbidden, search = response.json['responses']
+        assert forbidden['status'] == 403
+        assert search['status'] == 200
+        assert [b['title'] for b in search['body']['books']] == ['Test Book 1']
+
+        anonymous = batch(client, ['/api/loans/myLoans'])
+        assert anonymous.json['responses'][0]['status'] == 401
+
+    def test_unknown_path(self, client, init_database):
+        """Test a sub-request to a missing route reports 404 without failing the batch."""
+        response = batch(client, ['/api/nope'])
+
+        assert response.status_code == 200
+        assert response.json['responses'][0]['status'] == 404
+        assert isinstance(response.json['responses'][0]['body'], str)
+
+    @pytest.mark.parametrize('payload', [
+        {}, {'requests': []}, {'requests': '/api/catalog/books'},
+        {'requests': ['/metrics']}, {'requests': ['/api/batch']},
+        {'requests': ['/api/catalog/books'] * 11},
+    ])
+    def test_invalid_batches(self, client, init_database, payload):
+        """Test malformed, nested, non-API and oversized batches are rejected."""
+        response = client.post('/api/batch', json=payload)
+
+        assert response.status_code == 400
+        assert 'error' in response.json
+
+    def test_metrics_per_sub_request(self, client, auth_headers):
+        """Test the batch and each sub-request are recorded under their own endpoint."""
+        batch(client, ['/api/catalog/books', '/api/loans/myLoans'], auth_headers)
+        text = client.get('/metrics').text
+
+        for endpoint in ('batch.run_batch', 'catalog.get_books', 'loans.my_loans'):
+            assert f'http_response_bytes_total{{endpoint="{endpoint}",method=' in text
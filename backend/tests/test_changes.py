@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import Book, ChangeLog, Loan, User
+
+
+def head(client, headers):
+    return client.get('/api/changes', headers=headers).json['cursor']
+
+
+def changes(client, headers, since, **params):
+    return client.get('/api/changes', headers=headers, query_string={'since': since, **params})
+
+
+class TestChanges:
+    """Test suite for the change log and GET /api/changes."""
+
+    def test_reserve_logs_loan_and_book(self, client, auth_headers):
+        """Test a reservation shows up as a loan upsert and a book upsert."""
+        cursor = head(client, auth_headers)
+        book = client.get('/api/catalog/books').json['books'][0]
+        loan = client.post(f"/api/loans/reserve/{book['id']}", headers=auth_headers).json['loan']
+
+        response = changes(client, auth_headers, cursor)
+
+        assert response.status_code == 200
+        deltas = {(c['entity'], c['id']): c for c in response.json['changes']}
+        assert deltas[('loan', loan['id'])]['op'] == 'upsert'
+        assert deltas[('loan', loan['id'])]['data']['user_id'] == loan['user_id']
+        assert deltas[('book', book['id'])]['data']['available_copies'] == book['available_copies'] - 1
+        assert response.json['cursor'] > cursor
+        assert changes(client, auth_headers, response.json['cursor']).json['changes'] == []
+
+    def test_updates_coalesced(self, client, admin_headers):
+        """Test several changes to one book come back as a single, latest delta."""
+        cursor = head(client, admin_headers)
+        book_id = client.get('/api/catalog/books').json['books'][0]['id']
+        for title in ('First', 'Second'):
+            client.put(f'/api/catalog/books/{book_id}', json={'title': title}, headers=admin_headers)
+
+        delta, = changes(client, admin_headers, cursor).json['changes']
+
+        assert delta['data']['title'] == 'Second'
+        assert delta['cursor'] == head(client, admin_headers)
+
+    def test_other_users_loans_hidden(self, app, client, auth_headers, admin_headers):
+        """Test patrons see every book change but only their own loans."""
+        cursor = head(client, admin_headers)
+        with app.app_context():
+            admin = User.query.filter_by(email='admin@test.com').first()
+            db.session.add(Loan(user_id=admin.id, book_id=Book.query.first().id))
+            db.session.commit()
+
+        assert changes(client, auth_headers, cursor).json['changes'] == []
+        assert [c['entity'] for c in changes(client, admin_headers, cursor).json['changes']] == ['loan']
+
+    def test_loan_delta_has_current_fine(self, app, client, auth_headers):
+        """Test an overdue loan's delta carries the fine and status /myLoans shows, not the stored ones."""
+        cursor = head(client, auth_headers)
+        with app.app_context():
+            user = User.query.filter_by(email='user@test.com').first()
+            loan = Loan(user_id=user.id, book_id=Book.query.first().id)
+            loan.expiration_date = datetime.utcnow() - timedelta(days=6, hours=1)
+            db.session.add(loan)
+            db.session.commit()
+
+        delta, = changes(client, auth_headers, cursor).json['changes']
+        shown, = [loan for loan in client.get('/api/loans/myLoans', headers=auth_headers).json['loans']
+                  if loan['id'] == delta['id']]
+
+        assert (delta['data']['fine_amount'], delta['data']['status']) == (6.0, 'Overdue')
+        assert (shown['fine_amount'], shown['status']) == (6.0, 'Overdue')
+
+    def test_delete_book_logs_deletes(self, app, client, admin_headers):
+        """Test deleting a book logs it and its bulk-deleted loan history."""
+        with app.app_context():
+            user = User.query.filter_by(email='user@test.com').first()
+            book = Book.query.first()
+            loan = Loan(user_id=user.id, book_id=book.id)
+            loan.status = 'Returned'
+            db.session.add(loan)
+            db.session.commit()
+            book_id, loan_id = book.id, loan.id
+        cursor = head(client, admin_headers)
+
+        client.delete(f'/api/catalog/books/{book_id}', headers=admin_headers)
+        deltas = changes(client, admin_headers, cursor).json['changes']
+
+        assert {(c['entity'], c['id'], c['op']) for c in deltas} == \
+            {('loan', loan_id, 'delete'), ('book', book_id, 'delete')}
+
+    def test_rollback_logs_nothing(self, app, init_database):
+        """Test the log is written in the same transaction as the change."""
+        with app.app_context():
+            before = ChangeLog.query.count()
+            Book.query.first().title = 'Rolled back'
+            db.session.flush()
+            assert ChangeLog.query.count() == before + 1
+            db.session.rollback()
+
+            assert ChangeLog.query.count() == before
+
+    def test_pagination(self, client, admin_headers):
+        """Test limit pages through the log in order."""
+        cursor = head(client, admin_headers)
+        for book in client.get('/api/catalog/books').json['books']:
+            client.put(f"/api/catalog/books/{book['id']}", json={'genre': 'Paged'}, headers=admin_headers)
+
+        seen = []
+        while True:
+            page = changes(client, admin_headers, cursor, limit=2).json
+            seen += [c['id'] for c in page['changes']]
+            cursor = page['cursor']
+            if not page['has_more']:
+                break
+
+        assert len(seen) == 3
+        assert changes(client, admin_headers, -1).status_code == 400
@@ -0,0 +1,104 @@
+import pytest
+from app import db
+from app.models import Book, ChangeLog, Hold, User
+
+HAMLET, CLEAN_CODE, MOCKINGBIRD = '978-0-14-143951-8', '978-0-13-110362-7', '978-0-06-112008-4'
+
+
+@pytest.fixture
+def patron_id(app, init_database):
+    with app.app_context():
+        yield User.query.filter_by(email='user@test.com').first().id
+        db.session.query(Hold).delete()
+        db.session.commit()
+
+
+def books(app):
+    with app.app_context():
+        return {book.isbn: (book.id, book.available_copies) for book in Book.query}
+
+
+def checkout(client, headers, user_id, items):
+    return client.post('/api/loans/desk/checkout', json={'user_id': user_id, 'items': items}, headers=headers)
+
+
+class TestCirculationDesk:
+    """Test suite for the batch checkout/return desk endpoints."""
+
+    def test_checkout_reports_each_item(self, app, client, admin_headers, patron_id):
+        """Test a stack with ids, ISBNs, duplicates and unavailable books is lent in one request."""
+        before = books(app)
+        hamlet_id = before[HAMLET][0]
+
+        response = checkout(client, admin_headers, patron_id, [hamlet_id, CLEAN_CODE, MOCKINGBIRD, HAMLET, 'nope'])
+
+        assert response.status_code == 200
+        assert response.json['checked_out'] == 2
+        results = response.json['results']
+        assert [r['status'] for r in results] == ['ok', 'ok', 'error', 'error', 'error']
+        assert results[0]['loan']['book_id'] == hamlet_id
+        assert results[1]['loan']['user_id'] == patron_id
+        assert results[2]['can_hold'] is True
+        assert [r['error'] for r in results[3:]] == ['Duplicate item', 'Book not found']
+        after = books(app)
+        assert after[HAMLET][1] == before[HAMLET][1] - 1
+        assert after[CLEAN_CODE][1] == before[CLEAN_CODE][1] - 1
+        assert after[MOCKINGBIRD][1] == 0
+        with app.app_context():
+            assert db.session.get(Book, hamlet_id).next_return_at is not None
+            logged = {(c.entity, c.entity_id) for c in ChangeLog.query}
+        assert ('book', hamlet_id) in logged
+
+    def test_checkout_statements_per_book(self, app, client, admin_headers, patron_id, query_budget):
+        """Test validation is set-based: only the conditional UPDATE and the loan repeat per book."""
+        ids = [book_id for book_id, _ in books(app).values()]
+
+        # admin, usuario, libros y holds: 4 SELECT; un UPDATE por libro (y el INSERT de su prestamo);
+        # 2 del change log y 1 de las rollups
+        with query_budget(4 + 2 * len(ids) + 3) as recorder:
+            checkout(client, admin_headers, patron_id, ids + [HAMLET])
+
+        updates = [s for s, _ in recorder.statements if s.lstrip().upper().startswith('UPDATE')]
+        assert len(updates) == len(ids)
+
+    def test_desk_requires_admin(self, client, auth_headers, admin_headers, patron_id):
+        """Test only admins use the desk and the item list is validated."""
+        assert checkout(client, auth_headers, patron_id, [HAMLET]).status_code == 403
+        assert checkout(client, admin_headers, patron_id, []).status_code == 400
+        assert checkout(client, admin_headers, patron_id, [[1]]).status_code == 400
+        assert checkout(client, admin_headers, 999999, [HAMLET]).status_code == 404
+        many = list(range(app_limit(client) + 1))
+        assert checkout(client, admin_headers, patron_id, many).status_code == 400
+
+    def test_return_allocates_holds(self, app, client, admin_headers, patron_id):
+        """Test returning a stack puts copies back on the shelf, or aside for the next hold."""
+        lent = checkout(client, admin_headers, patron_id, [HAMLET, CLEAN_CODE]).json['results']
+        hamlet_loan, code_loan = (r['loan'] for r in lent)
+        with app.app_context():
+            db.session.get(Book, code_loan['book_id']).available_copies = 0
+            admin = User.query.filter_by(email='admin@test.com').first()
+            db.session.add(Hold(user_id=admin.id, book_id=code_loan['book_id']))
+            db.session.commit()
+        before = books(app)
+
+        response = client.post('/api/loans/desk/return', headers=admin_headers, json={
+            'user_id': patron_id, 'items': [hamlet_loan['id'], CLEAN_CODE, hamlet_loan['id'], 999999]})
+
+        assert response.status_code == 200
+        assert response.json['returned'] == 2
+        assert [r['status'] for r in response.json['results']] == ['ok', 'ok', 'error', 'error']
+        after = books(app)
+        assert after[HAMLET][1] == before[HAMLET][1] + 1
+        assert after[CLEAN_CODE][1] == 0
+        with app.app_context():
+            assert Hold.query.one().status == 'Ready'
+            assert db.session.get(Book, hamlet_loan['book_id']).next_return_at is None
+
+        again = client.post('/api/loans/desk/return', headers=admin_headers, json={'items': [hamlet_loan['id']]})
+        assert again.json['results'][0]['error'] == 'Loan already returned'
+        assert client.post('/api/loans/desk/return', headers=admin_headers,
+                           json={'items': [HAMLET]}).status_code == 400
+
+
+def app_limit(client):
+    return client.application.config['DESK_MAX_ITEMS']
@@ -0,0 +1,104 @@
+import gzip
+import pytest
+from app import db
+from app.models import Book
+
+
+@pytest.fixture
+def many_books(app, init_database):
+    """Enough books for the catalog list to pass the compression threshold."""
+    with app.app_context():
+        db.session.add_all([
+            Book(isbn=f'979-{i:010d}', title=f'Compressible Book {i}', author='Repeated Author',
+                 genre='Fiction', total_copies=1, available_copies=1, description='A long description. ' * 5)
+            for i in range(20)
+        ])
+        db.session.commit()
+    return app
+
+
+def uncompressed(client, path):
+    return client.get(path).data
+
+
+class TestCompression:
+    """Test suite for response compression."""
+
+    def test_gzip_large_response(self, client, many_books):
+        """Test a large JSON response is gzipped and decompresses to the same body."""
+        response = client.get('/api/catalog/books', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.vary
+        assert response.content_length == len(response.data)
+        assert gzip.decompress(response.data) == uncompressed(client, '/api/catalog/books')
+
+    def test_brotli_preferred(self, client, many_books):
+        """Test brotli is used when the client accepts it."""
+        brotli = pytest.importorskip('brotli')
+        response = client.get('/api/catalog/books', headers={'Accept-Encoding': 'gzip, deflate, br'})
+
+        assert response.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.data) == uncompressed(client, '/api/catalog/books')
+
+    def test_small_response_not_compressed(self, client, init_database):
+        """Test bodies under COMPRESSION_MIN_SIZE are sent as is."""
+        response = client.get('/api/catalog/books/999999', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'Content-Encoding' not in response.headers
+        assert response.json == {'error': 'Book not found'}
+
+    def test_not_compressed_without_accept_encoding(self, client, many_books):
+        """Test clients that do not send Accept-Encoding get plain bodies."""
+        response = client.get('/api/catalog/books')
+
+        assert 'Content-Encoding' not in response.headers
+        assert len(response.json['books']) == 23
+
+    def test_compressed_body_cached(self, app, client, many_books):
+        """Test an unchanged body is served from the cache and a changed one is not."""
+        cache = app.extensions['compression'].cache
+        headers = {'Accept-Encoding': 'gzip'}
+        first = client.get('/api/catalog/books', headers=headers).data
+        hits = cache.hits
+
+        assert client.get('/api/catalog/books', headers=headers).data == first
+        assert cache.hits == hits + 1
+
+        with app.app_context():
+            Book.query.filter_by(isbn='979-0000000000').first().title = 'Changed'
+            db.session.commit()
+        changed = client.get('/api/catalog/books', headers=headers).data
+
+        assert cache.hits == hits + 1
+        assert b'Changed' in gzip.decompress(changed)
+
+    def test_per_user_body_not_cached(self, app, client, admin_headers, many_books):
+        """Test a response to an authenticated request is compressed but kept out of the cache."""
+        cache = app.extensions['compression'].cache
+        headers = {'Accept-Encoding': 'gzip', **admin_headers}
+        entries, misses = len(cache), cache.misses
+
+        response = client.get('/api/catalog/books', headers=headers)
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert b'Compressible Book' in gzip.decompress(response.data)
+        assert (len(cache), cache.misses) == (entries, misses)
+
+    def test_streamed_response_compressed(self, app, client, many_books):
+        """Test a streamed list is compressed chunk by chunk, without going through the cache."""
+        cache = app.extensions['compression'].cache
+        entries, misses = len(cache), cache.misses
+        previous = app.config['STREAM_YIELD_PER']
+        app.config['STREAM_YIELD_PER'] = 5
+        try:
+            response = client.get('/api/catalog/books', headers={'Accept-Encoding': 'gzip'})
+            chunks = list(response.response)
+        finally:
+            app.config['STREAM_YIELD_PER'] = previous
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.content_length is None
+        assert len(chunks) > 1
+        assert gzip.decompress(b''.join(chunks)) == uncompressed(client, '/api/catalog/books')
+        assert (len(cache), cache.misses) == (entries, misses)
@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models import User, Book
+from app.utils.db_routing import READ_BIND
+from config import TestConfig
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """App backed by a SQLite file so a mode=ro engine can be opened on it."""
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'routing.db')
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.session.add(User(
+            email='user@test.com',
+            password=generate_password_hash('user123', method='scrypt'),
+            first_name='Regular',
+            last_name='User',
+            role='user'
+        ))
+        db.session.add(Book(isbn='978-0-14-143951-8', title='Test Book 1', author='Test Author 1',
+                            total_copies=2, available_copies=2))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def engine_calls(file_app):
+    """Record which engine (primary/readonly) executed each statement."""
+    calls = []
+    with file_app.app_context():
+        for key, engine in db.engines.items():
+            label = key or 'primary'
+            event.listen(engine, 'before_cursor_execute',
+                         lambda *args, label=label: calls.append(label))
+    return calls
+
+
+def login(client):
+    response = client.post('/api/auth/login', json={'email': 'user@test.com', 'password': 'user123'})
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+
+class TestReadRouting:
+    """Test suite for read/write engine routing."""
+
+    def test_readonly_bind_is_configured(self, file_app):
+        """Test a file database gets a separate mode=ro engine."""
+        with file_app.app_context():
+            engine = db.engines[READ_BIND]
+            assert engine is not db.engine
+            assert engine.url.query.get('mode') == 'ro'
+
+    def test_readonly_engine_rejects_writes(self, file_app):
+        """Test the read-only pool cannot modify the database."""
+        with file_app.app_context():
+            with db.engines[READ_BIND].connect() as conn:
+                with pytest.raises(OperationalError):
+                    conn.execute(text("UPDATE Books SET available_copies = 0"))
+
+    def test_catalog_get_uses_readonly_engine(self, file_app, engine_calls):
+        """Test GET handlers in the catalog blueprint read from the replica pool."""
+        response = file_app.test_client().get('/api/catalog/books')
+
+        assert response.status_code == 200
+        assert len(response.json['books']) == 1
+        assert engine_calls and set(engine_calls) == {READ_BIND}
+
+    def test_writes_stay_on_primary(self, file_app, engine_calls):
+        """Test POST handlers and their reads use the primary engine."""
+        client = file_app.test_client()
+        headers = login(client)
+        engine_calls.clear()
+
+        response = client.post('/api/loans/reserve', headers=headers, json={'book_id': 1})
+
+        assert response.status_code == 201
+        assert set(engine_calls) == {'primary'}
+
+    def test_use_primary_keeps_read_your_writes(self, file_app, engine_calls):
+        """Test views marked @use_primary read from the primary engine."""
+        client = file_app.test_client()
+        headers = login(client)
+        client.post('/api/loans/reserve', headers=headers, json={'book_id': 1})
+        engine_calls.clear()
+
+        response = client.get('/api/loans/myLoans', headers=headers)
+
+        assert response.status_code == 200
+        assert len(response.json['loans']) == 1
+        assert set(engine_calls) == {'primary'}
+
+    def test_memory_database_has_no_readonly_bind(self, app):
+        """Test routing is disabled when there is no file to reopen read-only."""
+        assert READ_BIND not in db.engines
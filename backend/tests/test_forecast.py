@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import Book, Loan
+
+
+def book_data(client, book_id):
+    return client.get(f'/api/catalog/books/{book_id}').json
+
+
+class TestForecast:
+    """Test suite for the return forecast of each book."""
+
+    def test_checkout_sets_forecast(self, client, auth_headers):
+        """Test a checkout sets the next return and its latest date with renewals."""
+        book_id = client.get('/api/catalog/books').json['books'][0]['id']
+        assert book_data(client, book_id)['forecast'] == []
+
+        loan = client.post(f'/api/loans/reserve/{book_id}', headers=auth_headers).json['loan']
+        data = book_data(client, book_id)
+
+        assert data['next_return_at'] == loan['expiration_date']
+        forecast, = data['forecast']
+        assert forecast['expected_at'] == loan['expiration_date']
+        latest = datetime.fromisoformat(loan['expiration_date']) + timedelta(days=28)
+        assert forecast['latest_at'] == latest.isoformat()
+
+    def test_list_includes_next_return(self, client, auth_headers):
+        """Test list responses carry next_return_at without extra queries per book."""
+        book_id = client.get('/api/catalog/books').json['books'][0]['id']
+        client.post(f'/api/loans/reserve/{book_id}', headers=auth_headers)
+
+        books = {b['id']: b for b in client.get('/api/catalog/books').json['books']}
+
+        assert books[book_id]['next_return_at'] is not None
+        assert sum(1 for b in books.values() if b['next_return_at']) == 1
+
+    def test_renew_and_return_move_forecast(self, app, client, auth_headers, admin_headers):
+        """Test renewing or returning the earliest loan moves the forecast to the next one."""
+        book_id = client.get('/api/catalog/books').json['books'][0]['id']
+        first = client.post(f'/api/loans/reserve/{book_id}', headers=auth_headers).json['loan']
+        with app.app_context():
+            # un prestamo que vence despues del primero
+            second = Loan(user_id=first['user_id'], book_id=book_id, loan_period_days=20)
+            db.session.add(second)
+            db.session.commit()
+            second_expiration = second.expiration_date.isoformat()
+
+        client.post(f"/api/loans/loans/{first['id']}/renew", headers=auth_headers)
+        assert book_data(client, book_id)['next_return_at'] == second_expiration
+        assert [f['expected_at'] for f in book_data(client, book_id)['forecast']][0] == second_expiration
+
+        client.post(f"/api/loans/return/{first['id']}", headers=auth_headers)
+        assert book_data(client, book_id)['next_return_at'] == second_expiration
+
+        with app.app_context():
+            assert db.session.get(Book, book_id).next_return_at.isoformat() == second_expiration
@@ -0,0 +1,97 @@
+import threading
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import User, Book, Loan
+from app.utils.group_commit import GroupCommitWriter
+from config import TestConfig
+
+
+@pytest.fixture
+def group_app(tmp_path):
+    """File-backed app with the group-commit writer enabled."""
+    class GroupCommitConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'group.db')
+        GROUP_COMMIT_ENABLED = True
+        GROUP_COMMIT_MAX_DELAY_MS = 20
+
+    app = create_app(GroupCommitConfig)
+    with app.app_context():
+        users = [User(email=f'user{i}@test.com', password='x', first_name='U', last_name=str(i))
+                 for i in range(10)]
+        db.session.add_all(users)
+        db.session.add(Book(isbn='978-0-14-143951-8', title='Test Book 1', author='Test Author 1',
+                            total_copies=6, available_copies=6))
+        db.session.commit()
+    yield app
+    app.extensions['group_commit'].stop()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def token_headers(app, user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+
+class TestGroupCommit:
+    """Test suite for the group-commit writer."""
+
+    def test_concurrent_reserves_share_batches(self, group_app):
+        """Test concurrent reserves are committed together and never oversell."""
+        headers = [token_headers(group_app, user_id) for user_id in range(1, 11)]
+        statuses = []
+
+        def reserve(h):
+            response = group_app.test_client().post('/api/loans/reserve', headers=h, json={'book_id': 1})
+            statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=reserve, args=(h,)) for h in headers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        writer = group_app.extensions['group_commit']
+        assert sorted(statuses) == [201] * 6 + [400] * 4
+        assert writer.stats['operations'] == 10
+        assert writer.stats['batches'] < 10
+        with group_app.app_context():
+            assert db.session.get(Book, 1).available_copies == 0
+            assert Loan.query.count() == 6
+
+    def test_return_is_durable_when_response_arrives(self, group_app):
+        """Test the response is sent only after the write was committed."""
+        client = group_app.test_client()
+        headers = token_headers(group_app, 1)
+        loan_id = client.post('/api/loans/reserve/1', headers=headers).json['loan']['id']
+
+        response = client.post(f'/api/loans/return/{loan_id}', headers=headers)
+
+        assert response.status_code == 200
+        with group_app.app_context():
+            assert db.session.get(Loan, loan_id).status == 'Returned'
+
+    def test_failing_operation_does_not_fail_batch(self, group_app):
+        """Test one failing operation is isolated from the rest of its batch."""
+        writer = GroupCommitWriter(group_app, db, max_batch=10, max_delay=0.05)
+
+        def add_book(isbn):
+            def operation():
+                db.session.add(Book(isbn=isbn, title='T', author='A'))
+                db.session.flush()
+                return isbn
+            return operation
+
+        def broken():
+            raise ValueError('boom')
+
+        futures = [writer.submit(add_book('111')), writer.submit(broken), writer.submit(add_book('222'))]
+        results = [f.exception(timeout=5) or f.result() for f in futures]
+        writer.stop()
+
+        assert results[0] == '111' and results[2] == '222'
+        assert isinstance(results[1], ValueError)
+        with group_app.app_context():
+            assert Book.query.filter(Book.isbn.in_(['111', '222'])).count() == 2
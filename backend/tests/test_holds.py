@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+import pytest
+from flask_jwt_extended import create_access_token
+from app import db
+from app.holds import sweep_expired_holds
+from app.models import Book, Hold, Loan, User
+
+
+@pytest.fixture
+def waitlisted(app, init_database):
+    """A book whose only copy is on loan to a third patron, plus that patron's token."""
+    with app.app_context():
+        borrower = User(email='borrower@test.com', password='x', first_name='Bo', last_name='Rrower')
+        book = Book.query.filter_by(isbn='978-0-14-143951-8').first()
+        book.total_copies, book.available_copies = 1, 0
+        db.session.add(borrower)
+        db.session.flush()
+        loan = Loan(user_id=borrower.id, book_id=book.id)
+        db.session.add(loan)
+        db.session.commit()
+        token = create_access_token(identity=str(borrower.id), additional_claims={'role': 'user'})
+        yield {'book_id': book.id, 'loan_id': loan.id, 'headers': {'Authorization': f'Bearer {token}'}}
+        db.session.query(Hold).delete()
+        db.session.query(Loan).delete()
+        db.session.delete(User.query.get(borrower.id))
+        db.session.commit()
+
+
+def place(client, headers, book_id):
+    return client.post('/api/loans/holds', json={'book_id': book_id}, headers=headers)
+
+
+def available(app, book_id):
+    with app.app_context():
+        return db.session.get(Book, book_id).available_copies
+
+
+class TestHolds:
+    """Test suite for the hold queue."""
+
+    def test_queue_positions(self, client, auth_headers, admin_headers, waitlisted):
+        """Test holds queue in arrival order and duplicates are refused."""
+        first = place(client, auth_headers, waitlisted['book_id'])
+        second = place(client, admin_headers, waitlisted['book_id'])
+
+        assert first.status_code == 201
+        assert first.json['hold']['position'] == 1
+        assert second.json['hold']['position'] == 2
+        assert place(client, auth_headers, waitlisted['book_id']).status_code == 409
+        holds = client.get('/api/loans/holds', headers=admin_headers).json['holds']
+        assert [(h['book_id'], h['status'], h['position']) for h in holds] == \
+            [(waitlisted['book_id'], 'Waiting', 2)]
+
+    def test_hold_needs_unavailable_book(self, client, auth_headers, init_database):
+        """Test a book with copies on the shelf is reserved, not held."""
+        book_id = client.get('/api/catalog/books').json['books'][0]['id']
+
+        assert place(client, auth_headers, book_id).status_code == 400
+        assert place(client, auth_headers, 999999).status_code == 404
+
+    def test_return_allocates_next_hold(self, app, client, auth_headers, admin_headers, waitlisted):
+        """Test a returned copy is set aside for the first hold, and only that patron gets it."""
+        place(client, auth_headers, waitlisted['book_id'])
+        place(client, admin_headers, waitlisted['book_id'])
+
+        client.post(f"/api/loans/return/{waitlisted['loan_id']}", headers=waitlisted['headers'])
+
+        assert available(app, waitlisted['book_id']) == 0
+        ready, = client.get('/api/loans/holds', headers=auth_headers).json['holds']
+        assert ready['status'] == 'Ready' and ready['position'] is None
+        assert client.get('/api/loans/holds', headers=admin_headers).json['holds'][0]['position'] == 1
+        assert client.post(f"/api/loans/reserve/{waitlisted['book_id']}", headers=admin_headers).status_code == 400
+
+        claim = client.post(f"/api/loans/reserve/{waitlisted['book_id']}", headers=auth_headers)
+
+        assert claim.status_code == 201
+        assert client.get('/api/loans/holds', headers=auth_headers).json['holds'] == []
+        assert available(app, waitlisted['book_id']) == 0
+
+    def test_second_return_releases_nothing(self, app, client, auth_headers, admin_headers, waitlisted):
+        """Test returning an already returned loan fails and leaves the next hold waiting."""
+        place(client, auth_headers, waitlisted['book_id'])
+        place(client, admin_headers, waitlisted['book_id'])
+        url = f"/api/loans/return/{waitlisted['loan_id']}"
+
+        assert client.post(url, headers=waitlisted['headers']).status_code == 200
+        again = client.post(url, headers=waitlisted['headers'])
+
+        assert again.status_code == 400 and again.json['error'] == 'Loan already returned'
+        waiting, = client.get('/api/loans/holds', headers=admin_headers).json['holds']
+        assert waiting['status'] == 'Waiting' and waiting['position'] == 1
+        assert available(app, waitlisted['book_id']) == 0
+
+    def test_added_copies_go_to_the_queue(self, app, client, auth_headers, admin_headers, waitlisted):
+        """Test copies added by an edit are allocated to waiting holds before the shelf."""
+        place(client, auth_headers, waitlisted['book_id'])
+        url = f"/api/catalog/books/{waitlisted['book_id']}"
+
+        assert client.put(url, json={'total_copies': 3}, headers=admin_headers).status_code == 200
+
+        ready, = client.get('/api/loans/holds', headers=auth_headers).json['holds']
+        assert ready['status'] == 'Ready'
+        assert available(app, waitlisted['book_id']) == 1
+        # un prestamo y una reserva lista: no se puede bajar de dos
+        refused = client.put(url, json={'total_copies': 1}, headers=admin_headers)
+        assert refused.status_code == 400 and '(2)' in refused.json['error']
+        assert client.put(url, json={'total_copies': 2}, headers=admin_headers).status_code == 200
+        assert available(app, waitlisted['book_id']) == 0
+
+    def test_cancel_ready_hold_passes_copy_on(self, app, client, auth_headers, admin_headers, waitlisted):
+        """Test cancelling a ready hold gives the copy to the next hold, then to the shelf."""
+        hold_id = place(client, auth_headers, waitlisted['book_id']).json['hold']['id']
+        next_id = place(client, admin_headers, waitlisted['book_id']).json['hold']['id']
+        client.post(f"/api/loans/return/{waitlisted['loan_id']}", headers=waitlisted['headers'])
+
+        assert client.delete(f'/api/loans/holds/{hold_id}', headers=auth_headers).status_code == 200
+        assert client.get('/api/loans/holds', headers=admin_headers).json['holds'][0]['status'] == 'Ready'
+
+        assert client.delete(f'/api/loans/holds/{next_id}', headers=auth_headers).status_code == 404
+        client.delete(f'/api/loans/holds/{next_id}', headers=admin_headers)
+        assert available(app, waitlisted['book_id']) == 1
+
+    def test_sweep_expires_unclaimed_holds(self, app, client, auth_headers, admin_headers, waitlisted):
+        """Test the sweep expires ready holds past their deadline and allocates the next one."""
+        place(client, auth_headers, waitlisted['book_id'])
+        place(client, admin_headers, waitlisted['book_id'])
+        client.post(f"/api/loans/return/{waitlisted['loan_id']}", headers=waitlisted['headers'])
+        past_deadline = timedelta(days=app.config['HOLD_PICKUP_DAYS'], hours=1)
+        later = datetime.utcnow() + past_deadline
+
+        with app.app_context():
+            assert sweep_expired_holds(now=datetime.utcnow()) == 0
+            assert sweep_expired_holds(now=later) == 1
+
+        assert client.get('/api/loans/holds', headers=auth_headers).json['holds'] == []
+        assert client.get('/api/loans/holds', headers=admin_headers).json['holds'][0]['status'] == 'Ready'
+        with app.app_context():
+            assert sweep_expired_holds(now=later + past_deadline) == 1
+        assert available(app, waitlisted['book_id']) == 1
+
+    def test_sweep_command(self, app, waitlisted):
+        """Test flask sweep-holds runs the sweep."""
+        with app.app_context():
+            result = app.test_cli_runner().invoke(args=['sweep-holds'])
+
+        assert result.exit_code == 0
+        assert 'Expired 0 holds.' in result.output
@@ -0,0 +1,71 @@
+import re
+
+
+def sample(text, name, **labels):
+    """Value of the first metric line matching name and the given labels."""
+    for line in text.splitlines():
+        if line.startswith(name + '{') and all(f'{k}="{v}"' in line for k, v in labels.items()):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+class TestMetrics:
+    """Test suite for the /metrics endpoint."""
+
+    def test_metrics_exposed_in_prometheus_format(self, client, init_database):
+        """Test /metrics answers with the Prometheus text format."""
+        client.get('/api/catalog/books')
+        response = client.get('/metrics')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert '# TYPE http_request_duration_seconds histogram' in response.text
+
+    def test_request_latency_status_and_size_recorded(self, app, client, init_database):
+        """Test a request updates its histogram, status counter and byte counter."""
+        before = client.get('/metrics').text
+        count_before = sample(before, 'http_request_duration_seconds_count',
+                              endpoint='catalog.get_books', method='GET') or 0
+
+        response = client.get('/api/catalog/books')
+        client.get('/api/catalog/books/999999')
+        text = client.get('/metrics').text
+
+        assert sample(text, 'http_request_duration_seconds_count',
+                      endpoint='catalog.get_books', method='GET') == count_before + 1
+        assert sample(text, 'http_request_duration_seconds_bucket',
+                      endpoint='catalog.get_books', method='GET', le='+Inf') == count_before + 1
+        assert sample(text, 'http_responses_total', endpoint='catalog.get_book', status=404) >= 1
+        assert sample(text, 'http_response_bytes_total',
+                      endpoint='catalog.get_books', method='GET') >= len(response.data)
+
+    def test_rejected_request_runs_no_sql(self, client, init_database):
+        """Test requests that never reach the database record zero statements."""
+        before = sample(client.get('/metrics').text, 'http_request_sql_statements_sum',
+                        endpoint='catalog.get_catalog_stats') or 0
+        client.get('/api/catalog/stats')  # sin token -> 401 antes de consultar
+        text = client.get('/metrics').text
+
+        assert sample(text, 'http_request_sql_statements_sum', endpoint='catalog.get_catalog_stats') == before
+        assert sample(text, 'http_request_sql_statements_sum', endpoint='metrics_endpoint') == 0
+
+    def test_sql_statements_for_catalog_list(self, client, init_database):
+        """Test the catalog list records its single SELECT."""
+        before = sample(client.get('/metrics').text, 'http_request_sql_statements_sum',
+                        endpoint='catalog.get_books') or 0
+
+        client.get('/api/catalog/books')
+        text = client.get('/metrics').text
+
+        assert sample(text, 'http_request_sql_statements_sum', endpoint='catalog.get_books') == before + 1
+        assert sample(text, 'http_request_sql_seconds_total', endpoint='catalog.get_books') > 0
+
+    def test_unmatched_routes_grouped(self, client):
+        """Test unknown URLs do not create one series per path."""
+        # las paginas de error de werkzeug son respuestas por partes: se registran al enviarse
+        client.get('/no/such/path/1').close()
+        client.get('/no/such/path/2').close()
+        text = client.get('/metrics').text
+
+        assert sample(text, 'http_responses_total', endpoint='unmatched', status=404) >= 2
+        assert not re.search(r'/no/such/path', text)
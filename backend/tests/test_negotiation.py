@@ -0,0 +1,89 @@
+import pytest
+from app import db
+from app.models import Book, Loan, User
+
+msgpack = pytest.importorskip('msgpack')
+cbor2 = pytest.importorskip('cbor2')
+
+DECODERS = {'application/msgpack': msgpack.unpackb, 'application/cbor': cbor2.loads}
+
+
+@pytest.fixture(params=sorted(DECODERS))
+def binary(request):
+    """Media type of each binary format and its decoder."""
+    return request.param, DECODERS[request.param]
+
+
+@pytest.fixture
+def small_batches(app):
+    """Stream in batches of 2 rows so the test data spans several chunks."""
+    previous = app.config['STREAM_YIELD_PER']
+    app.config['STREAM_YIELD_PER'] = 2
+    yield app
+    app.config['STREAM_YIELD_PER'] = previous
+
+
+class TestContentNegotiation:
+    """Test suite for MessagePack/CBOR responses selected with Accept."""
+
+    def test_json_is_default(self, client, init_database):
+        """Test clients without a binary Accept get JSON, and caches are told it varies."""
+        for accept in (None, '*/*', 'text/html,application/xhtml+xml,*/*;q=0.8'):
+            headers = {'Accept': accept} if accept else {}
+            response = client.get('/api/catalog/books', headers=headers)
+
+            assert response.mimetype == 'application/json'
+            assert 'Accept' in response.vary
+
+    def test_catalog_matches_json(self, client, init_database, binary):
+        """Test the catalog list decodes to the same data as the JSON response."""
+        mimetype, decode = binary
+        response = client.get('/api/catalog/books', headers={'Accept': mimetype})
+
+        assert response.status_code == 200
+        assert response.mimetype == mimetype
+        assert decode(response.data) == client.get('/api/catalog/books').json
+        assert len(response.data) < len(client.get('/api/catalog/books').data)
+
+    def test_dates_match_json(self, client, auth_headers, binary):
+        """Test loan datetimes are the same ISO 8601 strings as in JSON."""
+        mimetype, decode = binary
+        response = client.get('/api/loans/myLoans', headers={**auth_headers, 'Accept': mimetype})
+
+        assert decode(response.data) == client.get('/api/loans/myLoans', headers=auth_headers).json
+        assert isinstance(decode(response.data)['loans'][0]['loan_date'], str)
+
+    def test_errors_negotiated(self, client, init_database, binary):
+        """Test error bodies of /api/ GETs use the negotiated format too."""
+        mimetype, decode = binary
+        response = client.get('/api/catalog/books/999999', headers={'Accept': mimetype})
+
+        assert response.status_code == 404
+        assert decode(response.data) == client.get('/api/catalog/books/999999').json
+
+    def test_only_get_negotiated(self, client, init_database):
+        """Test non-GET endpoints keep answering JSON."""
+        response = client.post('/api/auth/login', json={'email': 'user@test.com', 'password': 'user123'},
+                               headers={'Accept': 'application/msgpack'})
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/json'
+        assert 'access_token' in response.json
+
+    def test_large_lists_match_json(self, small_batches, client, admin_headers, binary):
+        """Test lists longer than one batch (streamed CBOR, collected MessagePack) match JSON."""
+        mimetype, decode = binary
+        with small_batches.app_context():
+            user = User.query.filter_by(email='user@test.com').first()
+            book = Book.query.first()
+            db.session.add_all([Loan(user_id=user.id, book_id=book.id) for _ in range(6)])
+            db.session.commit()
+
+        for path in ('/api/loans/all', '/api/catalog/books'):
+            response = client.get(path, headers={**admin_headers, 'Accept': mimetype})
+            # el cliente de pruebas no consume el cuerpo en streaming por si solo
+            body = b''.join(response.response)
+
+            assert response.mimetype == mimetype
+            assert (response.content_length is None) == (mimetype == 'application/cbor')
+            assert decode(body) == client.get(path, headers=admin_headers).json
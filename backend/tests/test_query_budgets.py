@@ -0,0 +1,64 @@
+import pytest
+from app import db
+from app.models import Book, Loan, User
+
+
+def add_loans(app, count):
+    """Spread `count` extra loans over every user and book in the test database."""
+    with app.app_context():
+        users = [u.id for u in User.query.all()]
+        books = [b.id for b in Book.query.all()]
+        db.session.add_all([Loan(user_id=users[i % len(users)], book_id=books[i % len(books)])
+                            for i in range(count)])
+        db.session.commit()
+
+
+class TestQueryBudgets:
+    """Per-endpoint SQL query budgets (guards against N+1 regressions)."""
+
+    @pytest.mark.parametrize('extra_loans', [0, 25])
+    def test_all_loans_budget(self, app, client, admin_headers, query_budget, extra_loans):
+        """Test /api/loans/all stays within 3 queries regardless of row count."""
+        add_loans(app, extra_loans)
+
+        with query_budget(3):
+            response = client.get('/api/loans/all', headers=admin_headers)
+
+        assert response.status_code == 200
+        assert len(response.json) == 1 + extra_loans
+
+    @pytest.mark.parametrize('extra_loans', [0, 25])
+    def test_my_loans_budget(self, app, client, auth_headers, query_budget, extra_loans):
+        """Test /api/loans/myLoans stays within 2 queries regardless of row count."""
+        add_loans(app, extra_loans)
+
+        with query_budget(2):
+            response = client.get('/api/loans/myLoans', headers=auth_headers)
+
+        assert response.status_code == 200
+        assert all(loan['book'] and loan['user'] for loan in response.json['loans'])
+
+    def test_catalog_list_budget(self, client, init_database, query_budget):
+        """Test the catalog list is a single query."""
+        with query_budget(1):
+            response = client.get('/api/catalog/books')
+
+        assert response.status_code == 200
+
+    def test_stats_budgets(self, client, admin_headers, query_budget):
+        """Test the admin dashboard stats endpoints keep their query counts."""
+        with query_budget(5):
+            assert client.get('/api/catalog/stats', headers=admin_headers).status_code == 200
+        with query_budget(5):
+            assert client.get('/api/loans/stats', headers=admin_headers).status_code == 200
+
+    def test_budget_failure_reports_statements(self, client, init_database, query_budget):
+        """Test an exceeded budget lists the statements and their call sites."""
+        with pytest.raises(pytest.fail.Exception) as excinfo:
+            with query_budget(0):
+                client.get('/api/catalog/books')
+
+        message = str(excinfo.value)
+        assert '1 SQL statements executed, budget is 0' in message
+        assert 'SELECT' in message
+        assert 'app/routes/catalog.py' in message and 'get_books' in message
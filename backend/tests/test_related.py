@@ -0,0 +1,112 @@
+from datetime import datetime
+import pytest
+from app import db
+from app.models import Book, BookPair, JobWatermark, Loan, RelatedBook, User
+from app.related import rebuild_related, update_related
+
+
+def borrow(user_id, *book_ids):
+    for book_id in book_ids:
+        loan = Loan(user_id=user_id, book_id=book_id)
+        loan.return_date, loan.status = datetime.utcnow(), 'Returned'
+        db.session.add(loan)
+    db.session.commit()
+
+
+@pytest.fixture
+def borrowed(app, init_database):
+    """Books A, B, C: the test user borrowed B (conftest) and A, another patron A, B and C, the admin A and C."""
+    with app.app_context():
+        a, b, c = (book.id for book in Book.query.order_by(Book.id))
+        user = User.query.filter_by(email='user@test.com').first()
+        admin = User.query.filter_by(email='admin@test.com').first()
+        reader = User(email='reader@test.com', password='x', first_name='Re', last_name='Ader')
+        db.session.add(reader)
+        db.session.commit()
+        borrow(user.id, a)
+        borrow(reader.id, a, b, c)
+        borrow(admin.id, a, c)
+        rebuild_related()
+        yield {'books': (a, b, c), 'admin_id': admin.id}
+        for model in (BookPair, RelatedBook, JobWatermark):
+            db.session.query(model).delete()
+        db.session.commit()
+
+
+def related(client, book_id):
+    return [(book['id'], book['borrowed_together']) for book in
+            client.get(f'/api/catalog/books/{book_id}/related').json['related']]
+
+
+class TestRelatedBooks:
+    """Test suite for the "borrowed together" index."""
+
+    def test_rebuild_counts_patrons(self, client, borrowed):
+        """Test neighbours are ranked by how many patrons borrowed both books."""
+        a, b, c = borrowed['books']
+
+        assert related(client, a) == [(b, 2), (c, 2)]
+        assert related(client, b) == [(a, 2), (c, 1)]
+        assert client.get('/api/catalog/books/999999/related').status_code == 404
+
+    def test_update_reads_only_new_loans(self, app, client, borrowed):
+        """Test new loans move the counts without a rebuild, and repeat loans count once."""
+        a, b, c = borrowed['books']
+        with app.app_context():
+            assert update_related() == 0
+            borrow(borrowed['admin_id'], b, a)
+            assert update_related() == 2
+
+        assert related(client, a) == [(b, 3), (c, 2)]
+        assert related(client, c) == [(a, 2), (b, 2)]
+
+    def test_update_matches_rebuild(self, app, borrowed):
+        """Test folding the history in batches gives the same index as the self-join."""
+        with app.app_context():
+            rebuilt = sorted(db.session.query(RelatedBook.book_id, RelatedBook.rank,
+                                              RelatedBook.other_id, RelatedBook.count))
+            db.session.query(BookPair).delete()
+            db.session.query(RelatedBook).delete()
+            db.session.query(JobWatermark).delete()
+            db.session.commit()
+
+            update_related(batch_size=2)
+
+            assert sorted(db.session.query(RelatedBook.book_id, RelatedBook.rank,
+                                           RelatedBook.other_id, RelatedBook.count)) == rebuilt
+
+    def test_rebuild_prunes_tail_pairs(self, app, client, borrowed):
+        """Test a pair with one patron outside both top-K lists leaves BookPairs, in both directions."""
+        a, b, c = borrowed['books']
+        with app.app_context():
+            rebuild_related(k=1)
+            assert sorted(db.session.query(BookPair.book_id, BookPair.other_id)) == \
+                sorted([(a, b), (b, a), (a, c), (c, a)])
+
+            borrow(borrowed['admin_id'], b)  # b y c vuelven a coincidir: la cuenta empieza de nuevo
+            update_related(k=1)
+            assert db.session.get(BookPair, (b, c)).count == 1
+        assert related(client, c) == [(a, 2)]
+
+    def test_top_k_and_deleted_books(self, app, client, admin_headers, borrowed):
+        """Test lists keep K neighbours and a deleted book leaves every list."""
+        a, b, c = borrowed['books']
+        with app.app_context():
+            rebuild_related(k=1)
+        assert related(client, a) == [(b, 2)]
+
+        with app.app_context():
+            rebuild_related()
+        assert client.delete(f'/api/catalog/books/{c}', headers=admin_headers).status_code == 200
+        assert related(client, a) == [(b, 2)]
+        assert related(client, b) == [(a, 2)]
+
+    def test_loans_after_deleting_the_newest_are_read(self, app, client, admin_headers, borrowed):
+        """Test a loan made after the newest one was deleted gets a new id past the watermark."""
+        a, b, c = borrowed['books']
+        assert client.delete(f'/api/catalog/books/{c}', headers=admin_headers).status_code == 200
+
+        with app.app_context():
+            borrow(borrowed['admin_id'], b)
+            assert update_related() == 1
+        assert related(client, a) == [(b, 3)]
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Book, CirculationRollup, Loan
+from app.rollups import bucket_start, circulation_trend, rebuild_rollups
+
+
+@pytest.fixture
+def rollups(app, init_database):
+    """The rollups of the test loan history only."""
+    with app.app_context():
+        rebuild_rollups()
+        yield
+        db.session.query(CirculationRollup).delete()
+        db.session.commit()
+
+
+def rows(app):
+    with app.app_context():
+        return {(r.granularity, r.bucket, r.genre): (r.checkouts, r.returns) for r in CirculationRollup.query}
+
+
+class TestRollups:
+    """Test suite for the hourly/daily circulation rollups."""
+
+    def test_loan_events_update_rollups(self, app, client, auth_headers, rollups):
+        """Test checkouts and returns land in their hour and day rows, as a rebuild would count them."""
+        with app.app_context():
+            book_id = Book.query.filter_by(genre='Fantasy').first().id
+            db.session.get(Book, book_id).available_copies = 1
+            db.session.commit()
+        today = bucket_start(datetime.utcnow(), 'day')
+
+        loan = client.post(f'/api/loans/reserve/{book_id}', headers=auth_headers).json['loan']
+        client.post(f"/api/loans/return/{loan['id']}", headers=auth_headers)
+        client.post(f"/api/loans/return/{loan['id']}", headers=auth_headers)  # ya devuelto: no cuenta otra vez
+
+        maintained = rows(app)
+        assert maintained[('day', today, 'Fantasy')] == (1, 1)
+        assert sum(v[0] for k, v in maintained.items() if k[0] == 'hour' and k[2] == 'Fantasy') == 1
+        with app.app_context():
+            rebuild_rollups()
+        assert rows(app) == maintained
+
+    def test_trend_running_total(self, app, rollups):
+        """Test the loans out at each bucket start from everything rolled up before the range."""
+        with app.app_context():
+            book_id = Book.query.filter_by(genre='Fiction').first().id
+            user_id = Loan.query.first().user_id
+            start = datetime(2021, 3, 1)
+            for days, returned in ((-3, None), (0, 2), (1, None)):
+                loan = Loan(user_id=user_id, book_id=book_id)
+                loan.loan_date = start + timedelta(days=days, hours=9)
+                db.session.add(loan)
+                db.session.flush()
+                if returned is not None:
+                    loan.return_date = start + timedelta(days=returned, hours=10)
+            db.session.commit()
+
+            daily = circulation_trend(start, start + timedelta(days=3), 'day', 'Fiction')
+            hourly = circulation_trend(start + timedelta(hours=9), start + timedelta(hours=11), 'hour', 'Fiction')
+
+        assert [(p['checkouts'], p['returns'], p['active']) for p in daily] == [(1, 0, 2), (1, 0, 3), (0, 1, 2)]
+        assert [(p['checkouts'], p['active']) for p in hourly] == [(1, 2), (0, 2)]
+
+    def test_trends_endpoint(self, client, auth_headers, admin_headers, rollups):
+        """Test the endpoint picks hours for short ranges and bounds the number of buckets."""
+        url = '/api/analytics/trends'
+
+        assert client.get(url, headers=auth_headers).status_code == 403
+        default = client.get(url, headers=admin_headers).json
+        assert default['granularity'] == 'day' and len(default['series']) in (30, 31)
+        assert default['series'][-1]['active'] >= 1
+        short = client.get(f'{url}?since=2021-03-01&until=2021-03-02', headers=admin_headers).json
+        assert short['granularity'] == 'hour' and len(short['series']) == 24
+        assert client.get(f'{url}?since=2000-01-01&granularity=hour', headers=admin_headers).status_code == 400
+        assert client.get(f'{url}?granularity=week', headers=admin_headers).status_code == 400
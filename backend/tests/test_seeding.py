@@ -0,0 +1,113 @@
+import pytest
+from sqlalchemy import func, text
+from app import create_app, db
+from app.models import User, Book, Loan
+from app.utils.schema import INITIAL_REVISION, head_revision
+from config import TestConfig
+
+
+@pytest.fixture
+def seed_app(tmp_path):
+    """Empty file-backed app for running `flask seed`."""
+    class SeedConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'seed.db')
+
+    app = create_app(SeedConfig)
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def run_seed(app, *args):
+    # con otro app context activo (fixture de sesion) la CLI usaria esa app
+    with app.app_context():
+        result = app.test_cli_runner().invoke(args=['seed', '--books', '200', '--users', '30',
+                                                    '--loans', '3000', *args])
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def snapshot(app):
+    with app.app_context():
+        loans = db.session.query(Loan.user_id, Loan.book_id, Loan.status, Loan.renewals).order_by(Loan.id).all()
+        books = db.session.query(Book.genre, Book.author, Book.total_copies, Book.available_copies) \
+            .order_by(Book.id).all()
+        return loans, books
+
+
+class TestSeedCommand:
+    """Test suite for the `flask seed` synthetic data generator."""
+
+    def test_seed_creates_requested_rows(self, seed_app):
+        """Test the command inserts the requested number of books, users and loans."""
+        result = run_seed(seed_app)
+
+        assert 'Seeded in' in result.output
+        with seed_app.app_context():
+            assert User.query.count() == 30
+            assert Book.query.count() == 200
+            assert Loan.query.count() == 3000
+
+    def test_seed_is_reproducible(self, seed_app):
+        """Test the same seed produces the same rows."""
+        run_seed(seed_app, '--seed', '7')
+        first = snapshot(seed_app)
+        run_seed(seed_app, '--seed', '7', '--reset')
+
+        assert snapshot(seed_app) == first
+
+        run_seed(seed_app, '--seed', '8', '--reset')
+        assert snapshot(seed_app) != first
+
+    def test_reset_migrates_to_head(self, seed_app):
+        """Test --reset rebuilds the schema through the migrations and leaves the revision at head."""
+        with seed_app.app_context():
+            db.session.execute(text('UPDATE alembic_version SET version_num = :old'), {'old': INITIAL_REVISION})
+            db.session.commit()
+
+        run_seed(seed_app, '--reset')
+
+        with seed_app.app_context():
+            assert db.session.execute(text('SELECT version_num FROM alembic_version')).scalar() == \
+                head_revision(seed_app)
+            assert Loan.query.count() == 3000
+
+    def test_seed_distributions(self, seed_app):
+        """Test popularity is skewed and loans mix returned, active and overdue."""
+        run_seed(seed_app)
+
+        with seed_app.app_context():
+            per_book = [count for _, count in db.session.query(Loan.book_id, func.count())
+                        .group_by(Loan.book_id).order_by(func.count().desc())]
+            statuses = dict(db.session.query(Loan.status, func.count()).group_by(Loan.status).all())
+            genres = dict(db.session.query(Book.genre, func.count()).group_by(Book.genre).all())
+
+        # los 10 titulos mas populares concentran mucho mas que su 5% del catalogo
+        assert sum(per_book[:10]) > 0.25 * 3000
+        assert statuses['Returned'] > statuses['On Loan'] > 0
+        assert statuses['Overdue'] > 0
+        assert genres['Fiction'] > genres['Poetry']
+
+    def test_available_copies_match_active_loans(self, seed_app):
+        """Test available copies equal total copies minus unreturned loans."""
+        run_seed(seed_app)
+
+        with seed_app.app_context():
+            active = dict(db.session.query(Loan.book_id, func.count())
+                          .filter(Loan.return_date.is_(None)).group_by(Loan.book_id).all())
+            for book in Book.query.all():
+                assert book.available_copies == book.total_copies - active.get(book.id, 0)
+                assert book.available_copies >= 0
+
+    def test_next_return_matches_active_loans(self, seed_app):
+        """Test the return forecast column is the earliest active expiration of each book."""
+        run_seed(seed_app)
+
+        with seed_app.app_context():
+            earliest = dict(db.session.query(Loan.book_id, func.min(Loan.expiration_date))
+                            .filter(Loan.return_date.is_(None)).group_by(Loan.book_id).all())
+            books = Book.query.all()
+            assert any(book.next_return_at for book in books)
+            for book in books:
+                assert book.next_return_at == earliest.get(book.id)
@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+import pytest
+from app import db
+from app.models import Book
+from app.serializers import BACKENDS, FastJSONProvider, book_to_dict, model_encoder
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def provider(request, app):
+    """JSON provider on each installed backend."""
+    previous = app.config['JSON_BACKEND']
+    app.config['JSON_BACKEND'] = request.param
+    try:
+        yield FastJSONProvider(app)
+    finally:
+        app.config['JSON_BACKEND'] = previous
+
+
+class TestSerializers:
+    """Test suite for the serializer layer and the JSON provider."""
+
+    def test_book_encoder_fields(self, app, init_database):
+        """Test book_to_dict returns the catalog fields."""
+        with app.app_context():
+            book = Book.query.filter_by(isbn='978-0-14-143951-8').first()
+            data = book_to_dict(book)
+
+        assert data == {
+            'id': book.id, 'isbn': '978-0-14-143951-8', 'title': 'Test Book 1',
+            'author': 'Test Author 1', 'genre': 'Fiction', 'total_copies': 5,
+            'available_copies': 5, 'cover_url': None,
+            'description': None, 'next_return_at': None,
+        }
+
+    def test_encoder_loads_expired_attributes(self, app, init_database):
+        """Test an instance expired by commit is refreshed instead of failing."""
+        with app.app_context():
+            book = Book.query.first()
+            db.session.commit()  # expira el estado cargado
+            assert book_to_dict(book)['title'] == book.title
+
+    def test_encoder_rejects_bad_field_names(self):
+        """Test field names must be plain attribute names."""
+        with pytest.raises(ValueError):
+            model_encoder(('id', 'title); import os'))
+
+    def test_backends_agree(self, app, provider):
+        """Test every backend writes the same compact, sorted JSON."""
+        payload = {'b': [1, 2.5, None, True], 'a': 'ñandú', 'when': datetime(2025, 1, 2, 3, 4, 5, 6)}
+        with app.test_request_context():
+            body = provider.response(payload).get_data()
+
+        assert body == '{"a":"ñandú","b":[1,2.5,null,true],"when":"2025-01-02T03:04:05.000006"}\n'.encode()
+        assert provider.loads(body) == json.loads(body)
+
+    def test_loan_dates_are_iso_8601(self, client, auth_headers):
+        """Test loan datetimes render as ISO 8601 like isoformat()."""
+        response = client.get('/api/loans/myLoans', headers=auth_headers)
+
+        loan = response.json['loans'][0]
+        assert datetime.fromisoformat(loan['loan_date']).isoformat() == loan['loan_date']
+
+    def test_unknown_backend_rejected(self, app):
+        """Test a JSON_BACKEND that is not installed fails at startup."""
+        previous = app.config['JSON_BACKEND']
+        app.config['JSON_BACKEND'] = 'nope'
+        try:
+            with pytest.raises(RuntimeError):
+                FastJSONProvider(app)
+        finally:
+            app.config['JSON_BACKEND'] = previous
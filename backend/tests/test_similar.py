@@ -0,0 +1,162 @@
+import pytest
+from app import db
+from app.models import Book, BookFeature, FeatureFrequency, JobWatermark, SimilarBook
+from app.similar import WATERMARK, rebuild_similar
+
+BOOKS = (
+    ('Dragon Mountain Saga', 'Ana Ramos', 'Fantasy', 'Dragons and wizards fight for the mountain.'),
+    ('Dragon Mountain Returns', 'Ana Ramos', 'Fantasy', 'The dragons come back to the mountain.'),
+    ('Cooking with Rice', 'Luis Kim', 'Cooking', 'Recipes for rice and beans.'),
+    ('Rice and Beans Cookbook', 'Luis Kim', 'Cooking', 'Everyday rice recipes.'),
+)
+
+
+@pytest.fixture
+def catalog(app, init_database):
+    """The three conftest books plus two fantasy and two cooking titles, indexed."""
+    with app.app_context():
+        books = [Book(isbn=f'978-1-00-00000{i}-0', title=title, author=author, genre=genre,
+                      description=description, total_copies=1, available_copies=1)
+                 for i, (title, author, genre, description) in enumerate(BOOKS)]
+        db.session.add_all(books)
+        db.session.commit()
+        rebuild_similar()
+        yield [book.id for book in books]
+        for model in (BookFeature, FeatureFrequency, SimilarBook):
+            db.session.query(model).delete()
+        db.session.query(JobWatermark).filter_by(name=WATERMARK).delete()
+        db.session.commit()
+
+
+def similar(client, book_id):
+    return [(book['id'], book['score']) for book in
+            client.get(f'/api/catalog/books/{book_id}/similar').json['similar']]
+
+
+class TestSimilarBooks:
+    """Test suite for the content-based similar books index."""
+
+    def test_rebuild_ranks_by_content(self, client, catalog):
+        """Test books sharing author, genre and title words come first, best score first."""
+        saga, returns, cooking, cookbook = catalog
+
+        ranked = similar(client, saga)
+        assert ranked[0][0] == returns
+        assert [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True)
+        assert similar(client, cookbook)[0][0] == cooking
+        assert cooking not in [book_id for book_id, _ in ranked]
+        assert client.get('/api/catalog/books/999999/similar').status_code == 404
+
+    def test_add_book_is_indexed(self, app, client, admin_headers, catalog):
+        """Test a book added through the API gets its list and enters the lists it beats."""
+        saga, returns, _, _ = catalog
+        response = client.post('/api/catalog/books', headers=admin_headers, json={
+            'isbn': '978-1-00-000009-0', 'title': 'Dragon Mountain Chronicles', 'author': 'Ana Ramos',
+            'genre': 'Fantasy', 'description': 'More dragons on the mountain.', 'total_copies': 1,
+            'cover_url': 'https://example.com/cover.jpg',
+        })
+        assert response.status_code == 201
+        new_id = response.json['book']['id']
+
+        incremental = [book_id for book_id, _ in similar(client, new_id)]
+        assert set(incremental[:2]) == {saga, returns}
+        assert new_id in [book_id for book_id, _ in similar(client, saga)[:2]]
+        with app.app_context():
+            rebuild_similar()
+        assert [book_id for book_id, _ in similar(client, new_id)][:2] == incremental[:2]
+
+    def test_incremental_index_matches_rebuild(self, app, client, admin_headers, catalog):
+        """Test a book added through the API gets the weights and list a rebuild gives it, common features dropped."""
+        def add(isbn, title, author, description):
+            return client.post('/api/catalog/books', headers=admin_headers, json={
+                'isbn': isbn, 'title': title, 'author': author, 'genre': 'Fantasy',
+                'description': description, 'total_copies': 1, 'cover_url': 'https://example.com/cover.jpg',
+            }).json['book']['id']
+
+        def weights(book_id):
+            with app.app_context():
+                return {row.feature: row.weight for row in db.session.query(BookFeature).filter_by(book_id=book_id)}
+
+        # "test", "book" y el genero Fantasy estan en mas del 40% del catalogo: el rebuild los descarta
+        app.config['SIMILAR_MAX_DF'] = 0.4
+        try:
+            with app.app_context():
+                rebuild_similar()
+            lighthouse = add('978-1-00-000009-0', 'Lighthouse Keeper', 'Nadia Ortega', 'A quiet harbor under the fog.')
+            incremental = weights(lighthouse), similar(client, lighthouse)
+            with app.app_context():
+                rebuild_similar()
+            assert weights(lighthouse) == pytest.approx(incremental[0])
+            assert similar(client, lighthouse) == incremental[1]
+
+            # otro libro que solo comparte el genero (descartado) no es similar, ni antes ni despues del rebuild
+            caravan = add('978-1-00-000010-0', 'Desert Caravan', 'Omar Haddad', 'Merchants crossing the dunes.')
+            assert similar(client, caravan) == []
+            assert caravan not in [book_id for book_id, _ in similar(client, lighthouse)]
+            with app.app_context():
+                rebuild_similar()
+            assert similar(client, caravan) == []
+        finally:
+            app.config['SIMILAR_MAX_DF'] = 0.5
+
+    def test_rescoring_is_capped(self, app, client, admin_headers, catalog):
+        """Test add and delete re-score at most SIMILAR_MAX_RESCORED other lists, the closest first."""
+        saga, returns, _, _ = catalog
+        app.config['SIMILAR_MAX_RESCORED'] = 1
+        try:
+            new_id = client.post('/api/catalog/books', headers=admin_headers, json={
+                'isbn': '978-1-00-000009-0', 'title': 'Dragon Mountain Saga', 'author': 'Ana Ramos',
+                'genre': 'Fantasy', 'description': 'Dragons and wizards fight for the mountain.',
+                'total_copies': 1, 'cover_url': 'https://example.com/cover.jpg',
+            }).json['book']['id']
+            # identico a la saga: solo su lista se recalcula en la peticion
+            assert similar(client, saga)[0][0] == new_id
+            assert new_id not in [book_id for book_id, _ in similar(client, returns)]
+
+            with app.app_context():
+                rebuild_similar()
+            assert new_id in [book_id for book_id, _ in similar(client, returns)]
+            # al borrarlo sale de todas las listas, aunque solo una se recalcule
+            assert client.delete(f'/api/catalog/books/{new_id}', headers=admin_headers).status_code == 200
+            assert new_id not in [book_id for book_id, _ in similar(client, saga)]
+            assert new_id not in [book_id for book_id, _ in similar(client, returns)]
+        finally:
+            app.config['SIMILAR_MAX_RESCORED'] = 100
+
+    def test_update_book_reindexes(self, client, admin_headers, catalog):
+        """Test editing a book's text moves it to the lists of its new neighbours."""
+        saga, returns, cooking, cookbook = catalog
+        before = dict(similar(client, returns))[saga]
+        response = client.put(f'/api/catalog/books/{saga}', headers=admin_headers,
+                              json={'title': 'Rice Cooking Basics', 'author': 'Luis Kim', 'genre': 'Cooking'})
+        assert response.status_code == 200
+
+        assert {book_id for book_id, _ in similar(client, saga)[:2]} == {cooking, cookbook}
+        assert saga in [book_id for book_id, _ in similar(client, cooking)[:2]]
+        # la descripcion no cambia: sigue en la lista, con menos puntuacion
+        assert dict(similar(client, returns))[saga] < before
+
+    def test_common_features_score_but_propose_no_candidates(self, app, client, catalog):
+        """Test a feature in more than SIMILAR_MAX_POSTINGS books only adds to the score of candidates."""
+        saga, returns, _, _ = catalog
+        full = dict(similar(client, saga))
+        with app.app_context():
+            app.config['SIMILAR_MAX_POSTINGS'] = 2
+            try:
+                rebuild_similar()
+            finally:
+                app.config['SIMILAR_MAX_POSTINGS'] = 1000
+
+        # el genero Fantasy esta en tres libros: Test Book 3 ya no es candidato
+        assert similar(client, saga) == [(returns, full[returns])]
+
+    def test_deleted_book_leaves_lists(self, client, admin_headers, catalog):
+        """Test deleting a book removes it from every list and its neighbours refill theirs."""
+        saga, returns, cooking, _ = catalog
+        before = similar(client, saga)
+
+        assert client.delete(f'/api/catalog/books/{returns}', headers=admin_headers).status_code == 200
+        after = [book_id for book_id, _ in similar(client, saga)]
+        assert returns not in after
+        assert after == [book_id for book_id, _ in before if book_id != returns]
+        assert returns not in [book_id for book_id, _ in similar(client, cooking)]
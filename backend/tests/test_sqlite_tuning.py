@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from app.utils.sqlite_tuning import build_engine_options
+from config import Config, TestConfig
+
+
+class TestSQLiteTuning:
+    """Test suite for the SQLite engine profile."""
+
+    def test_file_database_gets_profile(self, tmp_path):
+        """Test pragmas and pool settings are applied to file databases."""
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'tuned.db')
+
+        app = create_app(FileConfig)
+        with app.app_context():
+            with db.engine.connect() as conn:
+                assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+                assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+                assert conn.execute(text('PRAGMA foreign_keys')).scalar() == 1
+                assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+            assert db.engine.pool.size() == Config.SQLITE_POOL_OPTIONS['pool_size']
+            db.engine.dispose()
+
+    def test_memory_database_skips_pool_options(self):
+        """Test StaticPool databases do not receive pool sizing arguments."""
+        options = build_engine_options({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLITE_POOL_OPTIONS': Config.SQLITE_POOL_OPTIONS
+        })
+
+        assert 'pool_size' not in options
+
+    def test_explicit_engine_options_win(self):
+        """Test SQLALCHEMY_ENGINE_OPTIONS overrides the profile defaults."""
+        options = build_engine_options({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:////tmp/app.db',
+            'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 2, 'connect_args': {'timeout': 1}},
+            'SQLITE_POOL_OPTIONS': Config.SQLITE_POOL_OPTIONS
+        })
+
+        assert options['pool_size'] == 2
+        assert options['connect_args']['timeout'] == 1
+        assert options['connect_args']['check_same_thread'] is False
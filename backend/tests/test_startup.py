@@ -0,0 +1,112 @@
+import sqlite3
+import pytest
+from app import create_app, db
+from app.utils.schema import INITIAL_REVISION, head_revision, migrations_directory
+from config import TestConfig
+
+# esquema de una base creada por db.create_all() antes de las migraciones (como app.db)
+BASELINE_SCHEMA = """
+CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY);
+CREATE TABLE "Users" (id INTEGER NOT NULL PRIMARY KEY, email VARCHAR(120) NOT NULL UNIQUE,
+    password VARCHAR(128) NOT NULL, first_name VARCHAR(100), last_name VARCHAR(100),
+    role VARCHAR(50) NOT NULL, created_at DATETIME, updated_at DATETIME);
+CREATE TABLE "Books" (id INTEGER NOT NULL PRIMARY KEY, isbn VARCHAR(13) NOT NULL UNIQUE,
+    title VARCHAR(255) NOT NULL, author VARCHAR(255) NOT NULL, total_copies INTEGER NOT NULL,
+    available_copies INTEGER NOT NULL, genre VARCHAR(100), cover_url VARCHAR(500), description TEXT);
+CREATE TABLE "Loans" (id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES "Users" (id),
+    book_id INTEGER NOT NULL REFERENCES "Books" (id), loan_date DATETIME NOT NULL,
+    expiration_date DATETIME NOT NULL, return_date DATETIME, status VARCHAR(20), fine_amount FLOAT,
+    renewals INTEGER);
+INSERT INTO "Users" VALUES (1, 'old@test.com', 'x', 'Old', 'User', 'user', NULL, NULL);
+INSERT INTO "Books" VALUES (1, '9780143039126', 'Dune', 'Frank Herbert', 2, 1, 'Fiction', NULL, NULL);
+INSERT INTO "Loans" VALUES (1, 1, 1, '2024-01-01 10:00:00.000000', '2024-01-15 10:00:00.000000',
+    NULL, 'Active', 0, 0);
+"""
+
+
+def make_config(tmp_path, **settings):
+    class StartupConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'startup.db')
+    for name, value in settings.items():
+        setattr(StartupConfig, name, value)
+    return StartupConfig
+
+
+def dispose(app):
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+class TestStartup:
+    """Test suite for the production startup path."""
+
+    def test_no_create_all_without_auto_create(self, tmp_path):
+        """Test AUTO_CREATE_DB=False leaves the schema to the migrations."""
+        app = create_app(make_config(tmp_path, AUTO_CREATE_DB=False))
+        dispose(app)
+
+        tables = sqlite3.connect(tmp_path / 'startup.db').execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        assert tables == []
+
+    def test_upgrades_baseline_database(self, tmp_path):
+        """Test a database created by create_all before the migrations gets the new columns and backfills."""
+        connection = sqlite3.connect(tmp_path / 'startup.db')
+        connection.executescript(BASELINE_SCHEMA)
+        connection.close()
+
+        app = create_app(make_config(tmp_path))
+        response = app.test_client().get('/api/catalog/books')
+        dispose(app)
+
+        assert response.status_code == 200
+        assert response.json['books'][0]['next_return_at'] == '2024-01-15T10:00:00'
+        revision = sqlite3.connect(tmp_path / 'startup.db').execute(
+            'SELECT version_num FROM alembic_version').fetchone()[0]
+        assert revision != INITIAL_REVISION
+        # el siguiente arranque no tiene nada que aplicar
+        dispose(create_app(make_config(tmp_path)))
+
+    def test_database_at_head_skips_alembic(self, tmp_path, monkeypatch):
+        """Test a database already at head starts without running alembic, and the head matches alembic's."""
+        from alembic import command
+        from alembic.config import Config
+        from alembic.script import ScriptDirectory
+        dispose(create_app(make_config(tmp_path)))
+
+        def fail(*args, **kwargs):
+            raise AssertionError('alembic ran on a database at head')
+        monkeypatch.setattr(command, 'upgrade', fail)
+        app = create_app(make_config(tmp_path))
+        dispose(app)
+
+        config = Config()
+        config.set_main_option('script_location', migrations_directory(app))
+        assert head_revision(app) == ScriptDirectory.from_config(config).get_current_head()
+
+    def test_unversioned_newer_schema_is_refused(self, tmp_path):
+        """Test tables from a later create_all without a revision stop the startup instead of half-upgrading."""
+        connection = sqlite3.connect(tmp_path / 'startup.db')
+        connection.executescript(BASELINE_SCHEMA + 'CREATE TABLE "Holds" (id INTEGER PRIMARY KEY);')
+        connection.close()
+
+        with pytest.raises(RuntimeError, match='flask db stamp'):
+            create_app(make_config(tmp_path))
+
+    def test_migrate_not_loaded_outside_cli(self, tmp_path):
+        """Test web workers skip Flask-Migrate (alembic) entirely."""
+        app = create_app(make_config(tmp_path))
+        dispose(app)
+
+        assert 'migrate' not in app.extensions
+
+    def test_warmup_fills_pools(self, tmp_path):
+        """Test STARTUP_WARMUP opens the pool connections before the first request."""
+        app = create_app(make_config(tmp_path, STARTUP_WARMUP=True))
+
+        with app.app_context():
+            pools = [engine.pool for engine in db.engines.values()]
+            assert all(pool.checkedin() == pool.size() for pool in pools)
+        assert app.test_client().get('/api/catalog/books').status_code == 200
+        dispose(app)
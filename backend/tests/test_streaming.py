@@ -0,0 +1,73 @@
+import pytest
+from app import db
+from app.models import Book, Loan, User
+
+
+@pytest.fixture
+def small_batches(app):
+    """Stream in batches of 2 rows so the test data spans several chunks."""
+    previous = app.config['STREAM_YIELD_PER'], app.config['STREAM_LIST_RESPONSES']
+    app.config['STREAM_YIELD_PER'] = 2
+    yield app
+    app.config['STREAM_YIELD_PER'], app.config['STREAM_LIST_RESPONSES'] = previous
+
+
+def buffered(app, client, *args, **kwargs):
+    """Same request with streaming disabled."""
+    app.config['STREAM_LIST_RESPONSES'] = False
+    try:
+        return client.get(*args, **kwargs)
+    finally:
+        app.config['STREAM_LIST_RESPONSES'] = True
+
+
+class TestStreaming:
+    """Test suite for streamed list responses."""
+
+    def test_catalog_streamed_in_chunks(self, small_batches, client, init_database):
+        """Test the catalog list streams and matches the buffered response."""
+        response = client.get('/api/catalog/books')
+
+        assert response.content_length is None
+        assert response.json == buffered(small_batches, client, '/api/catalog/books').json
+        assert len(response.json['books']) == 3
+
+    def test_search_streamed(self, small_batches, client, init_database):
+        """Test a search streams only the matching books."""
+        response = client.get('/api/catalog/books?search=Test Author')
+
+        assert response.content_length is None
+        assert sorted(b['isbn'] for b in response.json['books']) == \
+            sorted(b['isbn'] for b in buffered(small_batches, client, '/api/catalog/books').json['books'])
+
+    def test_exact_batch_multiple(self, small_batches, client, init_database):
+        """Test a result that fills the last batch exactly still closes the JSON."""
+        with small_batches.app_context():
+            db.session.delete(Book.query.filter_by(isbn='978-0-06-112008-4').first())
+            db.session.commit()
+
+        response = client.get('/api/catalog/books')
+
+        assert response.content_length is None
+        assert len(response.json['books']) == 2
+
+    def test_small_result_not_streamed(self, client, init_database):
+        """Test a list that fits in one batch is a plain response with Content-Length."""
+        response = client.get('/api/catalog/books')
+
+        assert response.content_length == len(response.data)
+
+    def test_all_loans_streamed(self, small_batches, client, admin_headers):
+        """Test /api/loans/all streams loans with their book and user."""
+        with small_batches.app_context():
+            user = User.query.filter_by(email='user@test.com').first()
+            book = Book.query.first()
+            db.session.add_all([Loan(user_id=user.id, book_id=book.id) for _ in range(6)])
+            db.session.commit()
+
+        response = client.get('/api/loans/all', headers=admin_headers)
+
+        assert response.content_length is None
+        assert len(response.json) == 7
+        assert response.json == buffered(small_batches, client, '/api/loans/all', headers=admin_headers).json
+        assert all(loan['book'] and loan['user'] for loan in response.json)